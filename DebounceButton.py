@@ -1,8 +1,67 @@
 from machine import Pin
+from array import array
 import utime as time
+import uasyncio as asyncio
+
+# === 按鈕事件 ===
+CLICK = "click"
+LONG = "long"
+DOUBLE = "double"
+
+# === 狀態機的狀態 ===
+IDLE = 0       # 放開且穩定，沒有待確認的點擊
+BOUNCING = 1   # 電位剛改變，等待穩定（去彈跳）
+PRESSED = 2    # 按下且穩定
+RELEASED = 3   # 短按放開，等待雙擊時間到才確認單擊 / 雙擊
+
+class ButtonEvents:
+    """
+    多個按鈕共用的事件佇列（建立按鈕時以 events= 指定）。
+    用法：bid, kind = await ev.get() 取得 (按鈕 id, 事件)，或 async for bid, kind in ev: ...
+    佇列滿時丟棄最舊的事件。
+    """
+    def __init__(self, size=8):
+        self.size = size
+        self._q = []
+        self._ready = asyncio.Event()
+
+    def put(self, item):
+        if len(self._q) >= self.size:
+            self._q.pop(0)
+        self._q.append(item)
+        self._ready.set()
+
+    async def get(self):
+        while not self._q:
+            self._ready.clear()
+            await self._ready.wait()
+        return self._q.pop(0)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        return await self.get()
 
 class DebouncedButton:
-    def __init__(self, pin_no, id=0, on_click=None, on_long=None, on_double=None, double_ms=400):
+    """
+    防彈跳按鈕，判斷單擊 / 長按 / 雙擊並呼叫對應回呼（或放進 ButtonEvents 佇列）。
+    以 tick(now) 推進的狀態機實作，任何情況都不會 sleep 或忙碌等待：
+      IDLE → (電位改變) BOUNCING → (穩定 _STABLE_MS) PRESSED
+      PRESSED → BOUNCING → 長按：觸發 LONG 回到 IDLE；短按：RELEASED
+      RELEASED → 超過 double_ms 沒有再按：觸發 CLICK / DOUBLE 回到 IDLE
+      BOUNCING 期間電位又回到原本的穩定值 → 視為雜訊，回到原本的狀態
+    兩種取樣方式：
+      輪詢模式（預設）：每次 tick 讀取腳位電位
+      中斷模式（irq=True）：Pin.irq 只把邊緣時間寫進環形緩衝區，tick 依實際邊緣時間推進；
+                           按鈕閒置時 run() / run_buttons() 不必定時喚醒
+    多個按鈕請共用一個 run_buttons([...]) 協程，每次 tick 的成本固定。
+    """
+    _RING = 16        # 中斷模式：邊緣時間戳環形緩衝區大小
+    _STABLE_MS = 10   # 電位需維持多久才視為穩定（去彈跳）
+
+    def __init__(self, pin_no, id=0, on_click=None, on_long=None, on_double=None, double_ms=400,
+                 irq=False, events=None):
         # === 初始化輸入腳位 ===
         # 使用 PULL_UP 表示預設為高電位，按下時會變成低電位
         self.pin = Pin(pin_no, Pin.IN, Pin.PULL_UP)
@@ -13,108 +72,164 @@ class DebouncedButton:
         self.on_long = on_long
         self.on_double = on_double
         self.double_ms = double_ms  # 雙擊間隔時間 (ms)
+        self.events = events        # ButtonEvents 佇列（可省略）
 
         # === 內部固定參數 ===
         self._LONG_THRESHOLD = 800   # 長按判斷閾值 (ms)
 
         # === 狀態變數 ===
-        self._last_state = self.pin.value()  # 上次讀取的腳位狀態
+        self._state = IDLE
+        self._prev = IDLE                    # 進入 BOUNCING 前的狀態（雜訊時回復）
+        self._stable = self.pin.value()      # 目前採信的穩定電位 (0=按下, 1=放開)
+        self._raw = self._stable             # 最後觀察到的電位
+        self._since = 0                      # 最後一次電位改變的時間
+        self._edge = 0                       # 這次彈跳第一個邊緣的時間（作為按下 / 放開的時間）
         self._pressed_time = 0               # 記錄按下的時間點
         self._last_click_time = 0            # 上次放開按鈕的時間
-        self._click_pending = False          # 是否有等待確認的點擊事件
-        self._click_count = 0                # 點擊次數計數器
-        self._is_pressed = False             # 是否目前處於按下狀態
+        self._click_count = 0                # 待確認的點擊次數（0 = 沒有待確認的點擊）
+
+        # === 中斷模式 ===
+        # _head 只由中斷處理函式增加，_tail 只由 tick() 增加，兩邊不必上鎖
+        self._edges = None
+        if irq:
+            self._edges = array('i', [0] * self._RING)  # 邊緣發生時的 ticks_ms
+            self._head = 0                              # 已記錄的邊緣數
+            self._tail = 0                              # 已處理的邊緣數
+            self._flag = asyncio.ThreadSafeFlag()       # 有新邊緣時喚醒 run()
+            self.pin.irq(self._irq, Pin.IRQ_FALLING | Pin.IRQ_RISING)
 
     # -------------------------------------------------------------------------
-    def wait_pin_stable(self):
-        """
-        等待腳位電位穩定，作為硬體去彈跳處理。
-        原理：連續 10ms 內狀態不變才視為穩定。
-        """
-        cur = self.pin.value()  # 目前腳位電位 (0=按下, 1=放開)
-        counter = 0
-        while counter < 10:
-            if self.pin.value() != cur:
-                # 狀態變化 → 計數歸零，重新計算
-                counter = 0
-                cur = self.pin.value()
+    def _irq(self, pin):
+        """中斷處理：只把邊緣時間寫進環形緩衝區（不配置記憶體、不呼叫回呼）"""
+        h = self._head
+        self._edges[h % self._RING] = time.ticks_ms()
+        self._head = h + 1
+        self._flag.set()
+
+    def _sample(self, level, t):
+        """觀察到腳位電位 level（發生時間 t）"""
+        if level == self._raw:
+            return
+        # 中斷模式的 tick 可能晚到：先依這個邊緣的時間推進，之前已穩定的電位不會被當成雜訊
+        self._advance(t)
+        self._raw = level
+        self._since = t
+        if self._state != BOUNCING:
+            self._prev = self._state
+            self._state = BOUNCING
+            self._edge = t
+
+    def _emit(self, kind, cb):
+        if cb:
+            cb(self.id, self.pin)
+        if self.events:
+            self.events.put((self.id, kind))
+
+    def _settle(self, level):
+        """彈跳結束，電位穩定在 level"""
+        if level == self._stable:
+            # 又回到原本的電位 → 雜訊，回復原本的狀態
+            self._state = self._prev
+            return
+        self._stable = level
+        t = self._edge
+
+        # =============================
+        # 按下事件 (狀態由高→低)
+        # =============================
+        if level == 0:
+            self._pressed_time = t  # 記錄按下的時間
+            self._state = PRESSED
+            return
+
+        # =============================
+        # 放開事件 (狀態由低→高)
+        # =============================
+        if self._prev != PRESSED:
+            # 開機時就按著的按鈕放開 → 沒看到按下，不算
+            self._state = IDLE
+            return
+        press_dur = time.ticks_diff(t, self._pressed_time)
+
+        # ---- 長按判斷 ----
+        if press_dur >= self._LONG_THRESHOLD:
+            # 長按後清除點擊狀態，避免被誤認為單擊
+            self._click_count = 0
+            self._state = IDLE
+            self._emit(LONG, self.on_long)
+
+        # ---- 短按（單擊或雙擊） ----
+        else:
+            if self._click_count and time.ticks_diff(t, self._last_click_time) < self.double_ms:
+                # 若與上次放開時間間隔小於 double_ms → 判定為雙擊
+                self._click_count += 1
             else:
-                # 狀態穩定 → 增加計數
-                counter += 1
-            time.sleep_ms(1)  # 每次間隔 1ms，總計約 10ms
-        return cur  # 回傳最終穩定狀態
+                # 超過時間 → 視為新的一次點擊
+                self._click_count = 1
+            self._last_click_time = t
+            self._state = RELEASED
+
+    def tick(self, now):
+        """推進狀態機（now 為 ticks_ms），不會等待；建議每 5~20ms 呼叫一次"""
+        if self._edges is not None:
+            h, t = self._head, self._tail
+            if h - t > self._RING:  # 緩衝區溢位：中間的邊緣已被覆蓋，下面再以實際電位校正
+                t = h - self._RING
+            while t < h:
+                self._sample(1 - self._raw, self._edges[t % self._RING])
+                t += 1
+            self._tail = h
+        self._sample(self.pin.value(), now)
+        self._advance(now)
+
+    def _advance(self, now):
+        """時間推進到 now：確認已穩定的電位與已逾時的點擊"""
+        if self._state == BOUNCING and time.ticks_diff(now, self._since) >= self._STABLE_MS:
+            self._settle(self._raw)
+
+        # ---- 待確認的點擊：超過雙擊等待時間 → 確認為單擊或雙擊事件 ----
+        if self._click_count and time.ticks_diff(now, self._last_click_time) > self.double_ms:
+            n = self._click_count
+            self._click_count = 0
+            if self._state == RELEASED:
+                self._state = IDLE
+            elif self._prev == RELEASED:  # 彈跳中：若只是雜訊，回到 IDLE 而非 RELEASED
+                self._prev = IDLE
+            if n == 1:
+                self._emit(CLICK, self.on_click)   # 只點了一次 → 單擊
+            else:
+                self._emit(DOUBLE, self.on_double) # 點擊兩次以上 → 雙擊
 
-    # -------------------------------------------------------------------------
     def update(self):
-        """
-        更新按鈕狀態，並在需要時觸發對應回呼函數。
-        建議在主程式或 asyncio 迴圈中以 5~20ms 間隔呼叫一次。
-        """
-        state = self.pin.value()  # 讀取目前按鈕狀態
-
-        # 若與上次狀態不同 → 代表有變化（可能是按下或放開）
-        if state != self._last_state:
-            # 進行去彈跳處理，確保狀態穩定
-            state = self.wait_pin_stable()
-            self._last_state = state  # 更新狀態紀錄
-
-            # =============================
-            # 按下事件 (狀態由高→低)
-            # =============================
-            if state == 0:
-                self._pressed_time = time.ticks_ms()  # 記錄按下的時間
-                self._is_pressed = True               # 標記為「按下中」
-
-            # =============================
-            # 放開事件 (狀態由低→高)
-            # =============================
-            elif state == 1 and self._is_pressed:
-                self._is_pressed = False
-                # 計算按下的持續時間
-                press_dur = time.ticks_diff(time.ticks_ms(), self._pressed_time)
-
-                # ---- 長按判斷 ----
-                if press_dur >= self._LONG_THRESHOLD:
-                    # 若長按時間超過閾值 → 觸發長按回呼
-                    if self.on_long:
-                        self.on_long(self.id, self.pin)
-                    # 長按後清除點擊狀態，避免被誤認為單擊
-                    self._click_pending = False
-                    self._click_count = 0
-
-                # ---- 短按（單擊或雙擊） ----
-                else:
-                    now = time.ticks_ms()
-                    diff = time.ticks_diff(now, self._last_click_time)
-
-                    if diff < self.double_ms:
-                        # 若與上次放開時間間隔小於 double_ms → 判定為雙擊
-                        self._click_count += 1
-                    else:
-                        # 超過時間 → 視為新的一次點擊
-                        self._click_count = 1
-
-                    # 更新時間與等待標記
-                    self._last_click_time = now
-                    self._click_pending = True
-
-        # -----------------------------------------------------------------
-        # 若有「尚未確認」的點擊事件 → 檢查是否該觸發單擊或雙擊
-        # -----------------------------------------------------------------
-        if self._click_pending:
-            diff = time.ticks_diff(time.ticks_ms(), self._last_click_time)
-
-            # 超過雙擊等待時間 → 確認為單擊或雙擊事件
-            if diff > self.double_ms:
-                if self._click_count == 1:
-                    # 只點了一次 → 單擊
-                    if self.on_click:
-                        self.on_click(self.id, self.pin)
-                elif self._click_count >= 2:
-                    # 點擊兩次以上 → 雙擊
-                    if self.on_double:
-                        self.on_double(self.id, self.pin)
-
-                # 事件完成 → 重置狀態
-                self._click_pending = False
-                self._click_count = 0
+        """輪詢用：以目前時間推進一次（與舊版相同的呼叫方式）"""
+        self.tick(time.ticks_ms())
+
+    def idle(self):
+        """是否完全閒置（沒有彈跳中、按下中或待確認的事件）"""
+        return self._state == IDLE and not self._click_count
+
+    async def run(self, period_ms=10):
+        """單一按鈕的事件判斷任務（多個按鈕請用 run_buttons）"""
+        await run_buttons([self], period_ms)
+
+async def run_buttons(buttons, period_ms=10):
+    """
+    多個按鈕共用的事件判斷協程：有按鈕忙碌時每 period_ms 推進一次；
+    全部都是中斷模式且閒置時，等待任一按鈕的中斷才醒來。
+    """
+    flag = None
+    if all(b._edges is not None for b in buttons):
+        flag = asyncio.ThreadSafeFlag()
+        for b in buttons:
+            b._flag = flag  # 共用一個旗標，任一按鈕有邊緣就喚醒
+    while True:
+        now = time.ticks_ms()
+        busy = False
+        for b in buttons:
+            b.tick(now)
+            if not b.idle():
+                busy = True
+        if flag is None or busy:
+            await asyncio.sleep_ms(period_ms)
+        else:
+            await flag.wait()
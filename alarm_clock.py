@@ -11,23 +11,56 @@
 
 # -------- 匯入必要模組 --------
 import uasyncio as asyncio            # 非同步執行（可同時處理顯示、網頁、按鈕）
-import ujson as json                  # JSON 檔案存取，用於保存鬧鐘資料
-import network, ntptime, time         # WiFi 連線、NTP 校時、時間操作
+import network, ntptime               # WiFi 連線、NTP 校時
+import utime as time                  # 時間操作（ticks_ms 等）
+import os                             # 亂數（鬧鐘清單版本號的起始值）
+try:
+    import ujson as json              # 串流輸出 /alarms 時編碼下次響鈴資訊
+except ImportError:
+    import json
 from machine import I2C, Pin, PWM     # 硬體：I2C (OLED)、GPIO (按鈕)、PWM (蜂鳴器)
 from ssd1306 import SSD1306_I2C       # OLED 顯示驅動
-from bitmap_font_tool import set_font_path, draw_text  # 顯示中文字的工具
-from DebounceButton import DebouncedButton              # 防彈跳按鈕類別
+from text_screen import TextScreen    # 只重畫有變動的行
+from bitmap_font_tool import set_font_path, prewarm, cache_stats  # 顯示中文字的工具
+from DebounceButton import DebouncedButton, run_buttons # 防彈跳按鈕類別
+from alarm_store import AlarmStore, to_minutes, from_minutes, make_rule  # 鬧鐘資料、排序索引、重複規則
+from alarm_journal import AlarmJournal                  # 鬧鐘快照 + 日誌持久化
+from alarm_bulk import BulkImport, parse_line, check, csv_row, CSV_HEADER  # 批次匯入 / 匯出
+from melody import compile_melody, MelodyPlayer, ToneSequencer  # 編譯好的旋律 + 播放器
+import perf                                             # 效能量測（/metrics；perf.PROFILE = 0 時全部關閉）
+from http_server import (HTTPServer, StaticFile, ChunkedWriter, HTTPError,  # HTTP 伺服器（連線保持 + 路由表 + SSE）
+                         send, send_json, start_stream, send_event)
+
+_boot_t0 = time.ticks_ms()  # 開機計時起點（各階段的時間見 boot_log）
 
 # -------- 設定字型路徑 --------
-set_font_path('./lib/fonts/fusion_bdf.12')  # 請依實際字型路徑修改
+# 子集字型只含韌體與網頁用到的字（整個載入記憶體；字數與大小由產生工具印出，目前約 6.3 KB）；
+# 修改畫面文字後請執行 python lib/build_font_subset.py 重新產生，或改回完整字型 './lib/fonts/fusion_bdf.12'
+FONT_PATH = './lib/fonts/fusion_subset.12'  # 請依實際字型路徑修改
+CLOCK_CHARS = "台灣時間未校正下次:無0123456789/ "  # 主畫面用到的字常駐記憶體，每秒重繪不必讀檔
+set_font_path(FONT_PATH, preload=True)
+prewarm(CLOCK_CHARS)
 
 # -------- 系統設定 --------
 SSID = "WiFi SSID"               # WiFi SSID
 PASSWORD = "WiFi 密碼"          # WiFi 密碼
-ALARM_FILE = "alarm.txt"       # 鬧鐘資料檔案
+ALARM_FILE = "alarm.bin"       # 鬧鐘資料檔案（二進位快照，每筆 8 bytes）
+LEGACY_ALARM_FILE = "alarm.txt" # 舊版 JSON 鬧鐘檔（開機時自動轉檔）
+JOURNAL_FILE = "alarm.log"     # 鬧鐘變更日誌
 TZ_OFFSET = 8 * 3600           # 台灣時區 (+8 小時)
 SNOOZE_MIN = 5                 # 小睡時間（分鐘）
 PREVIEW_SEC = 5                # 音樂預聽時間（秒）
+BUTTON_IRQ = True              # 按鈕使用中斷模式（False = 每 20ms 輪詢）
+TONE_TIMER = True              # 旋律由硬體計時器驅動（False = 由 asyncio 協程播放）
+SCHED_MAX_SLEEP = 60           # 排程最長睡眠秒數（時鐘被 NTP 校正時最晚一分鐘內重新對齊）
+SSE_MAX = 3                    # 同時連線的 /events 推播數上限（超過時網頁改用輪詢）
+CHANGES_MAX = 32               # 保留最近幾筆鬧鐘變動（/alarms?since= 只回傳差異；更舊的版本回傳整份清單）
+BULK_MAX = 1000                # 一次 /bulk 最多匯入的筆數
+BULK_ERRORS = 20               # /bulk 錯誤報告最多列出幾行
+WIFI_TIMEOUT = 10              # 每次 WiFi 連線嘗試最多等幾秒
+NET_BACKOFF_MAX = 300          # WiFi / NTP 失敗時的重試間隔上限（秒；從 1 秒開始每次加倍）
+NTP_RESYNC = 6 * 3600          # 校時成功後每隔幾秒再校一次
+CLOCK_JUMP = 3600              # 校時後時鐘往前跳超過幾秒視為 RTC 原本無效（跳過的區間不補響）
 
 # -------- 音樂設定 --------
 # 標準西洋音階頻率對照（C4為中央C）
@@ -127,18 +160,34 @@ MELODY = {
     ('C4',200),('C4',200),('D4',200),('E4',200),
     ('D4',400),('C4',400),('C4',400)],
 }
+# 開機時編譯成 array('H')（頻率, 毫秒交錯存放），播放時不再查表
+SONGS = [compile_melody(MELODY[i], NOTE_FREQS) for i in range(len(MUSIC_NAME))]
 
 # -------- 全域狀態變數 --------
 oled = None                      # OLED 顯示物件
+screen = None                    # OLED 文字畫面（記住上次內容，局部更新）
 speaker = None                   # 蜂鳴器物件 (PWM)
-alarms = []                      # 鬧鐘清單
+player = None                    # 旋律播放器（響鈴、預聽、小睡共用，stop() 即停止）
+alarms = AlarmStore()            # 鬧鐘清單（緊密陣列 + 時間排序索引）
+journal = AlarmJournal(alarms, ALARM_FILE, JOURNAL_FILE, LEGACY_ALARM_FILE)  # 鬧鐘持久化
 is_ringing = False               # 是否正在響鈴
 MODE = "CLOCK"                   # 當前模式
 cursor_idx = 0                   # 設定畫面游標位置
 view_idx = 0                     # 檢視鬧鐘索引
 setting = {"y":0,"M":0,"d":0,"h":0,"m":0,"music":0}  # 暫存設定中的鬧鐘
 _preview_task = None             # 音樂預聽任務
-_last_rung_key = None            # 防止同一分鐘重複觸發鬧鐘
+_ring_music = 0                  # 正在響的曲目（小睡後沿用）
+_snooze = None                   # 小睡：(響鈴分鐘時間戳, 曲目)，只存在記憶體，不新增鬧鐘
+alarm_changed = asyncio.Event()  # 鬧鐘新增 / 開關 / 刪除時通知排程重新計算
+# 鬧鐘清單版本號（每次變動加一，網頁據此判斷是否重新讀取）；
+# 每次開機從不同的亂數開始，重開機後網頁手上的舊版本號不會被誤認為最新
+alarm_version = int.from_bytes(os.urandom(2), "big") << 16
+_changes = []                    # 最近的變動 (版本號, 動作, 列號, 內容)，供 /alarms?since= 使用
+_web_event = asyncio.Event()     # 響鈴狀態或鬧鐘清單改變時喚醒 /events 推播（見 web_notify）
+_sse_clients = 0                 # 目前的 /events 連線數
+time_synced = False              # 開機後是否已由 NTP 校時（之前的時間來自 RTC，冷開機時不正確）
+_notice = None                   # 主畫面暫時顯示的訊息：(行內容, 顯示到的 ticks_ms)
+_boot_times = []                 # 開機各階段完成的時間 (階段, 毫秒)
 
 # ============================================================
 # 公用函式區
@@ -151,13 +200,26 @@ def taiwan_time():
 def fmt_date(y,M,d): return f"{y:04d}/{M:02d}/{d:02d}"  # 日期格式化
 def fmt_time(h,m):   return f"{h:02d}:{m:02d}"           # 時間格式化
 
+@perf.timed("next_alarm")
 def next_alarm():
-    """找出下一筆有效的鬧鐘（依時間排序）"""
-    now = taiwan_time()
-    key = (now[0], now[1], now[2], now[3], now[4])
-    # 篩選未過期的鬧鐘
-    future = [a for a in alarms if a.get("enabled", True) and (a["y"],a["M"],a["d"],a["h"],a["m"]) > key]
-    return sorted(future, key=lambda x:(x["y"],x["M"],x["d"],x["h"],x["m"]))[0] if future else None
+    """找出下一筆有效的鬧鐘（索引已依時間排序，二分搜尋即可）；小睡較早時回傳小睡的 dict"""
+    y, M, d, h, m = taiwan_time()[:5]
+    a = alarms.next_after(to_minutes(y, M, d, h, m))
+    if _snooze and (a is None or _snooze[0] < alarms.raw(a.i)[0]):
+        y, M, d, h, m = from_minutes(_snooze[0])
+        return {"y": y, "M": M, "d": d, "h": h, "m": m, "music": _snooze[1], "enabled": True}
+    return a
+
+def rule_text(a):
+    """重複規則的簡短說明（單次鬧鐘為空字串）"""
+    days, every = a["days"], a["every"]
+    if every:
+        return "每天" if every == 1 else f"每{every}天"
+    if days == 0x7F: return "每天"
+    if days == 0x1F: return "平日"
+    if days == 0x60: return "週末"
+    if days: return "週" + "".join("一二三四五六日"[k] for k in range(7) if days >> k & 1)
+    return ""
 
 # ======== 增減欄位值 ========
 def inc_field(k):
@@ -178,54 +240,90 @@ def dec_field(k):
 
 # ======== 鬧鐘資料存取 ========
 def load_alarms():
-    """從檔案載入鬧鐘資料；若無檔案則建立空白檔"""
-    global alarms
-    try:
-        with open(ALARM_FILE,"r") as f:
-            alarms = json.loads(f.read())
-        for a in alarms:  # 保險起見補欄位
-            a.setdefault("enabled", True)
-            a.setdefault("music", 0)
-    except:
-        alarms = []
-        with open(ALARM_FILE,"w") as f:
-            f.write("[]")
+    """從快照 + 日誌重建鬧鐘資料；若無檔案則建立空白檔"""
+    journal.load()
 
+@perf.timed("save_alarms")
 def save_alarms():
-    """將目前鬧鐘清單寫入檔案"""
-    with open(ALARM_FILE,"w") as f:
-        f.write(json.dumps(alarms))
+    """將目前鬧鐘清單整份寫成新快照（並清空日誌）"""
+    journal.compact()
 
-def add_alarm(y,M,d,h,m,music):
-    """新增一筆鬧鐘"""
-    alarms.append({"y":y,"M":M,"d":d,"h":h,"m":m,"music":music,"enabled":True})
+def alarms_updated(op, i, value=None):
+    """
+    鬧鐘清單已變動：版本號加一並記錄變動，通知排程與網頁推播。
+    op 為 "add" / "put"（value = 新增 / 更新後鬧鐘的 JSON）、"set"（value = 開關狀態）或 "del"；
+    op 為 None 表示整份清單都變了（批次匯入），清空變動紀錄，網頁會改讀整份清單。
+    """
+    global alarm_version
+    alarm_version += 1
+    if op is None:
+        _changes.clear()
+    else:
+        _changes.append((alarm_version, op, i, value))
+        if len(_changes) > CHANGES_MAX:
+            del _changes[0]
+    alarm_changed.set()
+    web_notify()
+
+def add_alarm(y,M,d,h,m,music,rule=0):
+    """新增一筆鬧鐘（只在日誌附加一行）；rule 為重複規則（見 alarm_store.make_rule）"""
+    i = alarms.add(y, M, d, h, m, music, rule=rule)
+    journal.log_add(i)
+    alarms_updated("add", i, alarms.row_json(i))
+
+def import_alarms(staged, replace=False):
+    """批次匯入：一次加入所有暫存的鬧鐘，只寫一次快照（不逐筆寫日誌）"""
+    staged.apply(alarms, replace)
     save_alarms()
+    alarms_updated(None, -1)
+
+def skip_alarm(i, day=None):
+    """重複鬧鐘略過某天（預設為下一次），回傳略過的日序；不是重複鬧鐘時回傳 None"""
+    day = alarms.skip(i, day)
+    if day is not None:
+        journal.log_skip(i, day)
+        alarms_updated("put", i, alarms.row_json(i))
+    return day
 
 def switch_alarm(i):
     """切換鬧鐘開/關狀態"""
-    if 0 <= i < len(alarms):
-        alarms[i]["enabled"] = not alarms[i]["enabled"]
-        save_alarms()
-        return alarms[i]["enabled"]
-    return None
+    en = alarms.toggle(i)
+    if en is not None:
+        journal.log_enabled(i)
+        alarms_updated("set", i, en)
+    return en
 
 def delete_alarm(i):
     """刪除指定索引的鬧鐘"""
-    if 0 <= i < len(alarms):
-        del alarms[i]
-        save_alarms()
+    if alarms.delete(i):
+        journal.log_delete(i)
+        alarms_updated("del", i)
         return True
     return False
 
 def sync_time():
-    """透過 NTP 自動校時（重試三次）"""
-    for _ in range(3):
-        try:
-            ntptime.settime()
-            print("[NTP] OK")
-            return
-        except:
-            time.sleep(1)
+    """
+    透過 NTP 校時一次，回傳是否成功（失敗由 net_task 退避重試）。
+    時鐘往前跳超過 CLOCK_JUMP（冷開機時 RTC 從 2000 年開始）時通知排程以新時間重新對齊，
+    不把跳過的區間當成錯過的鬧鐘補響；小幅校正照常由排程補上。
+    """
+    global time_synced
+    before = time.time()
+    try:
+        ntptime.settime()
+    except Exception:
+        return False
+    if time.time() - before > CLOCK_JUMP:
+        alarm_changed.set()
+    time_synced = True
+    print("[NTP] OK")
+    return True
+
+def boot_log(phase):
+    """記錄開機階段完成的時間（從程式開始執行算起；/metrics 的 boot 行）"""
+    ms = time.ticks_diff(time.ticks_ms(), _boot_t0)
+    _boot_times.append((phase, ms))
+    print("[Boot] %s %d ms" % (phase, ms))
 
 # ============================================================
 # OLED 顯示相關
@@ -236,12 +334,10 @@ def oled_init():
     i2c = I2C(0, scl=Pin(7), sda=Pin(5))
     return SSD1306_I2C(128, 64, i2c)
 
+@perf.timed("oled_write")
 def oled_write(lines):
-    """在 OLED 上顯示多行文字"""
-    oled.fill(0)
-    for text, y in lines:
-        draw_text(oled, text, 0, y)
-    oled.show()
+    """在 OLED 上顯示多行文字（只重畫、只傳送有變動的部分）"""
+    screen.write(lines)
 
 def hint(text, ms=800):
     """顯示提示文字（短暫訊息）"""
@@ -254,7 +350,7 @@ def show_clock():
     nxt = next_alarm()
     nxt_str = f"{nxt['M']:02d}/{nxt['d']:02d} {nxt['h']:02d}:{nxt['m']:02d}" if nxt else "無"
     oled_write([
-        ("台灣時間", 0),
+        ("台灣時間" if time_synced else "時間未校正", 0),
         (fmt_date(y,M,d), 16),
         (f"{fmt_time(h,m)}:{s:02d}", 32),
         (f"下次:{nxt_str}", 48)
@@ -305,7 +401,7 @@ def show_view_alarm():
     a = alarms[i]
     st = "開啟" if a.get("enabled", True) else "關閉"
     oled_write([
-        (f"鬧鐘 {i+1}/{len(alarms)}", 0),
+        (f"鬧鐘 {i+1}/{len(alarms)} {rule_text(a)}", 0),
         (f"{a['y']:04d}/{a['M']:02d}/{a['d']:02d}", 16),
         (f"{a['h']:02d}:{a['m']:02d} {MUSIC_NAME[a['music']]}", 32),
         ("A← B→/長按A開關", 48),
@@ -322,84 +418,51 @@ def speaker_init(pin=6):
     return s
 
 async def _play_melody_for(music_index, seconds):
-    """
-    播放指定音樂一段時間 (用於預聽)
-    使用毫秒計時避免無聲或延遲問題
-    """
-    try:
-        t0 = time.ticks_ms()
-        melody = MELODY[music_index]
-        while time.ticks_diff(time.ticks_ms(), t0) < seconds * 1000:
-            for note, d in melody:
-                if time.ticks_diff(time.ticks_ms(), t0) >= seconds * 1000:
-                    break
-                freq = NOTE_FREQS.get(note, 0)
-                if freq > 0:
-                    speaker.freq(freq)
-                    speaker.duty(512)
-                else:
-                    speaker.duty(0)
-                await asyncio.sleep_ms(int(d))
-                speaker.duty(0)
-                await asyncio.sleep_ms(40)
-    finally:
-        speaker.duty(0)  # 預聽結束靜音
+    """播放指定音樂一段時間 (用於預聽)"""
+    await player.play(SONGS[music_index], seconds=seconds)
 
 async def ring_alarm(music_index):
     """
     鬧鐘響鈴主程序 (非同步)
-    可正常連續播放整首音樂直到被停止
+    重複播放整首音樂直到被停止（player.stop()）
     """
-    global is_ringing, MODE
+    global is_ringing, MODE, _ring_music
     if is_ringing:
         return  # 已在響鈴，避免重入
     is_ringing = True
     MODE = "RINGING"
+    _ring_music = music_index
+    web_notify()
 
-    melody = MELODY[music_index]
     oled_write([("鬧鐘響鈴中", 0), (MUSIC_NAME[music_index], 24), ("A 小睡5分  B 停止", 44)])
 
     try:
-        while is_ringing:
-            for note, d in melody:
-                if not is_ringing:
-                    break
-                freq = NOTE_FREQS.get(note, 0)
-                if freq > 0:
-                    speaker.freq(freq)
-                    speaker.duty(512)
-                else:
-                    speaker.duty(0)
-                await asyncio.sleep_ms(int(d))
-                speaker.duty(0)
-                await asyncio.sleep_ms(40)
+        await player.play(SONGS[music_index], loop=True)
     finally:
-        # 確保停止時靜音與返回主畫面
-        speaker.duty(0)
+        # 確保停止時返回主畫面
         is_ringing = False
         MODE = "CLOCK"
+        web_notify()
 
 def stop_ringing():
     """停止鬧鐘響鈴並返回主畫面"""
     global is_ringing
     is_ringing = False
-    speaker.duty(0)
+    player.stop()
+    web_notify()
     hint("已停止", 700)
     # ⚡ 立即回主畫面
     global MODE
     MODE = "CLOCK"
 
 def snooze_alarm():
-    """小睡五分鐘，建立新的鬧鐘後返回主畫面"""
-    global is_ringing
-    y, M, d, h, m, s, _, _ = taiwan_time()
-    m += SNOOZE_MIN
-    if m >= 60:
-        m -= 60
-        h = (h + 1) % 24
-    add_alarm(y, M, d, h, m, 0)
+    """小睡五分鐘（只記在記憶體，由 alarm_task 到時響起同一首曲子），返回主畫面"""
+    global is_ringing, _snooze
+    _snooze = (_now_sec() // 60 + SNOOZE_MIN, _ring_music)
+    alarm_changed.set()
     is_ringing = False
-    speaker.duty(0)
+    player.stop()
+    web_notify()
     hint("已小睡5分鐘", 700)
     # ⚡ 立即回主畫面
     global MODE
@@ -589,188 +652,483 @@ def on_btnB_double(_id, _pin):
             show_view_alarm()
 
 # ============================================================
-# Web 伺服器 (提供前端網頁控制) — 修正版
+# Web 伺服器 (提供前端網頁控制)
+# 請求由 http_server 解析，依路徑在 ROUTES 查表處理
 # ============================================================
 
-async def handle_client(reader, writer):
-    """處理每次 HTTP 請求"""
-    req = (await reader.read(1024)).decode()
-    try:
-        if "/time" in req:
-            # 回傳目前時間 JSON
-            y, M, d, h, m, s, _, _ = taiwan_time()
-            await writer.awrite(
-                "HTTP/1.1 200 OK\r\nContent-Type: application/json\r\n\r\n" +
-                json.dumps({"y": y, "M": M, "d": d, "h": h, "m": m, "s": s})
-            )
-
-        elif "/alarms" in req:
-            # 回傳所有鬧鐘資料 + 下次響鈴時間
-            nxt = next_alarm()
-            nxt_info = None
-            if nxt:
-                nxt_info = {
-                    "y": nxt["y"], "M": nxt["M"], "d": nxt["d"],
-                    "h": nxt["h"], "m": nxt["m"],
-                    "music": MUSIC_NAME[nxt["music"]],
-                    "enabled": nxt["enabled"]
-                }
-            data = {
-                "alarms": alarms,
-                "next_alarm": nxt_info
-            }
-            await writer.awrite("HTTP/1.1 200 OK\r\nContent-Type: application/json\r\n\r\n" + json.dumps(data))
-
-        elif "/add?" in req:
-            # 新增鬧鐘 (從網址參數讀取)
-            q = req.split("/add?")[1].split(" ")[0]
-            kvs = {kv.split("=")[0]: kv.split("=")[1] for kv in q.split("&")}
-            add_alarm(int(kvs["y"]), int(kvs["M"]), int(kvs["d"]),
-                      int(kvs["h"]), int(kvs["m"]), int(kvs["music"]))
-            await writer.awrite("HTTP/1.1 200 OK\r\n\r\n")
-
-        elif "/switch" in req:
-            # 切換開關
-            idx = int(req.split("id=")[1].split(" ")[0])
-            en = switch_alarm(idx)
-            await writer.awrite("HTTP/1.1 200 OK\r\n\r\n" if en is not None else "HTTP/1.1 404 Not Found\r\n\r\n")
-
-        elif "/delete" in req:
-            # 刪除指定鬧鐘
-            idx = int(req.split("id=")[1].split(" ")[0])
-            ok = delete_alarm(idx)
-            await writer.awrite("HTTP/1.1 200 OK\r\n\r\n" if ok else "HTTP/1.1 404 Not Found\r\n\r\n")
-
-        elif "/next_alarm" in req:
-            # 回傳下次響鈴的時間（給前端定期刷新使用）
-            nxt = next_alarm()
-            if nxt:
-                nxt_data = {
-                    "y": nxt["y"], "M": nxt["M"], "d": nxt["d"],
-                    "h": nxt["h"], "m": nxt["m"],
-                    "music": MUSIC_NAME[nxt["music"]],
-                    "enabled": nxt["enabled"]
-                }
-            else:
-                nxt_data = None
-            await writer.awrite("HTTP/1.1 200 OK\r\nContent-Type: application/json\r\n\r\n" + json.dumps(nxt_data))
-
-        elif "/status" in req:
-            # 回傳是否正在響鈴，供網頁偵測用
-            await writer.awrite("HTTP/1.1 200 OK\r\nContent-Type: application/json\r\n\r\n" +
-                                json.dumps({"ringing": is_ringing}))
-            
-        elif "/stop" in req:
-            stop_ringing()
-            await writer.awrite("HTTP/1.1 200 OK\r\n\r\n")
-
-        elif "/snooze" in req:
-            snooze_alarm()
-            await writer.awrite("HTTP/1.1 200 OK\r\n\r\n")
+def _alarm_info(a):
+    """鬧鐘的 JSON 內容（曲目以名稱表示），沒有鬧鐘時為 None"""
+    if not a:
+        return None
+    return {
+        "y": a["y"], "M": a["M"], "d": a["d"],
+        "h": a["h"], "m": a["m"],
+        "music": MUSIC_NAME[a["music"]],
+        "enabled": a["enabled"]
+    }
+
+def _time_info():
+    y, M, d, h, m, s, _, _ = taiwan_time()
+    return {"y": y, "M": M, "d": d, "h": h, "m": m, "s": s}
 
-        else:
-            # 傳送 index.html 網頁
-            with open("web/index.html") as f:
-                for line in f:
-                    await writer.awrite(line)
+async def api_time(req):
+    """回傳目前時間 JSON"""
+    await send_json(req, _time_info())
+
+def _changes_since(since):
+    """版本 since 之後的所有變動；記錄已不完整（或版本號不認得）時回傳 None"""
+    if since == alarm_version:
+        return []
+    if not _changes or not _changes[0][0] - 1 <= since < alarm_version:
+        return None
+    return [c for c in _changes if c[0] > since]
+
+async def api_alarms(req):
+    """
+    回傳鬧鐘清單 + 下次響鈴時間 + 清單版本號：
+      ?offset=&limit=  只回傳第 offset 筆起的 limit 筆（total 為總筆數）
+      ?since=版本號     只回傳之後的變動 {"changes": [{"op": "add"|"set"|"del", "i": 列號, ...}]}，
+                       依序套用即可（put = 以新內容取代該筆）；變動已不完整時改回傳整份清單（有 "alarms" 欄位）
+    整份清單以 ChunkedWriter 逐筆寫出，不建立 dict 清單，也不組成完整的 JSON 字串。
+    """
+    # 注意：bytes 的 %s 在 MicroPython 會輸出 b'...'，bytes 片段一律分開寫入
+    nxt = json.dumps(_alarm_info(next_alarm())).encode()
+    if "since" in req.query:
+        changes = _changes_since(req.arg("since", int))
+        if changes is not None:
+            out = ChunkedWriter(req, "application/json")
+            await out.start()
+            await out.write(b'{"version":%d,"next_alarm":' % alarm_version)
+            await out.write(nxt)
+            await out.write(b',"changes":[')
+            for k, (_, op, i, value) in enumerate(changes):
+                if k:
+                    await out.write(b",")
+                if op in ("add", "put"):
+                    await out.write(b'{"op":"' + op.encode() + b'","i":%d,"alarm":' % i)
+                    await out.write(value)
+                    await out.write(b"}")
+                elif op == "set":
+                    await out.write(b'{"op":"set","i":%d,"enabled":' % i + (b"true}" if value else b"false}"))
+                else:
+                    await out.write(b'{"op":"del","i":%d}' % i)
+            await out.write(b"]}")
+            await out.close()
+            return
+    total = len(alarms)
+    offset = req.arg("offset", int) if "offset" in req.query else 0
+    limit = req.arg("limit", int) if "limit" in req.query else total
+    if offset < 0 or limit < 0:
+        raise HTTPError(400)
+    out = ChunkedWriter(req, "application/json")
+    await out.start()
+    await out.write(b'{"version":%d,"total":%d,"offset":%d,"next_alarm":' % (alarm_version, total, offset))
+    await out.write(nxt)
+    await out.write(b',"alarms":[')
+    for i in range(offset, min(total, offset + limit)):
+        if i >= len(alarms):  # 傳送途中有鬧鐘被刪除
+            break
+        if i > offset:
+            await out.write(b",")
+        await out.write(alarms.row_json(i))
+    await out.write(b"]}")
+    await out.close()
 
-        await writer.aclose()
+async def api_next_alarm(req):
+    """回傳下次響鈴的時間（給前端定期刷新使用）"""
+    await send_json(req, _alarm_info(next_alarm()))
 
-    except Exception as e:
-        print("[Web]", e)
+async def api_add(req):
+    """
+    新增鬧鐘 (從網址參數讀取)；重複鬧鐘另加 days=星期遮罩（bit0 = 週一，1~127）
+    或 every=間隔天數，日期為第一次響鈴的起點。欄位驗證同 /bulk（日期不存在、曲目超出範圍等回覆 400）
+    """
+    y, M, d = req.arg("y", int), req.arg("M", int), req.arg("d", int)
+    h, m, music = req.arg("h", int), req.arg("m", int), req.arg("music", int)
+    days = req.arg("days", int) if "days" in req.query else 0
+    every = req.arg("every", int) if "every" in req.query else 0
+    try:
+        check(y, M, d, h, m, music, days, every, len(MUSIC_NAME))
+    except ValueError:
+        raise HTTPError(400)
+    add_alarm(y, M, d, h, m, music, make_rule(days, every))
+    await send(req)
+
+async def api_skip(req):
+    """重複鬧鐘略過一天：預設為下一次，或由 y, M, d 指定日期"""
+    i = req.arg("id", int)
+    if not 0 <= i < len(alarms):
+        raise HTTPError(404)
+    day = None
+    if "d" in req.query:
+        day = to_minutes(req.arg("y", int), req.arg("M", int), req.arg("d", int), 0, 0) // 1440
+    await send(req, 200 if skip_alarm(i, day) is not None else 400)
+
+async def api_switch(req):
+    """切換開關"""
+    en = switch_alarm(req.arg("id", int))
+    await send(req, 200 if en is not None else 404)
+
+async def api_delete(req):
+    """刪除指定鬧鐘"""
+    ok = delete_alarm(req.arg("id", int))
+    await send(req, 200 if ok else 404)
+
+async def api_bulk(req):
+    """
+    批次匯入（POST，內容為 CSV 或 JSON lines，格式見 alarm_bulk.py）：
+      ?mode=replace  取代全部鬧鐘（預設為附加在後面）
+      ?partial=1     略過有錯的行、匯入其餘（預設只要有一行錯誤就全部不匯入，回覆 400）
+    逐行讀取並驗證，全部讀完才一次套用、寫一次快照。回傳
+      {"rows": 資料行數, "applied": 匯入筆數, "error_count": 錯誤行數, "errors": [{"line": 行號, "error": 原因}, ...]}
+    """
+    if req.method != "POST":
+        raise HTTPError(405)
+    if "transfer-encoding" in req.headers:  # 不支援 chunked 上傳（內容無法略過，回覆後關閉連線）
+        req.keep_alive = False
+        raise HTTPError(411)
+    replace = req.query.get("mode") == "replace"
+    partial = req.query.get("partial") == "1"
+    staged = BulkImport(BULK_MAX)
+    errors = []
+    rows = n_err = lineno = 0
+    while True:
+        line = await req.readline()
+        if line == b"":
+            break
+        lineno += 1
         try:
-            await writer.awrite("HTTP/1.1 500 Internal Server Error\r\n\r\n")
-            await writer.aclose()
-        except:
-            pass
+            if line is None:
+                raise ValueError("line too long")
+            row = parse_line(line, len(MUSIC_NAME))
+            if row is None:  # 空白行、註解、欄位名稱
+                continue
+            staged.add(row)
+        except ValueError as e:
+            n_err += 1
+            if len(errors) < BULK_ERRORS:
+                errors.append({"line": lineno, "error": str(e)})
+        rows += 1
+    ok = partial or not n_err
+    if ok and (len(staged) or replace):
+        import_alarms(staged, replace)
+    await send_json(req, {"rows": rows, "applied": len(staged) if ok else 0,
+                          "error_count": n_err, "errors": errors}, 200 if ok else 400)
+
+async def api_export(req):
+    """
+    串流匯出全部鬧鐘：預設為 JSON lines（含例外日期），?format=csv 為 CSV；
+    匯出的內容可直接以 /bulk?mode=replace 匯回
+    """
+    csv = req.query.get("format") == "csv"
+    out = ChunkedWriter(req, "text/csv" if csv else "application/x-ndjson")
+    await out.start('Content-Disposition: attachment; filename="alarms.%s"\r\n' % ("csv" if csv else "jsonl"))
+    if csv:
+        await out.write(CSV_HEADER)
+    i = 0
+    while i < len(alarms):  # 每次重新檢查長度：傳送途中可能有鬧鐘被刪除
+        if csv:
+            await out.write(csv_row(alarms, i))
+        else:
+            await out.write(alarms.row_json(i))
+            await out.write(b"\n")
+        i += 1
+    await out.close()
+
+async def api_metrics(req):
+    """效能統計（純文字，格式見 lib/perf.py）；?reset=1 讀取後清除"""
+    hits, misses, lru_bytes, _, _ = cache_stats()
+    body = perf.report((
+        ("http_requests", web.requests),
+        ("http_conns", web.active),
+        ("sse_clients", _sse_clients),
+        ("alarms", len(alarms)),
+        ("font_cache", "hits=%d misses=%d bytes=%d" % (hits, misses, lru_bytes)),
+        ("boot", " ".join("%s=%d" % p for p in _boot_times)),
+    ))
+    if req.query.get("reset") == "1":
+        perf.reset()
+    await send(req, 200, body, "text/plain")
+
+async def api_status(req):
+    """回傳是否正在響鈴，供網頁偵測用"""
+    await send_json(req, {"ringing": is_ringing})
+
+async def api_stop(req):
+    stop_ringing()
+    await send(req)
+
+async def api_snooze(req):
+    snooze_alarm()
+    await send(req)
+
+def web_notify():
+    """喚醒所有 /events 推播檢查狀態（換一個新的 Event，等待中的推播各自持有舊的那個）"""
+    global _web_event
+    ev, _web_event = _web_event, asyncio.Event()
+    ev.set()
+
+async def api_events(req):
+    """
+    Server-Sent Events 推播，取代網頁對 /time、/status、/alarms 的輪詢：
+      tick     每秒一次，內容同 /time
+      ringing  響鈴開始 / 結束，內容同 /status
+      alarms   鬧鐘清單變動或小睡，內容為 {"version": 版本號, "next_alarm": ...}，網頁再讀取 /alarms
+    連線後先送出目前的響鈴狀態與版本號；對方斷線時 awrite 引發 OSError 而結束。
+    """
+    global _sse_clients
+    if _sse_clients >= SSE_MAX:
+        await send(req, 503, headers="Retry-After: 10\r\n")
+        return
+    _sse_clients += 1
+    try:
+        await start_stream(req)
+        ringing = version = snooze = None
+        deadline = time.ticks_ms()
+        while True:
+            ev = _web_event
+            if ringing != is_ringing:
+                ringing = is_ringing
+                await send_event(req, "ringing", {"ringing": ringing})
+            if version != alarm_version or snooze != _snooze:
+                version, snooze = alarm_version, _snooze
+                await send_event(req, "alarms", {"version": version, "next_alarm": _alarm_info(next_alarm())})
+            wait = time.ticks_diff(deadline, time.ticks_ms())
+            if wait <= 0:
+                await send_event(req, "tick", _time_info())
+                # 以絕對時間排下一次，不因傳送耗時而漂移；落後太多時從現在重新起算
+                deadline = time.ticks_add(deadline, 1000)
+                if time.ticks_diff(deadline, time.ticks_ms()) <= 0:
+                    deadline = time.ticks_add(time.ticks_ms(), 1000)
+                continue
+            try:
+                await asyncio.wait_for_ms(ev.wait(), wait)
+            except asyncio.TimeoutError:
+                pass
+    finally:
+        _sse_clients -= 1
+
+# index.html 只讀一次並快取（有 web/index.html.gz 時送壓縮版），重新整理頁面多半只需回覆 304
+index_page = StaticFile("web/index.html", "text/html; charset=utf-8")
+
+ROUTES = {
+    "/": index_page.serve,
+    "/index.html": index_page.serve,
+    "/time": api_time,
+    "/alarms": api_alarms,
+    "/next_alarm": api_next_alarm,
+    "/add": api_add,
+    "/switch": api_switch,
+    "/delete": api_delete,
+    "/skip": api_skip,
+    "/bulk": api_bulk,
+    "/export": api_export,
+    "/status": api_status,
+    "/stop": api_stop,
+    "/snooze": api_snooze,
+    "/events": api_events,
+    "/metrics": api_metrics,
+}
+
+web = HTTPServer(ROUTES)  # 保持連線：同一個瀏覽器分頁的輪詢共用一條 TCP 連線
 
 # ============================================================
 # 背景任務：UI 更新與鬧鐘檢查
 # ============================================================
 
+_frame_span = perf.span("ui_frame")  # 每次畫面更新的耗時
+
+def show_notice(lines, seconds=3):
+    """在主畫面暫時顯示訊息（例如連上 WiFi 時的 IP），時間到後恢復時鐘"""
+    global _notice
+    _notice = (lines, time.ticks_add(time.ticks_ms(), seconds * 1000))
+
 async def ui_task():
-    """持續更新 OLED 與鬧鐘觸發判斷"""
-    global MODE, _last_rung_key
+    """持續更新 OLED（鬧鐘觸發由 alarm_task 負責）"""
+    global _notice
+    first = True
     while True:
-        if MODE == "CLOCK":
-            show_clock()
-            # 每秒檢查是否觸發鬧鐘（改成允許時間誤差）
-            y, M, d, h, m, s, _, _ = taiwan_time()
-            key = (y, M, d, h, m)
-            if key != _last_rung_key:  # 每分鐘僅檢查一次（避免重複觸發）
-                now_ts = time.mktime((y, M, d, h, m, s, 0, 0))
-                for a in alarms:
-                    if not a.get("enabled", True):
-                        continue
-
-                    # 將鬧鐘時間轉為 timestamp（秒）
-                    alarm_ts = time.mktime((a["y"], a["M"], a["d"], a["h"], a["m"], 0, 0, 0))
-
-                    # 🔔 觸發條件：
-                    #   1. 鬧鐘時間在現在之後（避免剛設定就觸發）
-                    #   2. 鬧鐘時間與現在時間差小於 2 秒
-                    if 0 <= (alarm_ts - now_ts) <= 1:
-                        a["enabled"] = False
-                        save_alarms()
-                        _last_rung_key = key
-                        asyncio.create_task(ring_alarm(a["music"]))
-                        break
-        elif MODE == "SET_DATE": show_set_date()
-        elif MODE == "SET_TIME": show_set_time()
-        elif MODE == "SET_MUSIC": show_set_music()
-        elif MODE == "VIEW": show_view_alarm()
+        if _notice and time.ticks_diff(_notice[1], time.ticks_ms()) <= 0:
+            _notice = None
+        with _frame_span:
+            if MODE == "CLOCK" and _notice: oled_write(_notice[0])
+            elif MODE == "CLOCK": show_clock()
+            elif MODE == "SET_DATE": show_set_date()
+            elif MODE == "SET_TIME": show_set_time()
+            elif MODE == "SET_MUSIC": show_set_music()
+            elif MODE == "VIEW": show_view_alarm()
+        if first:
+            boot_log("first_frame")
+            first = False
         await asyncio.sleep(0.5)
 
+def _now_sec():
+    """台灣時間的秒時間戳（分鐘時間戳 * 60 + 秒）"""
+    y, M, d, h, m, s, _, _ = taiwan_time()
+    return to_minutes(y, M, d, h, m) * 60 + s
+
+def _fire(a, now_min):
+    """
+    觸發鬧鐘並開始響鈴（設定中的預聽先停止）：
+    單次鬧鐘關閉；重複鬧鐘推進到下一次（不寫日誌，重開機時由 catch_up 重新推算）。
+    a 為 None 時響小睡的鬧鐘。
+    """
+    global _preview_task, _snooze
+    if a is None:
+        music, _snooze = _snooze[1], None
+    else:
+        music = a["music"]
+        if alarms.raw(a.i)[3]:
+            alarms.advance(a.i, now_min)
+            alarms_updated("put", a.i, alarms.row_json(a.i))
+        else:
+            alarms.disable(a)
+            journal.log_enabled(a.i)
+            alarms_updated("set", a.i, False)
+    if _preview_task:
+        _preview_task.cancel()
+        _preview_task = None
+    asyncio.create_task(ring_alarm(music))  # 同一分鐘有多筆時只響一次（ring_alarm 防重入）
+
+async def alarm_task():
+    """
+    鬧鐘排程（與顯示模式無關）：
+    由索引找出下一個鬧鐘，睡到那一分鐘開始；鬧鐘有變動時 alarm_changed 會提早喚醒重新計算。
+    checked 之前（含）的分鐘都已處理過，睡醒時觸發 (checked, 現在] 之間的所有鬧鐘，
+    所以就算醒來稍晚或正在設定畫面也不會漏掉。
+    因變動而醒來時不觸發：此時落在已過區間的鬧鐘是剛設定成過去時間的（同原本「剛設定不觸發」）；
+    但若變動之前排定的到期時間已經到了（變動剛好落在到期與排程醒來之間，最多約 1 秒），照常觸發。
+    時間已過的重複鬧鐘（關機期間錯過、剛重新開啟）先由 catch_up 推進到下一次；小睡一併排程。
+    睡醒時時鐘往前跳超過 CLOCK_JUMP（冷開機 RTC 從 2000 年開始，校時的阻塞期間剛好逾時）
+    不補響跳過的區間，直接以新時間重新對齊（sync_time 的 alarm_changed 不一定比逾時先到）。
+    """
+    checked = _now_sec() // 60
+    while True:
+        alarm_changed.clear()
+        for i in alarms.catch_up(checked):
+            alarms_updated("put", i, alarms.row_json(i))
+        a = alarms.next_after(checked)
+        deadline = None  # 下一個到期的秒時間戳
+        if a is not None:
+            deadline = alarms.raw(a.i)[0] * 60
+        if _snooze and (deadline is None or _snooze[0] * 60 < deadline):
+            deadline = _snooze[0] * 60
+        wait = SCHED_MAX_SLEEP if deadline is None else min(SCHED_MAX_SLEEP, max(0, deadline - _now_sec()))
+        try:
+            await asyncio.wait_for(alarm_changed.wait(), wait)
+            if deadline is None or _now_sec() < deadline:
+                checked = max(checked, _now_sec() // 60)
+                continue
+        except asyncio.TimeoutError:
+            pass
+        now_min = _now_sec() // 60
+        if now_min < checked:  # 時鐘被往回調
+            checked = now_min
+        if now_min - checked > CLOCK_JUMP // 60 + SCHED_MAX_SLEEP // 60:
+            checked = now_min  # RTC 原本無效
+            continue
+        if _snooze and _snooze[0] <= now_min:
+            _fire(None, now_min)
+        a = alarms.next_after(checked)
+        while a is not None and alarms.raw(a.i)[0] <= now_min:
+            _fire(a, now_min)
+            a = alarms.next_after(checked)
+        checked = now_min
+
+async def net_task():
+    """
+    背景網路任務（與 UI、鬧鐘排程同時進行，不拖慢開機）：
+    連上 WiFi 後啟動網頁伺服器並以 NTP 校時；連線或校時失敗時以指數退避重試
+    （1、2、4 ... 秒，最多 NET_BACKOFF_MAX 秒），斷線時自動重連，校時成功後每 NTP_RESYNC 秒再校一次。
+    """
+    wlan = network.WLAN(network.STA_IF)
+    wlan.active(True)
+    wifi_retry = ntp_retry = 1
+    ntp_due = time.ticks_ms()
+    serving = False
+    while True:
+        if not wlan.isconnected():
+            if wlan.status() != network.STAT_CONNECTING:  # 還在連線中時不重新開始（連線較慢的 AP）
+                wlan.connect(SSID, PASSWORD)
+            for _ in range(WIFI_TIMEOUT * 5):
+                if wlan.isconnected():
+                    break
+                await asyncio.sleep_ms(200)
+            else:
+                print("[WiFi] 連線失敗，%d 秒後重試" % wifi_retry)
+                await asyncio.sleep(wifi_retry)
+                wifi_retry = min(wifi_retry * 2, NET_BACKOFF_MAX)
+                continue
+            wifi_retry = 1
+            ip = wlan.ifconfig()[0]
+            print("[WiFi]", ip)
+            show_notice([("IP 位址:", 16), (ip, 36)])
+            if not serving:
+                boot_log("wifi")
+                await asyncio.start_server(web.handle, "0.0.0.0", 80)
+                serving = True
+                boot_log("web")
+        if time.ticks_diff(time.ticks_ms(), ntp_due) >= 0:
+            first = not time_synced
+            if sync_time():
+                if first:
+                    boot_log("ntp")
+                ntp_retry = 1
+                ntp_due = time.ticks_add(time.ticks_ms(), NTP_RESYNC * 1000)
+            else:
+                print("[NTP] 失敗，%d 秒後重試" % ntp_retry)
+                ntp_due = time.ticks_add(time.ticks_ms(), ntp_retry * 1000)
+                ntp_retry = min(ntp_retry * 2, NET_BACKOFF_MAX)
+        # 睡到下次校時，但至少每 5 秒檢查一次是否斷線
+        await asyncio.sleep_ms(max(0, min(5000, time.ticks_diff(ntp_due, time.ticks_ms()))))
+
 # ============================================================
 # 主程式入口點
 # ============================================================
 
 async def main():
-    """系統初始化與主迴圈"""
-    global oled, speaker
+    """
+    分階段開機：OLED、鬧鐘資料就緒後立即以 RTC 時間啟動畫面與鬧鐘排程，
+    WiFi 連線、網頁伺服器與 NTP 校時由 net_task 在背景進行。各階段時間見 boot_log。
+    """
+    global oled, screen, speaker, player
     oled = oled_init()
+    screen = TextScreen(oled)
     speaker = speaker_init()
+    player = ToneSequencer(speaker) if TONE_TIMER else MelodyPlayer(speaker)
     oled_write([("ESP32 鬧鐘系統 v2.6", 16), ("啟動中...", 36)])
+    boot_log("init")
 
     load_alarms()
-    sync_time()
-
-    # WiFi 連線
-    wlan = network.WLAN(network.STA_IF)
-    wlan.active(True)
-    wlan.connect(SSID, PASSWORD)
-    ip = "(無)"
-    for _ in range(100):
-        if wlan.isconnected():
-            ip = wlan.ifconfig()[0]
-            break
-        await asyncio.sleep(0.2)
-    oled_write([("IP 位址:", 16), (ip, 36)])
+    boot_log("alarms")
 
-    # 啟動 Web 伺服器
-    if ip != "(無)":
-        await asyncio.start_server(handle_client, "0.0.0.0", 80)
-
-    # 啟動背景 UI 任務
+    # 啟動背景 UI 任務、鬧鐘排程與網路
     asyncio.create_task(ui_task())
+    asyncio.create_task(alarm_task())
+    asyncio.create_task(net_task())
+    asyncio.create_task(perf.monitor())  # 事件迴圈延遲與可用記憶體取樣
 
     # 初始化按鈕事件 (A=34, B=21)
-    btnA = DebouncedButton(34, on_click=on_btnA_click, on_long=on_btnA_long, on_double=on_btnA_double)
-    btnB = DebouncedButton(21, on_click=on_btnB_click, on_long=on_btnB_long, on_double=on_btnB_double)
+    btnA = DebouncedButton(34, on_click=on_btnA_click, on_long=on_btnA_long, on_double=on_btnA_double, irq=BUTTON_IRQ)
+    btnB = DebouncedButton(21, on_click=on_btnB_click, on_long=on_btnB_long, on_double=on_btnB_double, irq=BUTTON_IRQ)
 
-    # 主循環：持續更新按鈕狀態
-    while True:
-        btnA.update()
-        btnB.update()
-        await asyncio.sleep_ms(20)
+    # 主循環：兩個按鈕共用一個狀態機協程（中斷模式閒置時不必定時喚醒）
+    await run_buttons([btnA, btnB], 20)
 
 # ============================================================
 # 啟動程式（含安全結尾）
+# 直接執行（main.py、Thonny、mpremote run）時啟動；被 import 時不啟動，
+# 模擬器與效能測試可以先匯入再呼叫 run()，或只使用畫面與路由函式
 # ============================================================
-try:
-    asyncio.run(main())
-finally:
+def run():
+    """啟動主程式（結束或發生例外時關閉蜂鳴器）"""
     try:
-        speaker.duty(0)   # 結束時關閉蜂鳴器
-    except:
-        pass
+        asyncio.run(main())
+    finally:
+        try:
+            speaker.duty(0)   # 結束時關閉蜂鳴器
+        except:
+            pass
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,68 @@
+# 開機載入鬧鐘測試：比較舊版 JSON 檔與二進位檔（alarm_file）的載入時間
+# 主機：python bench/bench_alarm_boot.py
+# 裝置：上傳 lib/ 後執行 mpremote run bench/bench_alarm_boot.py
+
+import sys, gc, os
+
+sys.path.append("lib")
+from alarm_store import AlarmStore
+import alarm_file
+
+try:
+    import ujson as json
+except ImportError:
+    import json
+
+try:
+    from time import ticks_us, ticks_diff  # MicroPython
+except ImportError:
+    from time import perf_counter
+    def ticks_us(): return int(perf_counter() * 1000000)
+    def ticks_diff(a, b): return a - b
+
+JSON_PATH = "bench_alarm.txt"
+BIN_PATH = "bench_alarm.bin"
+
+def make_store(n):
+    s = AlarmStore()
+    for i in range(n):
+        s.add(2025, i % 12 + 1, i % 28 + 1, i % 24, i % 60, i % 4)
+    return s
+
+def load_json(store):
+    with open(JSON_PATH) as f:
+        store.load(json.loads(f.read()))
+
+def load_bin(store):
+    alarm_file.load(BIN_PATH, store)
+
+def timed(fn, store, repeat=5):
+    best = None
+    for _ in range(repeat):
+        gc.collect()
+        t0 = ticks_us()
+        fn(store)
+        dt = ticks_diff(ticks_us(), t0)
+        best = dt if best is None or dt < best else best
+    return best
+
+def run(sizes=(100, 1000, 5000)):
+    result = {}
+    for n in sizes:
+        src = make_store(n)
+        with open(JSON_PATH, "w") as f:
+            f.write(json.dumps(src.to_list()))
+        alarm_file.save(BIN_PATH, src, 1)
+        size_json = os.stat(JSON_PATH)[6]
+        size_bin = os.stat(BIN_PATH)[6]
+        t_json = timed(load_json, AlarmStore())
+        t_bin = timed(load_bin, AlarmStore())
+        result[n] = (t_json, t_bin)
+        print("n=%5d  JSON: %7d bytes %8d us   二進位: %6d bytes %8d us"
+              % (n, size_json, t_json, size_bin, t_bin))
+    os.remove(JSON_PATH)
+    os.remove(BIN_PATH)
+    return result
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,53 @@
+# 鬧鐘記憶體用量測試：比較「dict 清單」與 AlarmStore 每筆鬧鐘佔用的 bytes
+# 主機：python bench/bench_alarm_memory.py
+# 裝置：上傳 lib/alarm_store.py 後執行 mpremote run bench/bench_alarm_memory.py
+
+import sys, gc
+
+sys.path.append("lib")
+from alarm_store import AlarmStore
+
+try:
+    import tracemalloc  # CPython
+    def measure(build):
+        gc.collect()
+        tracemalloc.start()
+        obj = build()
+        used = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        return obj, used
+except ImportError:  # MicroPython
+    def measure(build):
+        gc.collect()
+        before = gc.mem_free()
+        obj = build()
+        gc.collect()
+        return obj, before - gc.mem_free()
+
+def sample(i):
+    return (2025, i % 12 + 1, i % 28 + 1, i % 24, i % 60, i % 4)
+
+def build_dicts(n):
+    rows = []
+    for i in range(n):
+        y, M, d, h, m, music = sample(i)
+        rows.append({"y":y,"M":M,"d":d,"h":h,"m":m,"music":music,"enabled":True})
+    return rows
+
+def build_store(n):
+    s = AlarmStore()
+    for i in range(n):
+        s.add(*sample(i))
+    return s
+
+def run(sizes=(100, 1000)):
+    result = {}
+    for n in sizes:
+        _, a = measure(lambda: build_dicts(n))
+        _, b = measure(lambda: build_store(n))
+        result[n] = (a / n, b / n)
+        print("n=%5d  dict 清單: %6.1f B/筆   AlarmStore: %5.1f B/筆" % (n, a / n, b / n))
+    return result
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,92 @@
+# /alarms 回應的記憶體配置測試
+#   before  原本的作法：json.dumps({"alarms": to_list(), ...}) 組成完整字串再加上標頭
+#   after   ChunkedWriter：逐筆 row_json() 寫進重複使用的 512 bytes 緩衝區
+# 主機：python bench/bench_alarms_json.py（CPython 以 tracemalloc 的峰值近似）
+# 裝置：上傳 lib/ 後執行 mpremote run bench/bench_alarms_json.py
+
+import sys, gc
+
+sys.path.append("lib")
+sys.path.append("sim")  # CPython 使用 sim/ 的 uasyncio；裝置上沒有這個目錄，不影響
+import uasyncio as asyncio
+from alarm_store import AlarmStore
+from http_server import ChunkedWriter
+
+try:
+    import ujson as json
+except ImportError:
+    import json
+
+class NullWriter:
+    """只統計送出 bytes 與寫入次數的 StreamWriter"""
+    def __init__(self):
+        self.sent = 0
+        self.writes = 0
+    async def awrite(self, buf):
+        self.sent += len(buf)
+        self.writes += 1
+
+class FakeRequest:
+    def __init__(self):
+        self.writer = NullWriter()
+        self.keep_alive = True
+        self.version = "HTTP/1.1"
+
+def make_store(n):
+    s = AlarmStore()
+    for i in range(n):
+        s.add(2025, i % 12 + 1, i % 28 + 1, i % 24, i % 60, i % 4)
+    return s
+
+async def before(store, req):
+    body = json.dumps({"alarms": store.to_list(), "next_alarm": None, "version": 0})
+    head = "HTTP/1.1 200 OK\r\nContent-Type: application/json\r\nContent-Length: %d\r\n\r\n" % len(body)
+    await req.writer.awrite((head + body).encode())
+
+async def after(store, req):
+    out = ChunkedWriter(req, "application/json")
+    await out.start()
+    await out.write(b'{"version":0,"total":%d,"offset":0,"next_alarm":null,"alarms":[' % len(store))
+    for i in range(len(store)):
+        if i:
+            await out.write(b",")
+        await out.write(store.row_json(i))
+    await out.write(b"]}")
+    await out.close()
+
+try:
+    mem_alloc = gc.mem_alloc  # MicroPython：整個請求的配置總量
+    def measure(fn):
+        gc.collect()
+        gc.disable()
+        a = mem_alloc()
+        fn()
+        used = mem_alloc() - a
+        gc.enable()
+        return used
+except AttributeError:  # CPython：以 tracemalloc 的峰值近似
+    import tracemalloc
+    def measure(fn):
+        gc.collect()
+        tracemalloc.start()
+        fn()
+        used = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        return used
+
+def run(sizes=(50, 300, 1000)):
+    result = {}
+    for n in sizes:
+        store = make_store(n)
+        row = []
+        for name, fn in (("before", before), ("after", after)):
+            req = FakeRequest()
+            used = measure(lambda: asyncio.run(fn(store, req)))
+            row.append((used, req.writer.sent, req.writer.writes))
+        result[n] = row
+        print("n=%5d  before: 配置 %7d bytes 送出 %6d bytes %3d 次   after: 配置 %6d bytes 送出 %6d bytes %3d 次"
+              % ((n,) + row[0] + row[1]))
+    return result
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,64 @@
+# 字型查表測試：中英混合文字每秒可查幾個字
+#   linear   原本逐段累加位移的線性查表
+#   bisect   glyph_offset() 預算區段表 + 二分搜尋
+#   cold     get_bitmap() 逐字讀檔（每輪清空快取）
+#   batch    get_bitmaps() 整串依位移排序後讀檔（每輪清空快取）
+# 主機：python bench/bench_font_lookup.py
+# 裝置：上傳 lib/ 後執行 mpremote run bench/bench_font_lookup.py
+
+import sys
+
+sys.path.append("lib")
+import bitmap_font_tool as bft
+
+try:
+    from time import ticks_us, ticks_diff  # MicroPython
+except ImportError:
+    from time import perf_counter
+    def ticks_us(): return int(perf_counter() * 1000000)
+    def ticks_diff(a, b): return a - b
+
+FONT = "lib/fonts/fusion_bdf.12"
+TEXT = "台灣時間 2025/10/18 12:34:56 下次:10/19 07:30 鬧鐘響鈴中 生日快樂 給愛麗絲 ±℃、，。"
+
+def linear_offset(code):
+    if code <= 0x7E:
+        return (code - 0x20) * 12
+    offset = (0x7f - 0x20) * 12
+    for start, end in bft.utf16_tables:
+        if start <= code <= end:
+            return offset + (code - start) * 24
+        offset += (end - start + 1) * 24
+    return None
+
+def rate(fn, rounds):
+    t0 = ticks_us()
+    for _ in range(rounds):
+        fn()
+    dt = ticks_diff(ticks_us(), t0)
+    return len(TEXT) * rounds * 1000000 // max(dt, 1)
+
+def run(rounds=200):
+    bft.set_font_path(FONT)
+    codes = [ord(c) for c in TEXT]
+    def linear():
+        for c in codes:
+            linear_offset(c)
+    def bisect():
+        for c in codes:
+            bft.glyph_offset(c)
+    def cold():
+        bft.clear_cache()
+        for c in TEXT:
+            bft.get_bitmap(c)
+    def batch():
+        bft.clear_cache()
+        bft.get_bitmaps(TEXT)
+    result = {}
+    for name, fn in (("linear", linear), ("bisect", bisect), ("cold", cold), ("batch", batch)):
+        result[name] = rate(fn, rounds)
+        print("%-7s %9d 字/秒" % (name, result[name]))
+    return result
+
+if __name__ == "__main__":
+    run()
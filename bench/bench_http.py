@@ -0,0 +1,163 @@
+# 網頁伺服器每秒請求數測試（電腦端，使用 sim/ 的模擬模組）
+# 以模擬器啟動完整的 alarm_clock.main()，再由另一個執行緒用本機 socket 依序送出請求，
+# 量測各 API 路徑的每秒請求數與平均延遲：
+#   close       每個請求都新建 TCP 連線（舊版伺服器的行為）
+#   keep-alive  同一條連線連續送出請求（依 Content-Length 或 chunked 編碼讀取回應）
+# 用法（在專案根目錄執行）：python bench/bench_http.py [--requests 300] [--port 8099]
+
+import argparse, os, socket, sys, threading, time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [os.path.join(ROOT, "sim"), ROOT, os.path.join(ROOT, "lib")]
+
+import simctl
+from run import prepare_workdir
+
+PATHS = ["/time", "/status", "/alarms", "/next_alarm", "/"]
+
+def request(port, path):
+    """送出一個 GET 請求並讀完回應，回傳收到的 bytes 數"""
+    s = socket.create_connection(("127.0.0.1", port))
+    try:
+        s.sendall(b"GET %s HTTP/1.1\r\nHost: bench\r\nConnection: close\r\n\r\n" % path.encode())
+        n = 0
+        while True:
+            data = s.recv(4096)
+            if not data:
+                return n
+            n += len(data)
+    finally:
+        s.close()
+
+def read_chunked(f):
+    """讀取 Transfer-Encoding: chunked 的內容（含結尾的空 chunk 與 trailer），回傳 bytes 數"""
+    n = 0
+    while True:
+        line = f.readline()
+        if not line.endswith(b"\n"):
+            raise RuntimeError("connection closed inside chunked body")
+        n += len(line)
+        size = int(line.split(b";")[0], 16)
+        if size == 0:
+            break
+        data = f.read(size + 2)  # 內容 + \r\n
+        if len(data) != size + 2:
+            raise RuntimeError("connection closed inside chunked body")
+        n += len(data)
+    while True:  # trailer（通常沒有），以空行結束
+        line = f.readline()
+        n += len(line)
+        if line in (b"\r\n", b"\n", b""):
+            return n
+
+def read_response(f):
+    """
+    從 socket 檔案讀取一個回應（依 Content-Length 或 chunked 編碼），
+    回傳 (bytes 數, 伺服器是否保持連線)
+    """
+    n = 0
+    length = None
+    chunked = False
+    keep = True
+    while True:
+        line = f.readline()
+        n += len(line)
+        if line in (b"\r\n", b""):
+            break
+        k, _, v = line.partition(b":")
+        k = k.lower()
+        if k == b"content-length":
+            length = int(v)
+        elif k == b"transfer-encoding":
+            chunked = b"chunked" in v.lower()
+        elif k == b"connection":
+            keep = v.strip().lower() != b"close"
+    if chunked:
+        return n + read_chunked(f), keep
+    if length is None:
+        raise RuntimeError("response has neither Content-Length nor chunked encoding")
+    return n + len(f.read(length)), keep
+
+def keepalive(port, path, n):
+    """以保持的連線送出 n 個請求（伺服器要求關閉時重新連線），回傳 (bytes 數, 連線數)"""
+    req = b"GET %s HTTP/1.1\r\nHost: bench\r\n\r\n" % path.encode()
+    size = conns = 0
+    s = f = None
+    try:
+        for _ in range(n):
+            if s is None:
+                s = socket.create_connection(("127.0.0.1", port))
+                f = s.makefile("rb")
+                conns += 1
+            s.sendall(req)
+            got, keep = read_response(f)
+            size += got
+            if not keep:
+                f.close()
+                s.close()
+                s = None
+    finally:
+        if s is not None:
+            f.close()
+            s.close()
+    return size, conns
+
+def wait_server(port, timeout=30):
+    t0 = time.time()
+    while time.time() - t0 < timeout:
+        try:
+            socket.create_connection(("127.0.0.1", port)).close()
+            return True
+        except OSError:
+            time.sleep(0.05)
+    return False
+
+def client(port, n, results):
+    try:
+        if not wait_server(port):
+            print("server did not start")
+            return
+        simctl.set_speed(1)  # 開機完成後恢復正常速度，避免背景任務過度頻繁
+        for path in PATHS:
+            request(port, path)  # 暖身（字型、檔案快取等）
+            t0 = time.perf_counter()
+            size = 0
+            for _ in range(n):
+                size += request(port, path)
+            dt = time.perf_counter() - t0
+            results.append(("close", path, n / dt, dt / n * 1000, size // n))
+        for path in PATHS:
+            try:
+                t0 = time.perf_counter()
+                size, conns = keepalive(port, path, n)
+            except (RuntimeError, OSError) as e:  # 伺服器不支援連線保持
+                print("keep-alive %s: %s" % (path, e))
+                continue
+            dt = time.perf_counter() - t0
+            results.append(("keep-alive", path, n / dt, dt / n * 1000, size // n))
+            print("keep-alive %s: %d connections" % (path, conns))
+    finally:
+        simctl.stop()
+
+def run(n=300, port=8099):
+    prepare_workdir()
+    simctl.set_clock(time.time(), 20)  # 加速開機流程（NTP 重試、WiFi 連線）
+    simctl.http_port = port
+    simctl.wifi_delay = 0.2
+    results = []
+    th = threading.Thread(target=client, args=(port, n, results), daemon=True)
+    th.start()
+    import alarm_clock
+    alarm_clock.run()  # 由 client 結束時呼叫 simctl.stop()
+    th.join()
+    print("%-11s %-12s %10s %10s %8s" % ("mode", "path", "req/s", "ms/req", "bytes"))
+    for mode, path, rps, ms, size in results:
+        print("%-11s %-12s %10.1f %10.2f %8d" % (mode, path, rps, ms, size))
+    return results
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="網頁伺服器每秒請求數測試")
+    ap.add_argument("--requests", type=int, default=300, help="每個路徑的請求數")
+    ap.add_argument("--port", type=int, default=8099)
+    args = ap.parse_args()
+    run(args.requests, args.port)
@@ -0,0 +1,103 @@
+# 主畫面重繪的記憶體配置測試（N 幀累計配置的 bytes ÷ N）
+#   before  原本的作法：fill(0) + 每個字建立 bytearray / FrameBuffer + 整頁 show()
+#   after   TextScreen：影格快取 + 只重畫變動的部分
+# 以 show_clock() 的四行內容模擬每秒兩次的重繪，不需接 OLED（I2C 寫入只計數）
+#   配置  MicroPython：停用 GC 時 gc.mem_alloc() 的差值（每次配置都會累計）
+#         CPython：tracemalloc 每幀的高水位減去該幀開始時的用量，逐幀加總
+#                  （釋放後再配置的暫存物件看不到，為下限）
+#   留存  N 幀之後仍佔用的 bytes（GC 後的差值 / tracemalloc 快照差值），快取穩定後應接近 0
+# 主機（在專案根目錄）：python bench/bench_render_alloc.py
+# 裝置：上傳 lib/ 與 ssd1306.py 後執行 mpremote run bench/bench_render_alloc.py
+
+import sys, gc
+
+sys.path.append("")     # 專案根目錄（ssd1306.py）
+sys.path.append("lib")
+sys.path.append("sim")  # CPython 使用 sim/ 的 framebuf；裝置上沒有這個目錄，不影響
+import bitmap_font_tool as bft
+from ssd1306 import SSD1306
+from text_screen import TextScreen
+
+FONT = "lib/fonts/fusion_subset.12"
+
+class NullOLED(SSD1306):
+    """不接硬體的 SSD1306，只統計送出的 bytes"""
+    def __init__(self):
+        self.sent = 0
+        super().__init__(128, 64, False)
+    def write_cmd(self, cmd):
+        self.sent += 2
+    def write_data(self, buf):
+        self.sent += len(buf) + 1
+
+def clock_lines(t):
+    s = t // 2
+    return [
+        ("台灣時間", 0),
+        ("2025/10/18", 16),
+        ("%02d:%02d:%02d" % (12, s // 60 % 60, s % 60), 32),
+        ("下次:10/19 07:30", 48),
+    ]
+
+def draw_before(oled, lines):
+    oled.fill(0)
+    for text, y in lines:
+        x = 0
+        for c in text:
+            bitmap = bft.get_bitmap(c)
+            bft.draw_bitmap(oled, bitmap, x, y)
+            x += 6 if len(bitmap) == 12 else 12
+    oled.show()
+
+try:
+    mem_alloc = gc.mem_alloc  # MicroPython
+    def measure(fn, frames):
+        """回傳 (frames 幀累計配置的 bytes, 留存的 bytes)"""
+        gc.collect()
+        gc.disable()
+        a = mem_alloc()
+        for t in range(frames):
+            fn(t)
+        used = mem_alloc() - a
+        gc.enable()
+        gc.collect()
+        return used, mem_alloc() - a
+except AttributeError:  # CPython
+    import tracemalloc
+    def measure(fn, frames):
+        """回傳 (frames 幀累計配置的 bytes（下限）, 留存的 bytes)"""
+        gc.collect()
+        tracemalloc.start()
+        start = tracemalloc.take_snapshot()
+        used = 0
+        for t in range(frames):
+            tracemalloc.reset_peak()
+            a = tracemalloc.get_traced_memory()[0]
+            fn(t)
+            used += tracemalloc.get_traced_memory()[1] - a
+        gc.collect()
+        diff = tracemalloc.take_snapshot().compare_to(start, "filename")
+        tracemalloc.stop()
+        # 快照本身與 tracemalloc 的紀錄不算
+        kept = sum(d.size_diff for d in diff if "tracemalloc" not in d.traceback[0].filename)
+        return used, kept
+
+def run(frames=20):
+    bft.set_font_path(FONT, preload=True)
+    bft.prewarm("台灣時間下次:無0123456789/ ")
+    oled = NullOLED()
+    screen = TextScreen(oled)
+    for t in range(frames):  # 先畫一輪（秒數的每個數字都出現過），讓快取進入穩定狀態
+        screen.write(clock_lines(t))
+    result = {}
+    for name, fn in (("before", lambda t: draw_before(oled, clock_lines(t))),
+                     ("after", lambda t: screen.write(clock_lines(t)))):
+        oled.sent = 0
+        used, kept = measure(fn, frames)
+        result[name] = (used // frames, oled.sent // frames)
+        print("%-6s 每幀配置 %5d bytes, I2C %4d bytes（%d 幀後留存 %d bytes）"
+              % (name, used // frames, oled.sent // frames, frames, kept))
+    return result
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,342 @@
+# 熱點效能測試組（可重現、可與基準比較）
+#
+# 每個項目輸出一行 JSON（機器可讀）：
+#   {"name": "font.draw_text", "value": 52000, "unit": "chars/s", "better": "higher"}
+# 第一行為執行環境 {"suite": 1, "impl": "cpython", "platform": "linux"}。
+#
+# 測試項目（名稱前綴可用 --only 篩選）：
+#   font    get_bitmap() 冷 / 熱快取、draw_text() 每秒字數
+#   frame   主畫面 alarm_clock.show_clock()（查下次鬧鐘 + TextScreen 局部更新）每幀耗時與 I2C bytes、整頁重畫
+#   oled    SSD1306.show() 整頁 / 局部的耗時、送出 bytes 與 400 kHz I2C 的傳輸時間估計
+#   alarms  next_after()（next_alarm 的核心）10 ~ 10000 筆、快照存檔 / 載入（AlarmJournal）
+#   http    HTTPServer.handle 在同一條保持的連線上以 alarm_clock 的 api_time、api_alarms 處理請求的每秒請求數
+#           （記憶體串流，不經 socket）
+# frame / http 匯入 alarm_clock（匯入不會啟動 main()），換上測試用的鬧鐘、畫面與固定的時鐘後直接呼叫原本的函式；
+# 不接 OLED（I2C 寫入只計數）。
+#
+# 主機（在專案根目錄）：
+#   python bench/suite.py [--quick] [--only font,frame] [--out 結果.json]
+#   python bench/suite.py --baseline 基準.json [--threshold 20]   執行並與基準比較，退步超過門檻時結束碼為 1
+#   python bench/suite.py --compare 基準.json 結果.json           只比較兩份結果（例如裝置上的輸出）
+# 裝置：上傳 lib/ 與 ssd1306.py 後執行 mpremote run bench/suite.py > 結果.json（參數使用預設值）
+# 電腦上的數值受其他程式影響，同一台機器連續執行也可能差 10~20%：基準請在同一台機器上產生，
+# 門檻不要設得比這個更小。
+
+import sys, gc, os
+
+sys.path.append("")     # 專案根目錄（ssd1306.py）
+sys.path.append("lib")
+sys.path.append("sim")  # CPython 使用 sim/ 的 framebuf、uasyncio；裝置上沒有這個目錄，不影響
+
+try:
+    import ujson as json
+except ImportError:
+    import json
+
+try:
+    from time import ticks_us, ticks_diff  # MicroPython
+except ImportError:
+    from time import perf_counter
+    def ticks_us(): return int(perf_counter() * 1000000)
+    def ticks_diff(a, b): return a - b
+
+import uasyncio as asyncio
+import bitmap_font_tool as bft
+from ssd1306 import SSD1306
+from text_screen import TextScreen
+from alarm_store import AlarmStore, to_minutes, from_minutes, make_rule
+from alarm_journal import AlarmJournal
+from http_server import HTTPServer
+
+FONT = "lib/fonts/fusion_subset.12"
+TEXT = "台灣時間 2025/10/18 12:34:56 下次:10/19 07:30 鬧鐘響鈴中 生日快樂 給愛麗絲"
+I2C_HZ = 400000  # OLED 的 I2C 時脈（估計傳輸時間用，每 byte 9 個時脈）
+NOW = to_minutes(2025, 10, 18, 12, 0)
+REPEAT = 7       # 每個項目執行幾次取最短
+
+# ---- 共用工具 ----
+
+def best_us(fn, repeat=REPEAT):
+    """先暖身一次，再執行 repeat 次取最短的微秒數（減少 GC 與排程的干擾）"""
+    fn()
+    best = None
+    for _ in range(repeat):
+        gc.collect()
+        t0 = ticks_us()
+        fn()
+        dt = ticks_diff(ticks_us(), t0)
+        if best is None or dt < best:
+            best = dt
+    return max(best, 1)
+
+class NullOLED(SSD1306):
+    """不接硬體的 SSD1306，只統計送出的 bytes"""
+    def __init__(self):
+        self.sent = 0
+        super().__init__(128, 64, False)
+    def write_cmd(self, cmd):
+        self.sent += 2
+    def write_data(self, buf):
+        self.sent += len(buf) + 1
+
+def app_at(store, oled=None):
+    """
+    匯入 alarm_clock 並換上 store、不接硬體的畫面與可控制的時鐘（台灣時間 NOW 起算的秒數），
+    回傳 (模組, 時鐘)；時鐘為 [秒數]，修改 clock[0] 即推進時間
+    """
+    import alarm_clock as app
+    clock = [0]
+    def taiwan_time():
+        t = clock[0]
+        y, M, d, h, m = from_minutes(NOW + t // 60)
+        return (y, M, d, h, m, t % 60, 0, 0)
+    app.taiwan_time = taiwan_time
+    app.alarms = store
+    app.time_synced = True
+    if oled is not None:
+        app.screen = TextScreen(oled)
+    return app, clock
+
+def make_store(n):
+    """n 筆鬧鐘（每 4 筆有一筆平日重複），一次建立索引"""
+    s = AlarmStore()
+    for i in range(n):
+        s.add_raw(NOW + (i * 7919) % 525600, i % 4, 1, False, make_rule(0x1F, 0) if i % 4 == 0 else 0)
+    s.reindex()
+    return s
+
+# ---- 測試項目：每個回傳 [(名稱, 數值, 單位, "higher" / "lower"), ...] ----
+
+def bench_font(quick):
+    bft.set_font_path(FONT, preload=True)
+    rounds = 20 if quick else 100
+    n = len(TEXT) * rounds
+    def cold():
+        for _ in range(rounds):
+            bft.clear_cache()
+            for c in TEXT:
+                bft.get_bitmap(c)
+    def warm():
+        for _ in range(rounds):
+            for c in TEXT:
+                bft.get_bitmap(c)
+    oled = NullOLED()
+    def draw():
+        for _ in range(rounds):
+            bft.draw_text(oled, TEXT, 0, 0)
+    bft.draw_text(oled, TEXT, 0, 0)  # 建立影格快取
+    return [
+        ("font.get_bitmap.cold", n * 1000000 // best_us(cold), "chars/s", "higher"),
+        ("font.get_bitmap.warm", n * 1000000 // best_us(warm), "chars/s", "higher"),
+        ("font.draw_text", n * 1000000 // best_us(draw), "chars/s", "higher"),
+    ]
+
+def bench_frame(quick):
+    oled = NullOLED()
+    app, t = app_at(make_store(100), oled)
+    bft.set_font_path(app.FONT_PATH, preload=True)  # 同開機時的字型狀態（font 項目會清空快取）
+    bft.prewarm(app.CLOCK_CHARS)
+    frames = 30 if quick else 120
+    app.show_clock()
+    def tick():
+        for _ in range(frames):
+            t[0] += 1
+            app.show_clock()
+    oled.sent = 0
+    per_frame = best_us(tick) // frames
+    sent = oled.sent // (frames * (REPEAT + 1))
+    def redraw():
+        for _ in range(frames // 10):
+            app.screen.invalidate()
+            app.show_clock()
+    return [
+        ("frame.show_clock", per_frame, "us", "lower"),
+        ("frame.show_clock.i2c", sent, "bytes", "lower"),
+        ("frame.redraw", best_us(redraw) // (frames // 10), "us", "lower"),
+    ]
+
+def bench_oled(quick):
+    oled = NullOLED()
+    rounds = 200 if quick else 1000
+    out = []
+    for name, args in (("full", ()), ("partial", (48, 59, 4, 5))):  # 局部：秒數兩個字
+        oled.sent = 0
+        oled.show(*args)
+        size = oled.sent
+        def show():
+            for _ in range(rounds):
+                oled.show(*args)
+        out.append(("oled.show.%s" % name, best_us(show) * 1000 // rounds, "ns", "lower"))
+        out.append(("oled.show.%s.bytes" % name, size, "bytes", "lower"))
+        out.append(("oled.show.%s.i2c_us" % name, size * 9 * 1000000 // I2C_HZ, "us", "lower"))
+    return out
+
+def bench_alarms(quick):
+    out = []
+    for n in ((10, 100, 1000) if quick else (10, 100, 1000, 10000)):
+        try:
+            store = make_store(n)
+        except MemoryError:
+            print(json.dumps({"name": "alarms.next.%d" % n, "skipped": "MemoryError"}))
+            break
+        calls = 2000
+        def lookup():
+            for k in range(calls):
+                store.next_after(NOW + k * 37)
+        out.append(("alarms.next.%d" % n, best_us(lookup) * 1000 // calls, "ns", "lower"))
+        if n > 1000:
+            continue  # 快照超過一千筆的情境不實際
+        journal = AlarmJournal(store, "bench_alarm.bin", "bench_alarm.log")
+        out.append(("alarms.save.%d" % n, best_us(journal.compact), "us", "lower"))
+        out.append(("alarms.load.%d" % n, best_us(lambda: AlarmJournal(AlarmStore(), "bench_alarm.bin", "bench_alarm.log").load()), "us", "lower"))
+        del store, journal
+    for path in ("bench_alarm.bin", "bench_alarm.log"):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+    return out
+
+class MemReader:
+    """把事先準備好的請求當成連線內容（只實作 HTTPServer 用到的方法）"""
+    def __init__(self, data):
+        self.data = data
+        self.pos = 0
+    async def read(self, n):
+        data = self.data[self.pos:self.pos + n]
+        self.pos += len(data)
+        return data
+    async def readinto(self, buf):
+        data = await self.read(len(buf))
+        buf[:len(data)] = data
+        return len(data)
+
+class NullWriter:
+    def __init__(self):
+        self.sent = 0
+        self.responses = 0
+    async def awrite(self, buf):
+        self.sent += len(buf)
+        if buf[:5] == b"HTTP/":
+            self.responses += 1
+    async def aclose(self):
+        pass
+
+def bench_http(quick):
+    app, _ = app_at(make_store(50))
+    n = 50 if quick else 300
+    server = HTTPServer({"/time": app.api_time, "/alarms": app.api_alarms}, max_requests=n + 1)
+    out = []
+    for path in ("/time", "/alarms"):
+        data = b"GET %s HTTP/1.1\r\nHost: bench\r\n\r\n" % path.encode() * n
+        def serve():
+            w = NullWriter()
+            asyncio.run(server.handle(MemReader(data), w))
+            if w.responses != n:  # handle() 吞掉例外：確認每個請求都有回應
+                raise RuntimeError("%s: %d of %d responses" % (path, w.responses, n))
+        out.append(("http.keepalive" + path.replace("/", "."), n * 1000000 // best_us(serve, 3), "req/s", "higher"))
+    return out
+
+CASES = (("font", bench_font), ("frame", bench_frame), ("oled", bench_oled),
+         ("alarms", bench_alarms), ("http", bench_http))
+
+# ---- 結果比較 ----
+
+def load_results(path):
+    """讀取結果檔（每行一個 JSON；不是結果的行略過），回傳 {名稱: 結果}"""
+    res = {}
+    with open(path) as f:
+        for line in f:
+            try:
+                r = json.loads(line)
+            except ValueError:
+                continue
+            if isinstance(r, dict) and "value" in r:
+                res[r["name"]] = r
+    return res
+
+def compare(base, results, threshold):
+    """印出與基準的差異，回傳退步超過 threshold% 的項目數"""
+    bad = 0
+    print("# %-26s %12s %12s %8s" % ("name", "baseline", "current", "change"))
+    for name in sorted(results):
+        r = results[name]
+        b = base.get(name)
+        if b is None or not b["value"]:
+            print("# %-26s %12s %12d %8s" % (name, "-", r["value"], "new"))
+            continue
+        change = (r["value"] - b["value"]) * 100.0 / b["value"]
+        worse = change > threshold if r["better"] == "lower" else change < -threshold
+        bad += worse
+        print("# %-26s %12d %12d %+7.1f%% %s" % (name, b["value"], r["value"], change, "REGRESSION" if worse else ""))
+    return bad
+
+def run(quick=False, only=None, out=None):
+    head = {"suite": 1, "impl": sys.implementation.name, "platform": sys.platform}
+    lines = [json.dumps(head)]
+    print(lines[0])
+    results = {}
+    for prefix, fn in CASES:
+        if only and prefix not in only:
+            continue
+        for name, value, unit, better in fn(quick):
+            r = {"name": name, "value": int(value), "unit": unit, "better": better}
+            results[name] = r
+            lines.append(json.dumps(r))
+            print(lines[-1])
+    if out:
+        with open(out, "w") as f:
+            f.write("\n".join(lines) + "\n")
+    return results
+
+USAGE = """usage: suite.py [--quick] [--only 前綴,...] [--out 結果.json] [--baseline 基準.json] [--threshold 百分比]
+       suite.py --compare 基準.json 結果.json [--threshold 百分比]"""
+
+def main(argv):
+    """
+    解析參數並執行；回傳結束碼（0 = 正常、1 = 有退步、2 = 參數錯誤）。
+    裝置上的 MicroPython 不一定有 argparse，所以自己解析，不認得的參數印出用法後結束。
+    """
+    opts = {"--threshold": "20"}
+    flags = set()
+    args = []
+    i = 0
+    while i < len(argv):
+        a = argv[i]
+        if a in ("--only", "--out", "--baseline", "--threshold"):
+            if i + 1 == len(argv):
+                return usage("missing value for " + a)
+            opts[a] = argv[i + 1]
+            i += 1
+        elif a in ("--quick", "--compare"):
+            flags.add(a)
+        elif a in ("-h", "--help"):
+            print(USAGE)
+            return 0
+        elif a.startswith("-"):
+            return usage("unknown option " + a)
+        else:
+            args.append(a)
+        i += 1
+    try:
+        threshold = float(opts["--threshold"])
+    except ValueError:
+        return usage("bad --threshold " + opts["--threshold"])
+    if len(args) != (2 if "--compare" in flags else 0):
+        return usage("--compare takes 2 result files" if "--compare" in flags else "unexpected argument " + args[0])
+    if "--compare" in flags:
+        return 1 if compare(load_results(args[0]), load_results(args[1]), threshold) else 0
+    only = opts["--only"].split(",") if "--only" in opts else None
+    results = run("--quick" in flags, only, opts.get("--out"))
+    if "--baseline" in opts:
+        return 1 if compare(load_results(opts["--baseline"]), results, threshold) else 0
+    return 0
+
+def usage(msg):
+    """參數錯誤：印出原因與用法，回傳結束碼 2"""
+    print("suite.py: " + msg)
+    print(USAGE)
+    return 2
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
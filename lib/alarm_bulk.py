@@ -0,0 +1,120 @@
+# 鬧鐘批次匯入 / 匯出格式
+#
+# 每行一筆，兩種格式可以混用（以 { 開頭的行視為 JSON）：
+#   CSV         y,M,d,h,m,music[,enabled[,days[,every]]]      （# 開頭為註解，第一行可為欄位名稱）
+#   JSON lines  {"y":2025,"M":10,"d":18,"h":7,"m":30,"music":1,"days":31,"skip":[[2025,10,20]]}
+# enabled 預設 1；days / every 為重複規則（見 alarm_store.make_rule）；skip 只有 JSON 支援。
+#
+# 匯入時逐行解析、驗證，通過的鬧鐘只以原始欄位暫存在 BulkImport 的陣列中（每筆約 8 bytes），
+# 不保留原始內容；全部讀完後由 apply() 一次加入 AlarmStore，呼叫端再寫一次快照。
+
+from array import array
+from alarm_store import F_ENABLED, to_minutes, from_minutes, make_rule, rule_fields
+try:
+    import ujson as json
+except ImportError:
+    import json
+
+CSV_HEADER = b"y,M,d,h,m,music,enabled,days,every\n"
+FIELDS = ("y", "M", "d", "h", "m", "music", "enabled", "days", "every")
+
+def _day(y, M, d):
+    """驗證日期並換算成日序（2 月 30 日之類不存在的日期會被拒絕）"""
+    t = to_minutes(y, M, d, 0, 0)
+    if not 2000 <= y <= 2099 or from_minutes(t)[:3] != (y, M, d):
+        raise ValueError("bad date")
+    return t // 1440
+
+def check(y, M, d, h, m, music, days, every, music_count):
+    """
+    驗證一筆鬧鐘的欄位（/add 與批次匯入共用），回傳分鐘時間戳；
+    日期不存在、時間、曲目或重複規則超出範圍時引發 ValueError（訊息為錯誤原因）。
+    """
+    day = _day(y, M, d)
+    if not 0 <= h <= 23 or not 0 <= m <= 59:
+        raise ValueError("bad time")
+    if not 0 <= music < music_count:
+        raise ValueError("bad music")
+    if not 0 <= days <= 0x7F or not 0 <= every <= 0x3FFF or (days and every):
+        raise ValueError("bad rule")
+    return day * 1440 + h * 60 + m
+
+def parse_line(line, music_count):
+    """
+    解析一行，回傳 (分鐘時間戳, 曲目, 旗標, 規則, 例外日序 tuple)；
+    空白行、註解與欄位名稱回傳 None，格式或數值錯誤時引發 ValueError（訊息為錯誤原因）。
+    """
+    line = line.strip()
+    if not line or line[0] == 35:  # "#"
+        return None
+    if line[0] == 123:  # "{"
+        try:
+            obj = json.loads(line)
+            v = [obj[k] if k in obj else (1 if k == "enabled" else 0) for k in FIELDS]
+            skip = obj.get("skip", ())
+        except (ValueError, KeyError, TypeError, AttributeError):
+            raise ValueError("bad json")
+    else:
+        parts = line.decode().split(",")
+        if not parts[0].strip().isdigit():
+            if parts[0].strip() == "y":
+                return None  # 欄位名稱
+            raise ValueError("bad csv")
+        if not 6 <= len(parts) <= len(FIELDS):
+            raise ValueError("expected 6-9 fields")
+        try:
+            v = [int(p) for p in parts] + [1, 0, 0][len(parts) - 6:]
+        except ValueError:
+            raise ValueError("bad number")
+        skip = ()
+    for x in v:
+        if not isinstance(x, int):  # JSON 的小數、字串等（true / false 算整數）
+            raise ValueError("bad number")
+    y, M, d, h, m, music, enabled, days, every = v
+    t = check(y, M, d, h, m, music, days, every, music_count)
+    try:
+        skip = tuple(_day(s[0], s[1], s[2]) for s in skip)
+    except (TypeError, IndexError, KeyError):
+        raise ValueError("bad skip")
+    return (t, music, F_ENABLED if enabled else 0, make_rule(days, every), skip)
+
+def csv_row(store, i):
+    """第 i 筆的 CSV 行（bytes，欄位同 CSV_HEADER；例外日期不輸出）"""
+    t, music, flags, rule = store.raw(i)
+    return b"%d,%d,%d,%d,%d,%d,%d,%d,%d\n" % (from_minutes(t) + (music, flags & F_ENABLED) + rule_fields(rule))
+
+class BulkImport:
+    """暫存驗證過的鬧鐘，apply() 時一次加入"""
+    def __init__(self, limit=1000):
+        self.limit = limit
+        self._min = array("i")
+        self._music = bytearray()
+        self._flags = bytearray()
+        self._rule = array("H")
+        self._skip = []  # (暫存序號, 日序)
+
+    def __len__(self):
+        return len(self._min)
+
+    def add(self, row):
+        """加入 parse_line() 的結果；超過筆數上限時引發 ValueError"""
+        if len(self._min) >= self.limit:
+            raise ValueError("too many rows")
+        t, music, flags, rule, skip = row
+        for day in skip:
+            self._skip.append((len(self._min), day))
+        self._min.append(t)
+        self._music.append(music)
+        self._flags.append(flags)
+        self._rule.append(rule)
+
+    def apply(self, store, replace=False):
+        """把暫存的鬧鐘加入 store（replace=True 時先清空），最後重建一次索引"""
+        if replace:
+            store.clear()
+        base = len(store)
+        for k in range(len(self._min)):
+            store.add_raw(self._min[k], self._music[k], self._flags[k], False, self._rule[k])
+        store.reindex()
+        for k, day in self._skip:
+            store.skip(base + k, day)
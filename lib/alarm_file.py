@@ -0,0 +1,90 @@
+# 鬧鐘二進位檔格式（取代 JSON 快照）
+#
+# 檔頭 12 bytes：b"ALM2" + 世代編號 (uint32) + 鬧鐘筆數 n (uint32)
+# 之後 n 筆鬧鐘，每筆固定 8 bytes（little-endian）：
+#   int32 分鐘時間戳 | uint8 曲目 | uint8 旗標 | uint16 重複規則（0 = 單次，見 alarm_store）
+# 最後是例外日期（重複鬧鐘跳過某天），每筆 8 bytes 直到檔尾：
+#   uint32 鬧鐘列號 | int32 日序（分鐘時間戳 // 1440）
+# 快照本身就是完整的狀態：壓縮時寫完新快照才重寫日誌，之間斷電也不會遺失例外日期。
+# 舊版 b"ALM1" 檔頭只有 8 bytes、沒有筆數與例外日期（當時的例外日期在日誌中），仍可載入與就地修改。
+# 固定長度記錄可直接 seek 到檔頭 + 索引 * RECORD，開關單筆只需就地改寫一個 byte（patch_flags）；
+# 載入時分批讀進 AlarmStore，不必把整個檔案讀進記憶體再 json.loads。
+# 執行中的查詢都由記憶體中的 AlarmStore 回答，不從檔案讀取單筆。
+
+import struct
+
+MAGIC = b"ALM2"
+MAGIC_V1 = b"ALM1"
+HEADER = 12
+HEADER_V1 = 8
+RECORD = 8
+_FMT = "<iBBH"
+_SKIP_FMT = "<Ii"
+_CHUNK = 32  # 批次讀寫的記錄筆數（共用一塊 256 bytes 緩衝區）
+
+def _read_header(f):
+    """讀取檔頭，回傳 (世代編號, 鬧鐘筆數, 檔頭長度)；舊版檔案的筆數為 None（讀到檔尾）"""
+    head = f.read(HEADER_V1)
+    if len(head) == HEADER_V1 and head[:4] == MAGIC_V1:
+        return struct.unpack_from("<I", head, 4)[0], None, HEADER_V1
+    if len(head) == HEADER_V1 and head[:4] == MAGIC:
+        rest = f.read(HEADER - HEADER_V1)
+        if len(rest) == HEADER - HEADER_V1:
+            return struct.unpack_from("<I", head, 4)[0], struct.unpack("<I", rest)[0], HEADER
+    raise ValueError("bad alarm file")
+
+def patch_flags(path, i, flags):
+    """就地改寫第 i 筆的旗標（單一 byte 寫入，斷電也不會寫壞其他記錄）"""
+    with open(path, "r+b") as f:
+        head = HEADER_V1 if f.read(4) == MAGIC_V1 else HEADER
+        f.seek(head + i * RECORD + 5)
+        f.write(bytes((flags,)))
+
+def load(path, store):
+    """分批把記錄與例外日期讀進 store（不經過 JSON 字串），回傳世代編號"""
+    buf = bytearray(RECORD * _CHUNK)
+    store.clear()
+    skips = []
+    with open(path, "rb") as f:
+        gen, n, _ = _read_header(f)
+        rows = 0
+        while True:
+            k = f.readinto(buf)
+            if not k:
+                break
+            for off in range(0, k - k % RECORD, RECORD):
+                if n is None or rows < n:
+                    t, music, flags, rule = struct.unpack_from(_FMT, buf, off)
+                    store.add_raw(t, music, flags, False, rule)
+                    rows += 1
+                else:
+                    skips.append(struct.unpack_from(_SKIP_FMT, buf, off))
+            if k % RECORD:  # 尾端殘缺（寫到一半斷電）
+                break
+    store.reindex()
+    for i, day in skips:
+        store.skip(i, day)
+    return gen
+
+def save(path, store, gen):
+    """把 store（含例外日期）整份寫成二進位檔"""
+    buf = bytearray(RECORD * _CHUNK)
+    mv = memoryview(buf)
+    with open(path, "wb") as f:
+        f.write(MAGIC + struct.pack("<II", gen, len(store)))
+        off = 0
+        for i in range(len(store)):
+            struct.pack_into(_FMT, buf, off, *store.raw(i))
+            off += RECORD
+            if off == len(buf):
+                f.write(buf)
+                off = 0
+        for i in range(len(store)):
+            for day in store.skips(i):
+                struct.pack_into(_SKIP_FMT, buf, off, i, day)
+                off += RECORD
+                if off == len(buf):
+                    f.write(buf)
+                    off = 0
+        if off:
+            f.write(mv[:off])
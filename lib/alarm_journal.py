@@ -0,0 +1,160 @@
+# 鬧鐘持久化模組：快照 + 僅附加日誌（append-only journal）
+#
+# 每次新增 / 開關 / 刪除只在日誌尾端附加一行，不再整份重寫鬧鐘檔；
+# 日誌累積到一定筆數才壓縮成新快照。
+#
+# 快照：alarm_file 定義的二進位檔（檔頭含世代編號）
+#   寫入時先寫到 .tmp 再 rename，斷電時不是舊快照就是新快照，不會只剩一半
+#   快照後尚未刪除過鬧鐘時，快照中的第 i 筆就是記憶體中的第 i 筆，
+#   開關這些鬧鐘直接就地改寫快照的旗標 byte，連日誌都不用寫
+# 日誌：第一行 "G <世代>"，之後每行一筆紀錄
+#   A y M d h m music en [rule]  新增（rule 為重複規則，舊版日誌沒有這欄）
+#   E i en                 設定開/關
+#   D i                    刪除
+#   X i day                重複鬧鐘略過某天（day 為日序 = 分鐘時間戳 // 1440）
+# 例外日期也寫在快照中（見 alarm_file），壓縮時寫完新快照、rename 之後才重寫日誌，
+# 之間任何時候斷電，開機時都是「舊快照 + 舊日誌」或「新快照（完整狀態）」。
+# 上一版的日誌標頭為 "G <世代> <n>"：緊接著 n 筆壓縮時重新寫出的 X 紀錄（當時快照沒有例外日期），
+# 仍照常重播，這 n 筆不算進 pending。
+# 開機時載入快照，再依序重播世代相符的日誌；
+# 最後一行若沒有換行（寫到一半斷電）或格式錯誤，就從該處停止重播。
+#
+# 舊版 JSON 快照（alarm.txt）會在第一次開機時連同日誌一起轉成二進位檔。
+
+import os
+import alarm_file
+try:
+    import ujson as json
+except ImportError:
+    import json
+
+class AlarmJournal:
+    def __init__(self, store, snapshot_path, log_path, legacy_path=None, compact_every=64):
+        self.store = store
+        self.snapshot_path = snapshot_path
+        self.log_path = log_path
+        self.legacy_path = legacy_path      # 舊版 JSON 快照（一次性轉檔用）
+        self.compact_every = compact_every  # 日誌累積幾筆後壓縮成快照
+        self.gen = 0
+        self.pending = 0       # 快照之後的日誌筆數
+        self._snap_count = 0   # 快照中的記錄筆數
+        self._aligned = False  # 快照記錄與記憶體列號是否仍一一對應（快照後未刪除過）
+
+    # ---- 開機載入 ----
+    def load(self):
+        """載入快照並重播日誌；檔案不存在或損毀時建立空白資料"""
+        try:
+            self.gen = alarm_file.load(self.snapshot_path, self.store)
+        except (OSError, ValueError):
+            if not self._migrate():
+                self.store.load([])
+                self.compact()
+            return
+        self._snap_count = len(self.store)
+        self._aligned = True
+        if not self._replay():
+            # 日誌尾端殘缺：重寫快照，避免之後的紀錄接在半行後面
+            self.compact()
+
+    def _migrate(self):
+        """一次性轉檔：載入舊版 JSON 快照 + 日誌，寫成二進位快照後刪除舊檔"""
+        if not self.legacy_path:
+            return False
+        try:
+            with open(self.legacy_path) as f:
+                data = json.loads(f.read())
+        except:
+            return False
+        if isinstance(data, list):  # 最早的格式：純鬧鐘清單
+            self.gen, rows = 0, data
+        else:
+            self.gen, rows = data["gen"], data["alarms"]
+        self.store.load(rows)
+        self._replay()
+        self.compact()
+        os.remove(self.legacy_path)
+        print("[Alarm] migrated %s -> %s" % (self.legacy_path, self.snapshot_path))
+        return True
+
+    def _replay(self):
+        """重播日誌，回傳日誌是否完整"""
+        self.pending = 0
+        try:
+            f = open(self.log_path)
+        except OSError:
+            return False
+        with f:
+            line = f.readline()
+            head = line.split()
+            if not line.endswith("\n") or head[:2] != ["G", str(self.gen)] or len(head) > 3 \
+                    or len(head) == 3 and not head[2].isdigit():
+                return False  # 舊世代日誌（內容已在快照中）或標頭殘缺
+            self.pending = -int(head[2]) if len(head) == 3 else 0  # 上一版重新寫出的 X 不算
+            while True:
+                line = f.readline()
+                if not line:
+                    return True
+                if not line.endswith("\n") or not self._apply(line.split()):
+                    return False
+                self.pending += 1
+
+    def _apply(self, rec):
+        s = self.store
+        try:
+            op, args = rec[0], [int(v) for v in rec[1:]]
+            if op == "A" and len(args) in (7, 8):
+                s.add(args[0], args[1], args[2], args[3], args[4], args[5], bool(args[6]),
+                      args[7] if len(args) == 8 else 0)
+            elif op == "E" and len(args) == 2 and 0 <= args[0] < len(s):
+                s.set_enabled(args[0], bool(args[1]))
+            elif op == "X" and len(args) == 2:
+                return s.skip(args[0], args[1]) is not None
+            elif op == "D" and len(args) == 1:
+                self._aligned = False
+                return s.delete(args[0])
+            else:
+                return False
+        except (ValueError, IndexError):
+            return False
+        return True
+
+    # ---- 寫入紀錄 ----
+    def _append(self, line):
+        with open(self.log_path, "a") as f:
+            f.write(line)
+        self.pending += 1
+        if self.pending >= self.compact_every:
+            self.compact()
+
+    def log_add(self, i):
+        a = self.store[i]
+        self._append("A %d %d %d %d %d %d %d %d\n" % (
+            a["y"], a["M"], a["d"], a["h"], a["m"], a["music"], a["enabled"], self.store.raw(i)[3]))
+
+    def log_skip(self, i, day):
+        self._append("X %d %d\n" % (i, day))
+
+    def log_enabled(self, i):
+        if self._aligned and i < self._snap_count:
+            alarm_file.patch_flags(self.snapshot_path, i, self.store.raw(i)[2])
+        else:
+            self._append("E %d %d\n" % (i, self.store[i]["enabled"]))
+
+    def log_delete(self, i):
+        self._aligned = False
+        self._append("D %d\n" % i)
+
+    # ---- 壓縮 ----
+    def compact(self):
+        """寫出新世代快照（write-then-rename），再以新世代標頭清空日誌"""
+        gen = self.gen + 1
+        tmp = self.snapshot_path + ".tmp"
+        alarm_file.save(tmp, self.store, gen)
+        os.rename(tmp, self.snapshot_path)
+        # 若在這之後斷電，舊日誌的世代與新快照不符，開機時會被忽略（新快照已是完整狀態，含例外日期）
+        self.gen = gen
+        self._snap_count = len(self.store)
+        self._aligned = True
+        self.pending = 0
+        with open(self.log_path, "w") as f:
+            f.write("G %d\n" % gen)
@@ -0,0 +1,355 @@
+# 鬧鐘資料儲存模組
+# 以「分鐘時間戳」建立已啟用鬧鐘的排序索引，
+# 查詢下一個鬧鐘與檢查到期鬧鐘只需二分搜尋，不必每次掃描、排序整份清單
+#
+# 每筆鬧鐘不再是一個 7 個字串鍵的 dict，而是以欄位陣列緊密存放：
+#   _min   array('i')  分鐘時間戳（4 bytes）
+#   _music bytearray   曲目編號（1 byte）
+#   _flags bytearray   旗標，bit0 = 啟用（1 byte）
+#   _rule  array('H')  重複規則（2 bytes，0 = 單次）
+#   _order array('H')  已啟用鬧鐘的列號，依時間排序（2 bytes）
+# 新增 / 刪除只會在陣列尾端擴充或搬移，不會產生零碎的小物件
+#
+# 重複規則只存一筆，不展開成許多列：
+#   R_WEEKLY | 星期遮罩   bit0 = 週一 ... bit6 = 週日（每天 = 0x7F、平日 = 0x1F）
+#   R_EVERY  | N          每隔 N 天（以鬧鐘日期為起點）
+# 重複鬧鐘的 _min 是「下一次」響鈴時間；響過後由 advance() 算出再下一次（惰性展開），
+# 索引中永遠只有一個時間點。例外日期（跳過某天）記在 _skip，響鈴時一併略過。
+
+from array import array
+
+F_ENABLED = 0x01  # 旗標：鬧鐘啟用
+
+R_WEEKLY = 0x4000  # 規則：依星期（低 7 bits 為星期遮罩）
+R_EVERY = 0x8000   # 規則：每隔 N 天（低 14 bits 為 N）
+R_ARG = 0x3FFF
+
+def make_rule(days=0, every=0):
+    """由星期遮罩或間隔天數建立規則值（都為 0 時為單次鬧鐘）"""
+    if days:
+        return R_WEEKLY | (days & 0x7F)
+    if every:
+        return R_EVERY | min(every, R_ARG)
+    return 0
+
+def rule_fields(rule):
+    """make_rule() 的反函數，回傳 (星期遮罩, 間隔天數)"""
+    if rule & R_WEEKLY:
+        return rule & 0x7F, 0
+    if rule & R_EVERY:
+        return 0, rule & R_ARG
+    return 0, 0
+
+def weekday(day):
+    """日序（分鐘時間戳 // 1440）的星期，0 = 週一（2000-01-01 為週六）"""
+    return (day + 5) % 7
+
+# MicroPython 的 array 沒有 insert / del，改用切片指定（底層為 memmove）
+_NO_I = array("i")
+_NO_H = array("H")
+
+EPOCH_DAYS = 730425  # 0000-03-01 到 2000-01-01 的天數（時間戳以 2000-01-01 00:00 為 0）
+
+def to_minutes(y, M, d, h, m):
+    """將日期時間換算成分鐘時間戳（純整數運算，不需呼叫 time.mktime）"""
+    y -= M <= 2
+    era = y // 400
+    yoe = y - era * 400
+    doy = (153 * (M + (-3 if M > 2 else 9)) + 2) // 5 + d - 1
+    doe = yoe * 365 + yoe // 4 - yoe // 100 + doy
+    days = era * 146097 + doe - EPOCH_DAYS
+    return (days * 24 + h) * 60 + m
+
+def from_minutes(t):
+    """to_minutes() 的反函數，回傳 (y, M, d, h, m)"""
+    days, t = divmod(t, 1440)
+    h, m = divmod(t, 60)
+    z = days + EPOCH_DAYS
+    era = z // 146097
+    doe = z - era * 146097
+    yoe = (doe - doe // 1460 + doe // 36524 - doe // 146096) // 365
+    doy = doe - (365 * yoe + yoe // 4 - yoe // 100)
+    mp = (5 * doy + 2) // 153
+    d = doy - (153 * mp + 2) // 5 + 1
+    M = mp + 3 if mp < 10 else mp - 9
+    return (yoe + era * 400 + (M <= 2), M, d, h, m)
+
+class AlarmView:
+    """
+    單筆鬧鐘的 dict 相容檢視（a["y"]、a.get("enabled") 等寫法照舊可用）。
+    只記錄列號，不複製資料；刪除鬧鐘後舊的檢視即失效，請勿長期保存。
+    """
+    KEYS = ("y", "M", "d", "h", "m", "music", "enabled", "days", "every")
+
+    def __init__(self, store, i):
+        self.store = store
+        self.i = i
+
+    def __getitem__(self, k):
+        s, i = self.store, self.i
+        if k == "music":
+            return s._music[i]
+        if k == "enabled":
+            return bool(s._flags[i] & F_ENABLED)
+        if k == "days":
+            return rule_fields(s._rule[i])[0]
+        if k == "every":
+            return rule_fields(s._rule[i])[1]
+        return from_minutes(s._min[i])["yMdhm".index(k)]
+
+    def get(self, k, default=None):
+        return self[k] if k in self.KEYS else default
+
+    def to_dict(self):
+        y, M, d, h, m = from_minutes(self.store._min[self.i])
+        days, every = rule_fields(self.store._rule[self.i])
+        return {"y":y,"M":M,"d":d,"h":h,"m":m,"music":self["music"],"enabled":self["enabled"],
+                "days":days,"every":every,"skip":[list(from_minutes(day * 1440)[:3]) for day in self.store.skips(self.i)]}
+
+class AlarmStore:
+    """
+    緊密欄位陣列存放的鬧鐘表 + 時間排序索引。
+    列號維持使用者看到的順序（網頁 / VIEW 以索引操作）；
+    _order 只收錄已啟用的鬧鐘，依分鐘時間戳遞增排序。
+    """
+
+    def __init__(self, rows=None):
+        self.load(rows or [])
+
+    def load(self, rows):
+        """以 dict 清單（舊版 JSON 格式）重建資料與索引"""
+        self.clear()
+        for a in rows:  # 保險起見補欄位
+            i = self.add_raw(to_minutes(a["y"], a["M"], a["d"], a["h"], a["m"]), a.get("music", 0),
+                             F_ENABLED if a.get("enabled", True) else 0, False,
+                             make_rule(a.get("days", 0), a.get("every", 0)))
+            for y, M, d in a.get("skip", ()):
+                self._skip_add(i, to_minutes(y, M, d, 0, 0) // 1440)
+        self.reindex()
+
+    def clear(self):
+        self._min = array("i")
+        self._music = bytearray()
+        self._flags = bytearray()
+        self._rule = array("H")
+        self._order = array("H")
+        self._skip = {}  # 列號 -> 例外日序的遞增清單（只有設定過例外的鬧鐘才有）
+
+    def to_list(self):
+        """轉回 dict 清單（JSON 輸出用）"""
+        return [AlarmView(self, i).to_dict() for i in range(len(self._min))]
+
+    def row_json(self, i):
+        """第 i 筆的 JSON（bytes，欄位同 to_dict()），串流輸出時不必建立 dict"""
+        y, M, d, h, m = from_minutes(self._min[i])
+        days, every = rule_fields(self._rule[i])
+        # bytes 的 %s 在 MicroPython 會輸出 b'...'，所以 true/false 與例外日期用串接
+        out = (b'{"y":%d,"M":%d,"d":%d,"h":%d,"m":%d,"music":%d,"enabled":' % (y, M, d, h, m, self._music[i])
+               + (b"true" if self._flags[i] & F_ENABLED else b"false")
+               + b',"days":%d,"every":%d,"skip":[' % (days, every))
+        for k, day in enumerate(self.skips(i)):
+            out += (b",[%d,%d,%d]" if k else b"[%d,%d,%d]") % from_minutes(day * 1440)[:3]
+        return out + b"]}"
+
+    def __len__(self):
+        return len(self._min)
+
+    def __iter__(self):
+        for i in range(len(self._min)):
+            yield AlarmView(self, i)
+
+    def __getitem__(self, i):
+        if i < 0:
+            i += len(self._min)
+        if not 0 <= i < len(self._min):
+            raise IndexError(i)
+        return AlarmView(self, i)
+
+    # ---- 索引維護 ----
+    def _bisect(self, minute, right):
+        """在 _order 中找出 minute 的插入位置（right=True 時排在同時間者之後）"""
+        order, mins = self._order, self._min
+        lo, hi = 0, len(order)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            k = mins[order[mid]]
+            if k < minute or (right and k == minute):
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def _index(self, i):
+        j = self._bisect(self._min[i], True)
+        self._order[j:j] = array("H", (i,))
+
+    def _unindex(self, i):
+        order = self._order
+        j = self._bisect(self._min[i], False)
+        while j < len(order):
+            if order[j] == i:
+                order[j:j + 1] = _NO_H
+                return
+            j += 1
+
+    # ---- 資料操作 ----
+    def add(self, y, M, d, h, m, music, enabled=True, rule=0):
+        """新增一筆鬧鐘（rule 見 make_rule()），回傳索引"""
+        return self.add_raw(to_minutes(y, M, d, h, m), music, F_ENABLED if enabled else 0, True, rule)
+
+    def add_raw(self, minute, music, flags, index=True, rule=0):
+        """
+        以原始欄位值新增一筆（二進位檔載入用）。
+        大量載入時可傳 index=False，全部加完再呼叫 reindex() 一次排序。
+        """
+        self._min.append(minute)
+        self._music.append(music)
+        self._flags.append(flags)
+        self._rule.append(rule)
+        i = len(self._min) - 1
+        if rule:  # 起點那天不符合規則時（例如週六設定平日鬧鐘），改為第一個符合的日子
+            self._min[i] = self.next_occurrence(i, minute - 1) or minute
+        if index and flags & F_ENABLED:
+            self._index(i)
+        return i
+
+    def reindex(self):
+        """重建整份時間排序索引（O(n log n)）"""
+        mins, flags = self._min, self._flags
+        rows = [i for i in range(len(mins)) if flags[i] & F_ENABLED]
+        rows.sort(key=lambda i: mins[i])
+        self._order = array("H", rows)
+
+    def raw(self, i):
+        """回傳第 i 筆的原始欄位 (分鐘時間戳, 曲目, 旗標, 規則)"""
+        return self._min[i], self._music[i], self._flags[i], self._rule[i]
+
+    def set_enabled(self, i, enabled):
+        """設定鬧鐘開/關狀態"""
+        if bool(self._flags[i] & F_ENABLED) == enabled:
+            return
+        if enabled:
+            self._flags[i] |= F_ENABLED
+            self._index(i)
+        else:
+            self._flags[i] &= ~F_ENABLED
+            self._unindex(i)
+
+    def disable(self, a):
+        """關閉指定的鬧鐘（由 next_after() 取得的檢視）"""
+        self.set_enabled(a.i, False)
+
+    def toggle(self, i):
+        """切換鬧鐘開/關，回傳新狀態；索引無效時回傳 None"""
+        if 0 <= i < len(self._min):
+            en = not self._flags[i] & F_ENABLED
+            self.set_enabled(i, en)
+            return en
+        return None
+
+    def delete(self, i):
+        """刪除指定索引的鬧鐘"""
+        if not 0 <= i < len(self._min):
+            return False
+        if self._flags[i] & F_ENABLED:
+            self._unindex(i)
+        self._min[i:i + 1] = _NO_I
+        self._music[i:i + 1] = b""
+        self._flags[i:i + 1] = b""
+        self._rule[i:i + 1] = _NO_H
+        order = self._order
+        for j in range(len(order)):  # 後面的列號往前移一格
+            if order[j] > i:
+                order[j] -= 1
+        if self._skip:
+            self._skip = {k - (k > i): v for k, v in self._skip.items() if k != i}
+        return True
+
+    # ---- 重複規則 ----
+    def next_occurrence(self, i, after):
+        """
+        第 i 筆在分鐘時間戳 after 之後（不含）的下一次響鈴時間，略過例外日期；
+        單次鬧鐘或規則沒有任何一天時回傳 None。
+        """
+        t, rule = self._min[i], self._rule[i]
+        days, every = rule_fields(rule)
+        if not days and not every:
+            return None
+        tod, d0 = t % 1440, t // 1440
+        day = d0 if after < t else (after - tod) // 1440 + 1  # 第一個響鈴時間晚於 after 的日子
+        skip = self._skip.get(i, ())
+        while True:
+            if every:
+                day = d0 + (day - d0 + every - 1) // every * every
+            else:
+                for _ in range(7):
+                    if days >> weekday(day) & 1:
+                        break
+                    day += 1
+            if day not in skip:
+                return day * 1440 + tod
+            day += 1
+
+    def advance(self, i, after):
+        """
+        重複鬧鐘改到 after 之後的下一次（響鈴後呼叫），回傳是否仍有下一次；
+        已經過去的例外日期順便清掉。單次鬧鐘直接關閉。
+        """
+        t = self.next_occurrence(i, after)
+        if t is None:
+            self.set_enabled(i, False)
+            return False
+        enabled = self._flags[i] & F_ENABLED
+        if enabled:
+            self._unindex(i)
+        self._min[i] = t
+        if enabled:
+            self._index(i)
+        skip = self._skip.get(i)
+        if skip:
+            skip[:] = [d for d in skip if d >= t // 1440]
+            if not skip:
+                del self._skip[i]
+        return True
+
+    def catch_up(self, minute):
+        """
+        把時間已過（<= minute）的已啟用重複鬧鐘推進到下一次（例如關機期間錯過、剛重新開啟），
+        回傳被推進的列號。已過的單次鬧鐘維持原樣（不補響）。
+        """
+        order = self._order
+        rows = [order[j] for j in range(self._bisect(minute, True)) if self._rule[order[j]]]
+        for i in rows:
+            self.advance(i, minute)
+        return rows
+
+    def skips(self, i):
+        """第 i 筆的例外日序（遞增）"""
+        return self._skip.get(i, ())
+
+    def _skip_add(self, i, day):
+        skip = self._skip.setdefault(i, [])
+        if day not in skip:
+            skip.append(day)
+            skip.sort()
+
+    def skip(self, i, day=None):
+        """
+        重複鬧鐘略過日序 day 的那一次（預設為下一次），回傳略過的日序；
+        單次鬧鐘或索引無效時回傳 None。下一次正好被略過時會推進到再下一次。
+        """
+        if not 0 <= i < len(self._min) or not self._rule[i]:
+            return None
+        t = self._min[i]
+        if day is None:
+            day = t // 1440
+        self._skip_add(i, day)
+        if day == t // 1440:
+            self.advance(i, t)
+        return day
+
+    # ---- 查詢 ----
+    def next_after(self, minute):
+        """回傳時間晚於 minute 的第一筆已啟用鬧鐘（O(log n)）"""
+        j = self._bisect(minute, True)
+        return AlarmView(self, self._order[j]) if j < len(self._order) else None
@@ -1,8 +1,32 @@
 # 工具模組，可以透過單一字元取得對應的點陣圖位元資料
 
-import os
+import os, struct
+from array import array
+from perf import timed
+try:
+    from collections import OrderedDict
+except ImportError:
+    from ucollections import OrderedDict
 
 f = None # 字型檔物件
+_data = None # 整個字型檔預載到記憶體時的內容（子集字型才適用）
+
+# 字形快取：以字碼為鍵，避免每次畫字都 seek + read 字型檔
+# _pinned 為預熱的常用字（不會被淘汰），_cache 為 LRU 快取（超過預算時淘汰最久未用的）
+_pinned = {}
+_cache = OrderedDict()
+_cache_bytes = 0     # LRU 快取目前佔用的點陣資料 bytes
+cache_budget = 2048  # LRU 快取的點陣資料預算 (bytes)，約 85 個中文字
+cache_hits = 0
+cache_misses = 0
+
+# 繪圖用的影格快取（draw_text / draw_label 使用，需要 framebuf）
+# _frames：字碼 -> (FrameBuffer, 字寬)，再畫同一個字直接 blit，不必重新配置 bytearray 與 FrameBuffer
+# _labels：文字 -> (FrameBuffer, 寬度)，整串預先畫好的固定標籤
+_frames = {}
+frame_cache_size = 128  # 最多保留的字數（超過時淘汰最早建立的）
+_labels = {}
+label_cache_size = 16   # 最多保留的標籤數
 
 # 客製字型檔開頭會放 ASCII 32~126 的英數字符號，
 # 以 8x12 像素表示，每個字元 1 byte
@@ -24,35 +48,191 @@ utf16_tables = [
     (0xFE10, 0xFFE3),
 ]
 
-def set_font_path(path):
-    global f
+# 子集字型（由 build_font_subset.py 產生）只收錄韌體用到的字，格式如下（little-endian）：
+#   b"BFS1" | uint16 字數 n | uint16 保留
+#   n 個 uint16 字碼（遞增排序）
+#   ASCII 32~126 點陣（同完整字型開頭，95 x 12 bytes）
+#   n 個中文字點陣（每字 24 bytes，順序同字碼表）
+# set_font_path 會自動辨識，get_bitmap 等函式的用法不變
+SUBSET_MAGIC = b"BFS1"
+
+# 各區段的起點、終點與第一個字在檔案中的位移（set_font_path 時預先算好）
+# 子集字型時每個字自成一段（起點 = 終點 = 字碼）
+_starts = []
+_ends = []
+_bases = []
+_ascii_base = 0 # ASCII 點陣在檔案中的起點
+
+def set_font_path(path, preload=False):
+    """開啟字型檔；preload=True 時把整個檔案讀進記憶體（適合很小的子集字型）"""
+    global f, _data
     f = open(path, 'rb')
+    if f.read(4) == SUBSET_MAGIC:
+        _build_subset_offsets()
+    else:
+        _build_offsets()
+    _data = None
+    if preload:
+        f.seek(0)
+        _data = f.read()
+    clear_cache()
+
+def _build_offsets():
+    global _starts, _ends, _bases, _ascii_base
+    _starts, _ends, _bases = [], [], []
+    _ascii_base = 0
+    offset = (0x7f - 0x20) * 12
+    for start, end in utf16_tables:
+        _starts.append(start)
+        _ends.append(end)
+        _bases.append(offset)
+        offset += (end - start + 1) * 24
+
+def _build_subset_offsets():
+    global _starts, _ends, _bases, _ascii_base
+    f.seek(4)
+    n = struct.unpack("<H", f.read(2))[0]
+    f.seek(8)
+    codes = array('H', f.read(n * 2))  # 由 bytes 建立時直接採用原始內容（little-endian）
+    _ascii_base = 8 + n * 2
+    offset = _ascii_base + (0x7f - 0x20) * 12
+    _starts = _ends = codes
+    _bases = array('I', range(offset, offset + n * 24, 24))
+
+def glyph_offset(code):
+    """回傳字碼在字型檔中的 (位移, 長度)，不在字型中則回傳 None；二分搜尋區段表"""
+    if code <= 0x7E:
+        return (_ascii_base + (code - 0x20) * 12, 12) if code >= 0x20 else None
+    lo, hi = 0, len(_starts)
+    while lo < hi:
+        mid = (lo + hi) // 2
+        if code < _starts[mid]:
+            hi = mid
+        else:
+            lo = mid + 1
+    i = lo - 1
+    if i >= 0 and code <= _ends[i]:
+        return _bases[i] + (code - _starts[i]) * 24, 24
+    return None
+
+def _read_bitmap(code):
+    loc = glyph_offset(code)
+    if loc is None:
+        return None
+    if _data is not None:
+        return _data[loc[0]:loc[0] + loc[1]]
+    f.seek(loc[0])
+    return f.read(loc[1])
+
+def _cached(code):
+    """從常駐字或 LRU 快取取得點陣圖，沒有則回傳 None"""
+    global cache_hits, cache_misses
+    bitmap = _pinned.get(code)
+    if bitmap is None:
+        bitmap = _cache.pop(code, None)
+        if bitmap is None:
+            cache_misses += 1
+            return None
+        _cache[code] = bitmap  # 重新插入到尾端 = 標記為最近使用
+    cache_hits += 1
+    return bitmap
+
+def _remember(code, bitmap):
+    global _cache_bytes
+    if len(bitmap) <= cache_budget:
+        _cache[code] = bitmap
+        _cache_bytes += len(bitmap)
+        _evict()
 
 def get_bitmap(ch):
     if not f:
         print("Font file not loaded.")
         return None
     code = ord(ch)
-    if code <= 0x7E:
-        f.seek((code - 0x20) * 12)
-        return f.read(12)
-    offset = (0x7f - 0x20) * 12
-    for start, end in utf16_tables:
-        if start <= code <= end:
-            offset += (code - start) * 24
-            f.seek(offset)
-            return f.read(24)
-            break
-        offset += (end - start + 1) * 24
-    return None
+    bitmap = _cached(code)
+    if bitmap is None:
+        bitmap = _read_bitmap(code)
+        if bitmap is not None:
+            _remember(code, bitmap)
+    return bitmap
 
-# MicroPython only
+def get_bitmaps(text):
+    """
+    一次取得整串文字的點陣圖，回傳與 text 等長的清單（缺字為 None）。
+    未快取的字先依檔案位移排序再讀取，同一個字只讀一次，相鄰的字不必重新 seek。
+    """
+    if not f:
+        print("Font file not loaded.")
+        return [None] * len(text)
+    out = [None] * len(text)
+    todo = []
+    for i, c in enumerate(text):
+        code = ord(c)
+        bitmap = _cached(code)
+        if bitmap is not None:
+            out[i] = bitmap
+        else:
+            loc = glyph_offset(code)
+            if loc is not None:
+                todo.append((loc[0], loc[1], i, code))
+    todo.sort()
+    pos = last = -1
+    for off, size, i, code in todo:
+        if off != last:  # 重複的字只讀一次
+            if _data is not None:
+                bitmap = _data[off:off + size]
+            else:
+                if off != pos:
+                    f.seek(off)
+                bitmap = f.read(size)
+                pos = off + size
+            last = off
+            _remember(code, bitmap)
+        out[i] = bitmap
+    return out
+
+def _evict():
+    global _cache_bytes
+    while _cache_bytes > cache_budget:
+        code = next(iter(_cache))  # 最久未使用的字
+        _cache_bytes -= len(_cache.pop(code))
+
+def set_cache_budget(nbytes):
+    """設定 LRU 快取的點陣資料預算 (bytes)，超過的部分立即淘汰"""
+    global cache_budget
+    cache_budget = nbytes
+    _evict()
+
+def clear_cache():
+    """清空所有快取（含預熱字與繪圖影格）與統計"""
+    global _cache_bytes, cache_hits, cache_misses
+    _pinned.clear()
+    _cache.clear()
+    _frames.clear()
+    _labels.clear()
+    _cache_bytes = cache_hits = cache_misses = 0
 
-import sys
+def prewarm(text):
+    """預先載入常用字並常駐記憶體（不受 LRU 淘汰），畫這些字時不再讀檔"""
+    for c in text:
+        code = ord(c)
+        if code not in _pinned:
+            bitmap = _read_bitmap(code)
+            if bitmap is not None:
+                _pinned[code] = bitmap
 
-if 'MicroPython' in sys.version:
+def cache_stats():
+    """回傳快取統計：(命中, 未命中, LRU 佔用 bytes, LRU 字數, 常駐字數)"""
+    return cache_hits, cache_misses, _cache_bytes, len(_cache), len(_pinned)
 
+# 需要 framebuf（MicroPython，或電腦上 sim/ 提供的替身）
+
+try:
     from framebuf import FrameBuffer, MONO_HLSB, MONO_HMSB
+except ImportError:
+    FrameBuffer = None
+
+if FrameBuffer:
 
     # 在 oled 指定位置繪製單一字元
     def draw_bitmap(oled, bitmap, x, y):
@@ -67,7 +247,50 @@ if 'MicroPython' in sys.version:
         )
         oled.blit(frame, x, y) # 繪製圖形
 
+    def _put(cache, limit, key, value):
+        if len(cache) >= limit:
+            del cache[next(iter(cache))]
+        cache[key] = value
+
+    def _make_frame(code, bitmap):
+        width = 8 if len(bitmap) == 12 else 16
+        frame = FrameBuffer(bytearray(bitmap), width, 12, MONO_HLSB)
+        fr = (frame, 6 if len(bitmap) == 12 else 12)
+        _put(_frames, frame_cache_size, code, fr)
+        return fr
+
+    def _frame(c):
+        """取得字元的 (影格, 字寬)；缺字時改用 ☒"""
+        fr = _frames.get(ord(c))
+        if fr is None:
+            bitmap = get_bitmap(c)
+            if bitmap is None:
+                print(f"'{c}' not found in font file.")
+                return _frame('☒')
+            fr = _make_frame(ord(c), bitmap)
+        return fr
+
+    def _load_frames(text):
+        """有任何字尚未建立影格時，整串一次批次讀取（get_bitmaps 依檔案位移排序）"""
+        for c in text:
+            if ord(c) not in _frames and c != '\n' and c != '\r':
+                break
+        else:
+            return
+        for c, bitmap in zip(text, get_bitmaps(text)):
+            if bitmap is not None and ord(c) not in _frames:
+                _make_frame(ord(c), bitmap)
+
+    def text_width(text, n=None):
+        """文字（或前 n 個字）的寬度，英數 6、中文 12 像素，不考慮換行"""
+        w = 0
+        for i in range(len(text) if n is None else n):
+            w += _frame(text[i])[1]
+        return w
+
+    @timed("draw_text")
     def draw_text(oled, text, x, y):
+        _load_frames(text)
         for c in text:
             y = y % 64
             if c == '\n':
@@ -77,13 +300,25 @@ if 'MicroPython' in sys.version:
             if c == '\r':
                 x = 0
                 continue
-            bitmap = get_bitmap(c)
-            if bitmap is None:
-                bitmap = get_bitmap('☒')
-                print(f"'{c}' not found in font file.")
-            x_next = x + (6 if len(bitmap) == 12 else 12)
+            frame, width = _frame(c)
+            x_next = x + width
             if x_next >= 128:
                 y += 12
                 x = 0
-            draw_bitmap(oled, bitmap, x, y)
-            x += (6 if len(bitmap) == 12 else 12)
+            oled.blit(frame, x, y)
+            x += width
+
+    def draw_label(oled, text, x, y):
+        """
+        把整串文字畫成一張影格並快取，之後重複出現的標籤只需一次 blit。
+        適合固定的標題與提示文字；不支援換行，寬度需小於 128。
+        """
+        lb = _labels.get(text)
+        if lb is None:
+            _load_frames(text)
+            w = text_width(text)
+            frame = FrameBuffer(bytearray((w + 7) // 8 * 12), w, 12, MONO_HLSB)
+            draw_text(frame, text, 0, 0)
+            lb = (frame, w)
+            _put(_labels, label_cache_size, text, lb)
+        oled.blit(lb[0], x, y)
@@ -0,0 +1,65 @@
+# 子集字型產生工具（在電腦上執行，不需上傳到開發板）
+#
+# 掃描韌體原始碼與網頁中實際用到的字，從完整的 fusion_bdf.12 取出點陣，
+# 產生只含這些字的小字型檔（格式見 bitmap_font_tool.py 的 SUBSET_MAGIC 說明）。
+# .py 檔只掃描字串常值（註解與 docstring 不會顯示在 OLED 上），其他檔案掃描全文。
+#
+# 用法（在專案根目錄執行）：
+#   python lib/build_font_subset.py
+#   python lib/build_font_subset.py -o lib/fonts/fusion_subset.12 alarm_clock.py web/index.html
+# 修改畫面上的中文字後請重新執行，否則缺字會顯示成 ☒
+
+import argparse, io, os, struct, sys, tokenize
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import bitmap_font_tool as bft
+
+DEFAULT_FONT = "lib/fonts/fusion_bdf.12"
+DEFAULT_OUTPUT = "lib/fonts/fusion_subset.12"
+DEFAULT_SOURCES = ["alarm_clock.py", "web/index.html"]
+ALWAYS = "☒"  # draw_text 的缺字替代符號
+
+def scan_text(path):
+    """取出檔案中可能顯示的文字：.py 只取字串常值，其他檔案取全文"""
+    with open(path, encoding="utf-8") as fp:
+        src = fp.read()
+    if not path.endswith(".py"):
+        return src
+    parts = []
+    for tok in tokenize.generate_tokens(io.StringIO(src).readline):
+        if tok.type == tokenize.STRING or tok.type == getattr(tokenize, "FSTRING_MIDDLE", -1):
+            if not tok.string.lstrip("rbfuRBFU").startswith(('"""', "'''")):  # 略過 docstring
+                parts.append(tok.string)
+    return "".join(parts)
+
+def collect_codes(paths):
+    """收集需要的非 ASCII 字碼（只保留完整字型中有的字）"""
+    codes = set(ord(c) for c in ALWAYS)
+    for path in paths:
+        codes.update(ord(c) for c in scan_text(path) if ord(c) > 0x7E)
+    return sorted(c for c in codes if c <= 0xFFFF and bft.glyph_offset(c) is not None)
+
+def build(font, output, sources):
+    bft.set_font_path(font)
+    codes = collect_codes(sources)
+    with open(output, "wb") as out:
+        out.write(bft.SUBSET_MAGIC + struct.pack("<HH", len(codes), 0))
+        out.write(struct.pack("<%dH" % len(codes), *codes))
+        for code in range(0x20, 0x7F):
+            out.write(bft.get_bitmap(chr(code)))
+        for code in codes:
+            out.write(bft.get_bitmap(chr(code)))
+    print("%s: %d 個中文字, %d bytes（完整字型 %d bytes）"
+          % (output, len(codes), os.path.getsize(output), os.path.getsize(font)))
+    return codes
+
+def main():
+    ap = argparse.ArgumentParser(description="產生只含韌體用到的字的子集字型")
+    ap.add_argument("sources", nargs="*", default=DEFAULT_SOURCES, help="要掃描的原始檔")
+    ap.add_argument("--font", default=DEFAULT_FONT, help="完整字型檔")
+    ap.add_argument("-o", "--output", default=DEFAULT_OUTPUT, help="輸出的子集字型檔")
+    args = ap.parse_args()
+    build(args.font, args.output, args.sources)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,34 @@
+# 網頁預先壓縮工具（在電腦上執行，不需上傳到開發板）
+#
+# 把網頁檔壓縮成同名的 .gz，開發板上的 StaticFile（http_server.py）會直接把壓縮版
+# 送給支援 gzip 的瀏覽器（Content-Encoding: gzip），傳輸量約為原本的四成。
+# gzip 結尾記錄原始內容的 CRC32 與長度，開發板以此確認 .gz 與原檔一致。
+#
+# 用法（在專案根目錄執行）：
+#   python lib/build_web_gzip.py
+#   python lib/build_web_gzip.py web/index.html
+# 修改網頁後請重新執行並一起上傳 .gz（沒有重新壓縮時開發板會改送未壓縮版）
+
+import argparse, gzip
+
+DEFAULT_SOURCES = ["web/index.html"]
+
+def build(path):
+    """壓縮 path 成 path + ".gz"，回傳 (原始大小, 壓縮後大小)"""
+    with open(path, "rb") as fp:
+        data = fp.read()
+    gz = gzip.compress(data, compresslevel=9, mtime=0)  # mtime=0：內容相同時輸出也相同
+    with open(path + ".gz", "wb") as fp:
+        fp.write(gz)
+    return len(data), len(gz)
+
+def main():
+    ap = argparse.ArgumentParser(description="產生網頁的 gzip 壓縮版")
+    ap.add_argument("sources", nargs="*", default=DEFAULT_SOURCES, help="要壓縮的檔案")
+    args = ap.parse_args()
+    for path in args.sources:
+        raw, packed = build(path)
+        print("%s.gz: %d -> %d bytes (%.0f%%)" % (path, raw, packed, packed * 100 / raw))
+
+if __name__ == "__main__":
+    main()
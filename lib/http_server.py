@@ -0,0 +1,440 @@
+# 精簡的 HTTP/1.1 伺服器（給 alarm_clock.py 的網頁介面使用）
+#
+# read_request() 逐行讀取請求列與標頭（不會一次 read(1024) 截斷長請求），
+# 解析出方法、路徑、已解碼的查詢參數與標頭；路由以 dict 查表：
+#   ROUTES = {"/time": api_time, ...}
+#   server = HTTPServer(ROUTES)
+#   await asyncio.start_server(server.handle, "0.0.0.0", 80)
+# 每條連線的讀取都經過一塊固定 MAX_LINE bytes 的 LineReader 緩衝區，
+# 超長的請求列 / 標頭一讀滿緩衝區就回覆 431，不會先整行讀進記憶體。
+# 處理函式為 async def handler(req)，以 send(req, ...) / send_json(req, obj) 回覆。
+#
+# 連線保持（keep-alive）：網頁每秒都在輪詢，每次重新建立 TCP 連線對 ESP32 很吃力，
+# 所以回應一律帶 Content-Length，同一條連線可以連續處理多個請求：
+#   idle_ms       連線閒置多久沒有新請求就關閉
+#   max_requests  每條連線最多處理幾個請求
+#   keepalive_conns 同時保持的連線數上限，超過時新連線回覆後即關閉（不佔用 socket）
+#   max_conns     同時連線數硬上限，超過時直接回覆 503
+#
+# 靜態檔案：StaticFile 第一次請求時把檔案讀進記憶體，之後直接從緩衝區送出；
+# 若有建置時產生的 .gz（python lib/build_web_gzip.py），支援 gzip 的瀏覽器拿壓縮版。
+# 回應帶 ETag，瀏覽器重新驗證時回覆 304，不必重送內容：
+#   ROUTES = {"/": StaticFile("web/index.html", "text/html; charset=utf-8").serve}
+#
+# 分段回應：ChunkedWriter 把許多小段資料累積在一塊重複使用的緩衝區，滿了才送出一個 chunk
+# （Transfer-Encoding: chunked），大型 JSON 不必先組成完整字串。
+#
+# 串流回應（Server-Sent Events）：start_stream() 送出不帶 Content-Length 的標頭，
+# 之後以 send_event() 持續推送事件，直到對方斷線（awrite 引發 OSError）。
+#
+# 每個路由的處理時間記錄在 perf 的 "http/路徑" 項目（perf.PROFILE = 0 時不包裝）；
+# 串流路由的時間是整條連線的長度。
+
+import struct
+import uasyncio as asyncio
+from binascii import crc32
+from perf import timed_async
+try:
+    import ujson as json
+except ImportError:
+    import json
+
+MAX_LINE = 1024    # 請求列 / 單一標頭的最大長度
+MAX_HEADERS = 32   # 最多保留的標頭數（多的讀掉丟棄）
+
+STATUS = {
+    200: "OK",
+    204: "No Content",
+    304: "Not Modified",
+    400: "Bad Request",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    411: "Length Required",
+    431: "Request Header Fields Too Large",
+    500: "Internal Server Error",
+    503: "Service Unavailable",
+}
+
+class HTTPError(Exception):
+    """解析請求失敗，status 為應回覆的狀態碼"""
+    def __init__(self, status):
+        super().__init__(status)
+        self.status = status
+
+class Request:
+    """
+    解析後的請求。內容 (body) 不會預先讀進記憶體：
+    處理函式需要時以 await req.read(n) 分段讀取（可以串流處理大型上傳），
+    沒讀完的部分在下一個請求之前會自動丟棄。
+    """
+    def __init__(self, method, path, query, headers, length, reader, writer, keep_alive, version):
+        self.method = method
+        self.path = path
+        self.query = query      # 已解碼的查詢參數 dict
+        self.headers = headers  # 標頭 dict（鍵為小寫）
+        self.length = length    # 尚未讀取的內容 bytes（Content-Length）
+        self.reader = reader
+        self.writer = writer
+        self.keep_alive = keep_alive  # 回覆後是否保持連線（由 HTTPServer 決定）
+        self.version = version        # "HTTP/1.1" 或 "HTTP/1.0"
+        self._pending = b""           # readline() 已讀入、尚未回傳的部分
+
+    async def read(self, n=512):
+        """讀取最多 n bytes 的內容，全部讀完後回傳空的 bytes"""
+        n = min(n, self.length)
+        if n <= 0:
+            return b""
+        data = await self.reader.read(n)
+        if not data:
+            raise OSError("connection closed")
+        self.length -= len(data)
+        return data
+
+    async def readline(self, limit=256):
+        """
+        讀取內容的下一行（含 \n；最後一行可能沒有），讀完時回傳空的 bytes。
+        只保留目前這一行，不會把整個內容讀進記憶體；超過 limit 的行讀掉丟棄並回傳 None。
+        """
+        line = self._pending
+        too_long = False
+        while True:
+            k = line.find(b"\n")
+            if k >= 0:
+                self._pending = line[k + 1:]
+                return None if too_long or k >= limit else line[:k + 1]
+            if len(line) > limit:
+                too_long = True
+                line = b""
+            data = await self.read()
+            if not data:
+                self._pending = b""
+                return None if too_long else line
+            line += data
+
+    async def discard(self):
+        """丟棄尚未讀取的內容"""
+        while self.length:
+            await self.read()
+
+    def arg(self, name, conv=str):
+        """取得查詢參數並轉型；缺少或格式錯誤時引發 HTTPError(400)"""
+        try:
+            return conv(self.query[name])
+        except (KeyError, ValueError):
+            raise HTTPError(400)
+
+def unquote(s):
+    """URL 解碼（%XX 與 +），以 UTF-8 解讀"""
+    if "%" not in s and "+" not in s:
+        return s
+    parts = s.replace("+", " ").split("%")
+    out = bytearray(parts[0].encode())
+    for p in parts[1:]:
+        try:
+            if len(p) < 2:
+                raise ValueError
+            out.append(int(p[:2], 16))
+            out.extend(p[2:].encode())
+        except ValueError:  # 不是合法的 %XX，照原樣保留
+            out.extend(("%" + p).encode())
+    return out.decode()
+
+def parse_query(qs):
+    """把 "a=1&b=%E4%B8%AD" 解析成 {"a": "1", "b": "中"}"""
+    q = {}
+    if qs:
+        for kv in qs.split("&"):
+            if kv:
+                k, _, v = kv.partition("=")
+                q[unquote(k)] = unquote(v)
+    return q
+
+class LineReader:
+    """
+    每條連線一個的讀取緩衝區（固定 MAX_LINE bytes，讀取時不另外配置）。
+    readline() 從緩衝區切出一行；緩衝區滿了仍沒有換行就立即引發 HTTPError(431)，
+    不會像 stream.readline() 那樣把任意長的一行整個讀進記憶體。
+    read() 先取用緩衝區中剩下的資料（內容開頭、下一個請求），再從連線讀取。
+    """
+    def __init__(self, stream):
+        self.stream = stream
+        self.buf = bytearray(MAX_LINE)
+        self.mv = memoryview(self.buf)
+        self.start = 0  # buf[start:end] 為已讀入、尚未取用的資料
+        self.end = 0
+
+    async def readline(self):
+        """讀取一行（含 \n）；連線關閉時回傳剩下的資料（可能為空）"""
+        scan = self.start
+        while True:
+            k = bytes(self.mv[scan:self.end]).find(b"\n")
+            if k >= 0:
+                k += scan + 1
+                line = bytes(self.mv[self.start:k])
+                self.start = k
+                return line
+            if self.start:  # 把未取用的資料移到開頭，騰出空間
+                n = self.end - self.start
+                self.buf[:n] = bytes(self.mv[self.start:self.end])
+                self.start, self.end = 0, n
+            if self.end == MAX_LINE:
+                raise HTTPError(431)
+            scan = self.end
+            n = await self.stream.readinto(self.mv[self.end:])
+            if not n:
+                line = bytes(self.mv[:self.end])
+                self.end = 0
+                return line
+            self.end += n
+
+    async def read(self, n):
+        """讀取最多 n bytes"""
+        if self.start < self.end:
+            k = min(n, self.end - self.start)
+            data = bytes(self.mv[self.start:self.start + k])
+            self.start += k
+            return data
+        return await self.stream.read(n)
+
+async def read_request(reader, writer=None):
+    """讀取請求列與標頭（reader 為 LineReader）；連線已關閉（沒有任何資料）時回傳 None"""
+    line = await reader.readline()
+    if not line:
+        return None
+    parts = line.decode().split()
+    if len(parts) != 3 or not parts[2].startswith("HTTP/"):
+        raise HTTPError(400)
+    method, target, version = parts
+    path, _, qs = target.partition("?")
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if not line or line == b"\r\n" or line == b"\n":
+            break
+        if len(headers) < MAX_HEADERS:
+            k, _, v = line.decode().partition(":")
+            headers[k.strip().lower()] = v.strip()
+    try:
+        length = int(headers.get("content-length", 0))
+    except ValueError:
+        raise HTTPError(400)
+    # HTTP/1.1 預設保持連線，HTTP/1.0 需明確要求
+    conn = headers.get("connection", "").lower()
+    keep_alive = conn != "close" if version == "HTTP/1.1" else conn == "keep-alive"
+    return Request(method, unquote(path), parse_query(qs), headers, length, reader, writer, keep_alive, version)
+
+def _head(req, status, ctype, length, extra):
+    head = "HTTP/1.1 %d %s\r\n" % (status, STATUS.get(status, ""))
+    if ctype:
+        head += "Content-Type: %s\r\n" % ctype
+    if length is not None:
+        head += "Content-Length: %d\r\n" % length
+    head += extra
+    head += "Connection: keep-alive\r\n\r\n" if req.keep_alive else "Connection: close\r\n\r\n"
+    return head.encode()
+
+async def send(req, status=200, body=b"", ctype=None, headers=""):
+    """送出完整回應（狀態列 + 標頭 + 內容）；headers 為額外的標頭字串（每行以 \\r\\n 結尾）"""
+    if isinstance(body, str):
+        body = body.encode()
+    head = _head(req, status, ctype, len(body), headers)
+    if len(body) < 512:
+        await req.writer.awrite(head + body)  # 小回應合併成一次寫入
+    else:
+        await req.writer.awrite(head)
+        await req.writer.awrite(body)
+
+async def send_json(req, obj, status=200):
+    await send(req, status, json.dumps(obj), "application/json")
+
+class StaticFile:
+    """
+    快取的靜態檔案。path + ".gz" 的 gzip 結尾記錄了原始內容的 CRC32 與長度，
+    與原檔相符才使用（改了原檔卻忘記重新壓縮時，自動改送未壓縮版）。
+    ETag 為原始內容的 CRC32，壓縮版加上 "-gz"；max_age 為 0 時瀏覽器每次都以 If-None-Match 重新驗證。
+    """
+    def __init__(self, path, ctype, max_age=0):
+        self.path = path
+        self.ctype = ctype
+        self.cache = "max-age=%d" % max_age if max_age else "no-cache"
+        self.etag = None
+        self._plain = None  # 未壓縮內容（只有不支援 gzip 的用戶端要求時才讀入）
+        self._gz = None     # 壓縮內容
+
+    def _load(self):
+        crc = size = 0
+        buf = bytearray(512)
+        mv = memoryview(buf)
+        with open(self.path, "rb") as f:
+            while True:
+                n = f.readinto(buf)
+                if not n:
+                    break
+                crc = crc32(mv[:n], crc)
+                size += n
+        self.etag = '"%08x"' % crc
+        try:
+            with open(self.path + ".gz", "rb") as f:
+                gz = f.read()
+            if struct.unpack("<II", gz[-8:]) == (crc, size & 0xFFFFFFFF):
+                self._gz = gz
+            else:
+                print("[Web] %s.gz is stale, serving uncompressed" % self.path)
+        except (OSError, ValueError):
+            pass
+
+    async def serve(self, req):
+        """路由處理函式"""
+        if self.etag is None:
+            self._load()
+        gzip = self._gz is not None and "gzip" in req.headers.get("accept-encoding", "")
+        etag = self.etag[:-1] + '-gz"' if gzip else self.etag
+        extra = "ETag: %s\r\nCache-Control: %s\r\nVary: Accept-Encoding\r\n" % (etag, self.cache)
+        if etag in req.headers.get("if-none-match", ""):
+            await req.writer.awrite(_head(req, 304, None, None, extra))
+            return
+        if gzip:
+            await send(req, 200, self._gz, self.ctype, extra + "Content-Encoding: gzip\r\n")
+            return
+        if self._plain is None:
+            with open(self.path, "rb") as f:
+                self._plain = f.read()
+        await send(req, 200, self._plain, self.ctype, extra)
+
+class ChunkedWriter:
+    """
+    以 chunked 編碼分段送出長度未知的回應：
+        out = ChunkedWriter(req, "application/json")
+        await out.start()
+        await out.write(b"...")  # 任意次
+        await out.close()
+    資料先複製進固定大小的緩衝區；緩衝區前端預留 chunk 長度、尾端預留 \r\n，
+    每個 chunk 只需一次 awrite（chunk 長度固定以 4 位十六進位表示，前導 0 合乎規格）。
+    HTTP/1.0 用戶端不支援 chunked，改為直接送出內容並在結束後關閉連線。
+    """
+    def __init__(self, req, ctype, size=512):
+        self.req = req
+        self.ctype = ctype
+        self.chunked = req.version == "HTTP/1.1"
+        self.buf = bytearray(size + 8)
+        self.mv = memoryview(self.buf)
+        self.start_at = 6 if self.chunked else 0  # "xxxx\r\n"
+        self.end = len(self.buf) - 2 if self.chunked else len(self.buf)
+        self.n = self.start_at
+
+    async def start(self, headers=""):
+        """送出狀態列與標頭"""
+        if self.chunked:
+            headers += "Transfer-Encoding: chunked\r\n"
+        else:
+            self.req.keep_alive = False
+        await self.req.writer.awrite(_head(self.req, 200, self.ctype, None, headers))
+
+    async def write(self, data):
+        mv = memoryview(data)
+        while len(mv):
+            k = min(len(mv), self.end - self.n)
+            self.buf[self.n:self.n + k] = mv[:k]
+            self.n += k
+            mv = mv[k:]
+            if self.n == self.end:
+                await self.flush()
+
+    async def flush(self):
+        """送出緩衝區中的資料（一個 chunk）"""
+        n = self.n - self.start_at
+        if not n:
+            return
+        if self.chunked:
+            self.buf[0:6] = b"%04x\r\n" % n
+            self.buf[self.n:self.n + 2] = b"\r\n"
+            await self.req.writer.awrite(self.mv[:self.n + 2])
+        else:
+            await self.req.writer.awrite(self.mv[:self.n])
+        self.n = self.start_at
+
+    async def close(self):
+        """送出剩餘資料與結尾的空 chunk"""
+        await self.flush()
+        if self.chunked:
+            await self.req.writer.awrite(b"0\r\n\r\n")
+
+async def start_stream(req, ctype="text/event-stream", headers=""):
+    """開始串流回應（長度未知，送完即關閉連線）"""
+    req.keep_alive = False
+    await req.writer.awrite(_head(req, 200, ctype, None, "Cache-Control: no-cache\r\n" + headers))
+
+async def send_event(req, event, obj):
+    """推送一個 Server-Sent Event，內容為 JSON"""
+    await req.writer.awrite(("event: %s\ndata: %s\n\n" % (event, json.dumps(obj))).encode())
+
+class HTTPServer:
+    def __init__(self, routes, idle_ms=10000, max_requests=100, keepalive_conns=4, max_conns=8):
+        self.routes = {path: timed_async("http" + path)(fn) for path, fn in routes.items()}
+        self.idle_ms = idle_ms
+        self.max_requests = max_requests
+        self.keepalive_conns = keepalive_conns
+        self.max_conns = max_conns
+        self.active = 0    # 目前的連線數
+        self.requests = 0  # 累計處理的請求數
+
+    async def handle(self, reader, writer):
+        """asyncio.start_server 的連線處理函式：在同一條連線上依序處理請求"""
+        self.active += 1
+        try:
+            if self.active > self.max_conns:
+                await writer.awrite(b"HTTP/1.1 503 Service Unavailable\r\n"
+                                    b"Content-Length: 0\r\nRetry-After: 1\r\nConnection: close\r\n\r\n")
+                return
+            # 保持的連線太多時，這條連線只處理一個請求
+            limit = self.max_requests if self.active <= self.keepalive_conns else 1
+            reader = LineReader(reader)  # 同一條連線的請求共用（保留已讀入的下一個請求）
+            for n in range(limit):
+                try:
+                    req = await asyncio.wait_for_ms(read_request(reader, writer), self.idle_ms)
+                except asyncio.TimeoutError:
+                    return  # 閒置逾時
+                if req is None:
+                    return  # 對方已關閉連線
+                if n == limit - 1:
+                    req.keep_alive = False
+                if not await self._dispatch(req) or not req.keep_alive:
+                    return
+                await req.discard()
+        except HTTPError as e:
+            # 請求格式錯誤（此時連線狀態不明，回覆後關閉）
+            try:
+                await writer.awrite(("HTTP/1.1 %d %s\r\nContent-Length: 0\r\nConnection: close\r\n\r\n"
+                                     % (e.status, STATUS.get(e.status, ""))).encode())
+            except Exception:
+                pass
+        except Exception:
+            pass  # 連線已中斷
+        finally:
+            self.active -= 1
+            try:
+                await writer.aclose()
+            except Exception:
+                pass
+
+    async def _dispatch(self, req):
+        """依路徑查表處理一個請求，回傳連線是否可以繼續使用"""
+        self.requests += 1
+        handler = self.routes.get(req.path)
+        try:
+            if handler is None:
+                await send(req, 404)
+            else:
+                await handler(req)
+            return True
+        except HTTPError as e:
+            # 缺少參數等錯誤（尚未開始回覆）
+            await send(req, e.status)
+            return True
+        except OSError:
+            return False  # 傳送途中連線中斷
+        except Exception as e:
+            print("[Web]", e)
+            req.keep_alive = False
+            await send(req, 500)
+            return False
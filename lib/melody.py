@@ -0,0 +1,201 @@
+# 旋律播放模組
+#
+# 開機時把 MELODY 中每首曲子（音名字串 + 持續時間）編譯成一個 array('H')：
+#   [頻率0, 毫秒0, 頻率1, 毫秒1, ...]（頻率 0 = 休止符）
+# 播放時不必再查 NOTE_FREQS、轉 int，也不會產生任何物件。
+#
+# MelodyPlayer 以絕對截止時間（ticks_add）排程每個音符：
+# 每個音符的結束時間 = 上一個音符的結束時間 + 長度，而不是「現在 + 長度」，
+# 事件迴圈忙碌造成的延遲不會一個音符一個音符累積，整首曲子的速度維持準確。
+#
+# 響鈴、預聽、小睡共用同一個播放器：play() 會先停止正在播放的曲子，
+# stop() 立即靜音，正在等待的播放迴圈醒來後發現世代編號已改變就結束。
+#
+# ToneSequencer 改由 machine.Timer 的回呼推進音符，事件迴圈忙碌（傳送網頁、OLED 整頁更新）
+# 也不影響節奏；對外提供與 MelodyPlayer 相同的 play() / stop()，可以直接替換。
+#
+# 效能量測（perf）：MelodyPlayer 記錄每個音符比預定晚醒來多少 (melody_late)，
+# ToneSequencer 記錄每次切換音符的耗時 (melody_step)。
+
+from array import array
+from machine import Timer
+import utime as time
+import uasyncio as asyncio
+from perf import timed, record
+
+def compile_melody(notes, freqs):
+    """把 [(音名, 毫秒), ...] 編譯成交錯存放的 array('H')；不認得的音名視為休止符"""
+    out = array('H')
+    for note, ms in notes:
+        out.append(freqs.get(note, 0))
+        out.append(int(ms))
+    return out
+
+class MelodyPlayer:
+    def __init__(self, pwm, duty=512, gap_ms=40):
+        self.pwm = pwm
+        self.duty = duty      # 發聲時的 PWM duty（音量）
+        self.gap_ms = gap_ms  # 音符之間的靜音間隔 (ms)
+        self._gen = 0         # 播放世代編號：play() / stop() 時加一，舊的播放迴圈看到就結束
+
+    def stop(self):
+        """停止目前的播放並立即靜音"""
+        self._gen += 1
+        self.pwm.duty(0)
+
+    async def play(self, song, seconds=None, loop=False):
+        """
+        播放編譯好的曲子；seconds 為最長播放秒數（預聽用），loop=True 時重複播放直到 stop()。
+        被 stop()、新的 play() 或取消 (cancel) 時結束，結束時靜音。
+        """
+        self.stop()
+        gen = self._gen
+        pwm, gap = self.pwm, self.gap_ms
+        t = time.ticks_ms()
+        end = None if seconds is None else time.ticks_add(t, int(seconds * 1000))
+        try:
+            while True:
+                for i in range(0, len(song), 2):
+                    if end is not None and time.ticks_diff(end, t) <= 0:
+                        return
+                    f = song[i]
+                    if f:
+                        pwm.freq(f)
+                        pwm.duty(self.duty)
+                    else:
+                        pwm.duty(0)
+                    t = time.ticks_add(t, song[i + 1])
+                    if not await self._until(t, end, gen):
+                        return
+                    pwm.duty(0)
+                    t = time.ticks_add(t, gap)
+                    if not await self._until(t, end, gen):
+                        return
+                if not loop:
+                    return
+        finally:
+            if gen == self._gen:
+                pwm.duty(0)
+
+    async def _until(self, deadline, end, gen):
+        """睡到 deadline（不超過 end），回傳播放是否仍有效"""
+        if end is not None and time.ticks_diff(deadline, end) > 0:
+            deadline = end
+        wait = time.ticks_diff(deadline, time.ticks_ms())
+        if wait > 0:
+            await asyncio.sleep_ms(wait)
+            record("melody_late", max(0, time.ticks_diff(time.ticks_ms(), deadline)) * 1000)
+        return gen == self._gen
+
+class ToneSequencer:
+    """
+    以硬體計時器驅動的音符序列器。
+    計時器每 TICK_MS 觸發一次，回呼只把剩餘格數減一，歸零時才切換下一個音符或間隔，
+    時間基準是計時器本身，不會因為回呼延遲而累積誤差。
+    start() / stop() / set_volume() 可在任何地方呼叫（包含計時器回呼中）。
+    """
+    TICK_MS = 10  # 時間解析度；曲子的長度與間隔都是 10ms 的倍數
+
+    def __init__(self, pwm, timer_id=0, duty=512, gap_ms=40):
+        self.pwm = pwm
+        self.duty = duty
+        self.gap_ms = gap_ms
+        self._timer = Timer(timer_id)
+        self._song = None
+        self._i = 0             # 目前音符在 song 中的位置
+        self._left = 0          # 目前音符 / 間隔剩餘的格數
+        self._budget = -1       # 剩餘可播放的格數（-1 = 不限）
+        self._in_gap = False    # 是否處於音符之間的間隔
+        self._sounding = False  # 目前是否正在發聲
+        self._loop = False
+        self._gen = 0           # 播放世代編號（同 MelodyPlayer）
+        self._done = asyncio.ThreadSafeFlag()  # 播放結束時通知 play()
+        self._lock = asyncio.Lock()            # ThreadSafeFlag 只能有一個等待者：同時只有一個 play() 在等
+
+    def start(self, song, seconds=None, loop=False):
+        """開始播放編譯好的曲子（會先停止目前的播放）"""
+        self.stop()
+        self._song = song
+        self._loop = loop
+        self._budget = -1 if seconds is None else int(seconds * 1000) // self.TICK_MS
+        self._i = -2
+        self._in_gap = True  # 讓第一次 _advance() 直接進入第一個音符
+        self._advance()
+        self._timer.init(mode=Timer.PERIODIC, period=self.TICK_MS, callback=self._tick)
+
+    def stop(self):
+        """停止播放並立即靜音"""
+        self._timer.deinit()
+        self._gen += 1
+        self._song = None
+        self._sounding = False
+        self.pwm.duty(0)
+        self._done.set()
+
+    def set_volume(self, duty):
+        """設定音量（PWM duty），正在發聲時立即生效"""
+        self.duty = duty
+        if self._sounding:
+            self.pwm.duty(duty)
+
+    def active(self):
+        return self._song is not None
+
+    def _tick(self, timer):
+        if self._song is None:
+            return
+        if self._budget >= 0:
+            self._budget -= 1
+            if self._budget <= 0:
+                self.stop()
+                return
+        self._left -= 1
+        if self._left <= 0:
+            self._advance()
+
+    @timed("melody_step")
+    def _advance(self):
+        """切換到下一個間隔或音符"""
+        song, pwm = self._song, self.pwm
+        if not self._in_gap and self.gap_ms:
+            pwm.duty(0)
+            self._sounding = False
+            self._in_gap = True
+            self._left = self.gap_ms // self.TICK_MS or 1
+            return
+        i = self._i + 2
+        if i >= len(song):
+            if not self._loop:
+                self.stop()
+                return
+            i = 0
+        self._i = i
+        self._in_gap = False
+        f = song[i]
+        if f:
+            pwm.freq(f)
+            pwm.duty(self.duty)
+        else:
+            pwm.duty(0)
+        self._sounding = bool(f)
+        self._left = song[i + 1] // self.TICK_MS or 1
+
+    async def play(self, song, seconds=None, loop=False):
+        """
+        與 MelodyPlayer.play() 相同：播放並等待結束；被取消時停止播放。
+        先停止目前的播放，等前一個 play() 結束（釋放 _done）後才開始；
+        排隊期間又有新的 play() 或 stop() 時直接結束，不會播放。
+        """
+        self.stop()
+        gen = self._gen
+        async with self._lock:
+            if gen != self._gen:
+                return
+            self.start(song, seconds, loop)
+            gen = self._gen
+            try:
+                while gen == self._gen and self._song is not None:
+                    await self._done.wait()
+            finally:
+                if gen == self._gen:
+                    self.stop()
@@ -0,0 +1,189 @@
+# 效能量測（/metrics 的資料來源）
+#
+# 用來找出時鐘變慢的原因：記錄各熱點函式的呼叫次數、累計 / 最長耗時 (ticks_us)，
+# 事件迴圈延遲 (loop lag) 與 gc.mem_free() 的低水位。每個項目只保留固定大小的環狀緩衝區
+# （最近 RING 筆樣本），執行再久記憶體用量也不會增加。
+#
+#   @timed("oled_write")              同步函式（或方法）
+#   @timed_async("http")              async 函式（整段 await 期間，包含等待 I/O）
+#   _save = span("save")              程式區塊；物件可以建立一次重複使用
+#   with _save: ...
+#   record("melody_late", us)         直接加入一筆樣本
+#   asyncio.create_task(monitor())    定期取樣事件迴圈延遲與可用記憶體
+#   report()                          /metrics 的文字內容（bytes）
+#
+# PROFILE 是編譯期開關（micropython.const）：設為 0 時 timed() 直接回傳原函式，
+# 其餘都是空操作，MicroPython 編譯時就把量測程式整段略過，不佔任何執行時間。
+#
+# report() 每行一個項目（沒有樣本的略過），單位為微秒（heap 為 bytes）：
+#   名稱 n=次數 sum=累計 max=最長 min=最短 last=最近的樣本（舊 → 新，逗號分隔）
+
+import gc
+from array import array
+try:
+    from micropython import const
+except ImportError:  # 電腦端工具（CPython）
+    def const(x):
+        return x
+try:
+    from utime import ticks_us, ticks_ms, ticks_diff
+except ImportError:  # 電腦端工具（CPython 沒有 utime）
+    from time import perf_counter_ns
+    def ticks_us():
+        return perf_counter_ns() // 1000
+    def ticks_ms():
+        return perf_counter_ns() // 1000000
+    def ticks_diff(a, b):
+        return a - b
+
+PROFILE = const(1)  # 0 = 關閉量測（所有函式變成空操作）
+RING = const(16)    # 每個項目保留的最近樣本數
+
+class Stat:
+    """單一項目的統計：次數、總和、最大、最小與最近 RING 筆樣本"""
+    def __init__(self):
+        self.ring = array("i", [0] * RING)
+        self.reset()
+
+    def reset(self):
+        self.n = 0
+        self.sum = 0
+        self.max = 0
+        self.min = 0
+        self.pos = 0
+
+    def add(self, v):
+        if not self.n or v < self.min:
+            self.min = v
+        if v > self.max:
+            self.max = v
+        self.n += 1
+        self.sum += v
+        self.ring[self.pos] = v
+        self.pos = (self.pos + 1) % RING
+
+    def recent(self):
+        """最近的樣本（舊 → 新）"""
+        k = min(self.n, RING)
+        return [self.ring[(self.pos - k + j) % RING] for j in range(k)]
+
+_stats = {}         # 名稱 -> Stat
+_start = ticks_ms() # report() 的 up_ms 起點
+
+def stat(name):
+    """取得（或建立）名稱對應的 Stat"""
+    s = _stats.get(name)
+    if s is None:
+        s = _stats[name] = Stat()
+    return s
+
+if PROFILE:
+
+    def timed(name):
+        """裝飾器：量測同步函式每次呼叫的耗時"""
+        s = stat(name)
+        def deco(fn):
+            def wrapper(*args, **kw):
+                t = ticks_us()
+                try:
+                    return fn(*args, **kw)
+                finally:
+                    s.add(ticks_diff(ticks_us(), t))
+            return wrapper
+        return deco
+
+    def timed_async(name):
+        """裝飾器：量測 async 函式從開始到結束的時間"""
+        s = stat(name)
+        def deco(fn):
+            async def wrapper(*args, **kw):
+                t = ticks_us()
+                try:
+                    return await fn(*args, **kw)
+                finally:
+                    s.add(ticks_diff(ticks_us(), t))
+            return wrapper
+        return deco
+
+    class span:
+        """with 區塊量測（不可巢狀使用同一個物件）"""
+        def __init__(self, name):
+            self.s = stat(name)
+            self.t = 0
+
+        def __enter__(self):
+            self.t = ticks_us()
+            return self
+
+        def __exit__(self, *exc):
+            self.s.add(ticks_diff(ticks_us(), self.t))
+
+    def record(name, v):
+        """加入一筆樣本"""
+        stat(name).add(v)
+
+    async def monitor(period_ms=200):
+        """
+        每 period_ms 取樣一次：實際睡醒時間比預定晚了多少 (loop_lag)，
+        以及 gc.mem_free()（heap_free，看 min 即為低水位；CPython 上沒有這項）。
+        """
+        import uasyncio as asyncio
+        lag = stat("loop_lag")
+        mem_free = getattr(gc, "mem_free", None)
+        heap = stat("heap_free") if mem_free else None
+        while True:
+            t = ticks_us()
+            await asyncio.sleep_ms(period_ms)
+            lag.add(max(0, ticks_diff(ticks_us(), t) - period_ms * 1000))
+            if heap:
+                heap.add(mem_free())
+
+    def reset():
+        """清除所有統計"""
+        global _start
+        for s in _stats.values():
+            s.reset()
+        _start = ticks_ms()
+
+    def report(extra=()):
+        """/metrics 的內容；extra 為額外的 (名稱, 數值) 行"""
+        out = ["up_ms %d" % ticks_diff(ticks_ms(), _start)]
+        for name, v in extra:
+            out.append("%s %s" % (name, v))
+        for name in sorted(_stats):
+            s = _stats[name]
+            if not s.n:
+                continue  # 還沒有樣本
+            out.append("%s n=%d sum=%d max=%d min=%d last=%s" % (
+                name, s.n, s.sum, s.max, s.min, ",".join(str(v) for v in s.recent())))
+        out.append("")
+        return "\n".join(out).encode()
+
+else:
+
+    def timed(name):
+        return lambda fn: fn
+
+    timed_async = timed
+
+    class span:
+        def __init__(self, name):
+            pass
+
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *exc):
+            pass
+
+    def record(name, v):
+        pass
+
+    async def monitor(period_ms=200):
+        pass
+
+    def reset():
+        pass
+
+    def report(extra=()):
+        return b"# profiling disabled (perf.PROFILE = 0)\n"
@@ -0,0 +1,62 @@
+# 保留模式的文字畫面
+# 記住每一行上次畫的內容，只重畫有變動的部分（從第一個不同的字開始），
+# 並只把變動的欄 / 頁送到 OLED，不必每次 fill(0) 再傳整個 1 KB 畫面。
+# 例如主畫面每秒只有秒數改變，實際只需重畫兩個數字、傳送約 24 bytes。
+# 整個畫面重畫時，每行以 draw_label 畫出並快取，固定的標題 / 提示文字只需一次 blit。
+
+from bitmap_font_tool import draw_text, draw_label, text_width
+
+LINE_H = 12  # 字高（像素）
+WIDTH = 128  # draw_text 到這個寬度會自動換行
+
+def _fits(text):
+    """是否在同一行內畫完（不會換行，才能局部重畫）"""
+    return '\n' not in text and '\r' not in text and text_width(text) < WIDTH
+
+class TextScreen:
+    def __init__(self, oled):
+        self.oled = oled
+        self.lines = {}  # y 座標 -> 上次畫的文字
+
+    def invalidate(self):
+        """下次 write() 強制整個畫面重畫（例如其他程式直接畫過 OLED）"""
+        self.lines = {}
+
+    def write(self, lines):
+        """顯示多行文字 [(text, y), ...]；行的配置不變時只更新有變動的行"""
+        old = self.lines
+        if len(lines) != len(old) or any(y not in old for _, y in lines):
+            self._redraw(lines)
+            return
+        for text, y in lines:
+            prev = old[y]
+            if text == prev:
+                continue
+            if not _fits(text):
+                self._redraw(lines)
+                return
+            # 相同開頭的字不必重畫
+            n = 0
+            lim = min(len(prev), len(text))
+            while n < lim and prev[n] == text[n]:
+                n += 1
+            x0 = text_width(text, n)
+            x1 = max(text_width(prev), text_width(text))
+            self.oled.fill_rect(x0, y, x1 - x0, LINE_H, 0)
+            draw_text(self.oled, text[n:], x0, y)
+            self.oled.show(x0, x1 - 1, y // 8, (y + LINE_H - 1) // 8)
+            old[y] = text
+
+    def _redraw(self, lines):
+        oled = self.oled
+        oled.fill(0)
+        self.lines = {}
+        for text, y in lines:
+            if _fits(text):
+                draw_label(oled, text, 0, y)
+                self.lines[y] = text
+            else:
+                draw_text(oled, text, 0, y)
+        if len(self.lines) != len(lines):  # 有換行的文字：下次仍整個重畫
+            self.lines = {}
+        oled.show()
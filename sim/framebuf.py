@@ -0,0 +1,64 @@
+# framebuf 模組的純 Python 版本（僅實作本專案用到的單色格式與繪圖函式）
+
+MONO_VLSB = 0
+MONO_HLSB = 3
+MONO_HMSB = 4
+
+class FrameBuffer:
+    def __init__(self, buf, width, height, format, stride=None):
+        self.buf = buf
+        self.width = width
+        self.height = height
+        self.format = format
+        self.stride = stride or width
+
+    def _addr(self, x, y):
+        if self.format == MONO_VLSB:
+            return (y >> 3) * self.stride + x, y & 7
+        i = y * ((self.stride + 7) >> 3) + (x >> 3)
+        return i, (7 - (x & 7)) if self.format == MONO_HLSB else (x & 7)
+
+    def pixel(self, x, y, c=None):
+        if not (0 <= x < self.width and 0 <= y < self.height):
+            return None
+        i, bit = self._addr(x, y)
+        if c is None:
+            return (self.buf[i] >> bit) & 1
+        if c:
+            self.buf[i] |= 1 << bit
+        else:
+            self.buf[i] &= ~(1 << bit) & 0xFF
+
+    def fill(self, c):
+        v = 0xFF if c else 0
+        self.buf[:] = bytes([v]) * len(self.buf)
+
+    def fill_rect(self, x, y, w, h, c):
+        for yy in range(max(y, 0), min(y + h, self.height)):
+            for xx in range(max(x, 0), min(x + w, self.width)):
+                self.pixel(xx, yy, c)
+
+    def hline(self, x, y, w, c):
+        self.fill_rect(x, y, w, 1, c)
+
+    def vline(self, x, y, h, c):
+        self.fill_rect(x, y, 1, h, c)
+
+    def rect(self, x, y, w, h, c, f=False):
+        if f:
+            self.fill_rect(x, y, w, h, c)
+            return
+        self.hline(x, y, w, c)
+        self.hline(x, y + h - 1, w, c)
+        self.vline(x, y, h, c)
+        self.vline(x + w - 1, y, h, c)
+
+    def blit(self, fbuf, x, y, key=-1, palette=None):
+        for yy in range(max(0, -y), min(fbuf.height, self.height - y)):
+            for xx in range(max(0, -x), min(fbuf.width, self.width - x)):
+                c = fbuf.pixel(xx, yy)
+                if c != key:
+                    self.pixel(x + xx, y + yy, c)
+
+    def text(self, s, x, y, c=1):
+        pass  # 內建 8x8 字型不在模擬範圍內（本專案使用 bitmap_font_tool）
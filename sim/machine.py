@@ -0,0 +1,221 @@
+# machine 模組的 CPython 替身：可由腳本控制的 Pin、記錄輸出的 PWM、
+# 記錄傳輸量的 I2C（位址 0x3C 接上模擬的 SSD1306）
+
+import simctl
+
+class Pin:
+    IN = 1
+    OUT = 3
+    OPEN_DRAIN = 7
+    PULL_UP = 2
+    PULL_DOWN = 1
+    IRQ_FALLING = 2
+    IRQ_RISING = 1
+
+    def __init__(self, id, mode=-1, pull=-1, value=None):
+        self.id = id
+        self._value = 1 if pull == Pin.PULL_UP else 0
+        self._handler = None
+        self._trigger = 0
+        self.init(mode, pull, value)
+        if id in simctl.levels:  # 建立前就被外部驅動（例如開機時按住按鈕）
+            self._value = simctl.levels[id]
+        simctl.pins[id] = self
+
+    def init(self, mode=-1, pull=-1, value=None):
+        if mode != -1:
+            self.mode = mode
+        if pull == Pin.PULL_UP:
+            self._value = 1
+        if value is not None:
+            self._value = 1 if value else 0
+
+    def value(self, v=None):
+        if v is None:
+            return self._value
+        self._value = 1 if v else 0
+
+    def __call__(self, v=None):
+        return self.value(v)
+
+    def on(self):
+        self._value = 1
+
+    def off(self):
+        self._value = 0
+
+    def irq(self, handler=None, trigger=IRQ_FALLING | IRQ_RISING, **kwargs):
+        self._handler = handler
+        self._trigger = trigger
+
+    def _drive(self, v):
+        """外部改變電位（模擬按鈕），依觸發條件呼叫 irq 處理函式"""
+        v = 1 if v else 0
+        old, self._value = self._value, v
+        if self._handler and old != v:
+            if (v == 0 and self._trigger & Pin.IRQ_FALLING) or (v == 1 and self._trigger & Pin.IRQ_RISING):
+                self._handler(self)
+
+
+class PWM:
+    def __init__(self, pin, freq=1000, duty=0):
+        self.pin = pin
+        self._freq = freq
+        self._duty = duty
+
+    def _log(self):
+        t = simctl.irq_time if simctl.irq_time is not None else simctl.ticks_ms()
+        simctl.pwm_log.append((t, self._freq, self._duty))
+
+    def freq(self, f=None):
+        if f is None:
+            return self._freq
+        self._freq = f
+        self._log()
+
+    def duty(self, d=None):
+        if d is None:
+            return self._duty
+        self._duty = d
+        self._log()
+
+    def duty_u16(self, d=None):
+        if d is None:
+            return self._duty * 64
+        self.duty(d // 64)
+
+    def deinit(self):
+        self.duty(0)
+
+
+class I2C:
+    def __init__(self, id=0, scl=None, sda=None, freq=400000):
+        self.id = id
+
+    def _count(self, n):
+        simctl.i2c_bytes += n + 1  # +1 為位址 byte
+        simctl.i2c_writes += 1
+
+    def scan(self):
+        return sorted(simctl.i2c_devices)
+
+    def writeto(self, addr, buf, stop=True):
+        self._count(len(buf))
+        dev = simctl.i2c_devices.get(addr)
+        if dev is None:
+            raise OSError(19)  # ENODEV
+        dev.write(bytes(buf))
+        return len(buf)
+
+    def writevto(self, addr, vector, stop=True):
+        return self.writeto(addr, b"".join(bytes(b) for b in vector), stop)
+
+
+class SSD1306Device:
+    """
+    模擬的 SSD1306（I2C）：解析命令與資料串流，維護 GDDRAM 內容，
+    可用 render() 印出目前畫面，檢查局部更新是否正確。
+    """
+    ARGS = {0x20: 1, 0x21: 2, 0x22: 2, 0x81: 1, 0xA8: 1, 0xAD: 1, 0xD3: 1,
+            0xD5: 1, 0xD9: 1, 0xDA: 1, 0xDB: 1, 0x8D: 1}
+
+    def __init__(self, width=128, height=64):
+        self.width = width
+        self.pages = height // 8
+        self.ram = bytearray(width * self.pages)
+        self.on = False
+        self._cmd = []
+        self.col0, self.col1, self.page0, self.page1 = 0, width - 1, 0, self.pages - 1
+        self.col, self.page = 0, 0
+
+    def write(self, buf):
+        if buf[0] == 0x40:  # 資料
+            for b in buf[1:]:
+                self.ram[self.page * self.width + self.col] = b
+                self.col += 1
+                if self.col > self.col1:
+                    self.col = self.col0
+                    self.page = self.page + 1 if self.page < self.page1 else self.page0
+        else:               # 命令（Co=1, D/C#=0：每次一個 byte）
+            for b in buf[1:]:
+                self._command(b)
+
+    def _command(self, b):
+        self._cmd.append(b)
+        need = self.ARGS.get(self._cmd[0], 0)
+        if len(self._cmd) <= need:
+            return
+        cmd, args, self._cmd = self._cmd[0], self._cmd[1:], []
+        if cmd == 0x21:
+            self.col0, self.col1 = args
+            self.col = self.col0
+        elif cmd == 0x22:
+            self.page0, self.page1 = args
+            self.page = self.page0
+        elif cmd in (0xAE, 0xAF):
+            self.on = cmd == 0xAF
+
+    def pixel(self, x, y):
+        return (self.ram[(y >> 3) * self.width + x] >> (y & 7)) & 1
+
+    def render(self):
+        """以文字方塊畫出目前畫面（上下兩個像素合成一個字元）"""
+        rows = []
+        for y in range(0, self.pages * 8, 2):
+            rows.append("".join(" ▀▄█"[self.pixel(x, y) | self.pixel(x, y + 1) << 1]
+                                for x in range(self.width)))
+        return "\n".join(rows)
+
+simctl.i2c_devices.setdefault(0x3C, SSD1306Device())
+
+
+class Timer:
+    ONE_SHOT = 0
+    PERIODIC = 1
+
+    def __init__(self, id=-1, **kwargs):
+        self.id = id
+        self._task = None
+        if kwargs:
+            self.init(**kwargs)
+
+    def init(self, mode=PERIODIC, period=-1, freq=-1, callback=None):
+        """
+        以絕對時間排程（同硬體計時器不會累積誤差）；事件迴圈卡住時稍後補觸發。
+        回呼執行期間 simctl.irq_time 為這次應觸發的模擬毫秒，PWM 紀錄以它為時間。
+        """
+        import uasyncio
+        self.deinit()
+        if freq > 0:
+            period = 1000 / freq
+        start = simctl.ticks_ms()  # 計時從 init() 當下開始，而不是任務第一次執行時
+        async def _run():
+            t = start
+            while True:
+                t += period
+                wait = t - simctl.ticks_ms()
+                if wait > 0:
+                    await uasyncio.sleep_ms(wait)
+                simctl.irq_time = int(t)
+                try:
+                    callback(self)
+                finally:
+                    simctl.irq_time = None
+                if mode == Timer.ONE_SHOT:
+                    break
+        self._task = uasyncio.create_task(_run())
+
+    def deinit(self):
+        if self._task:
+            self._task.cancel()
+            self._task = None
+
+
+def freq(f=None):
+    return 240000000
+
+def reset():
+    raise SystemExit("[sim] machine.reset()")
+
+def unique_id():
+    return b"\x00sim\x00\x01"
@@ -0,0 +1,19 @@
+# micropython 模組的 CPython 替身
+
+def const(x):
+    return x
+
+def native(f):
+    return f
+
+viper = native
+
+def alloc_emergency_exception_buf(size):
+    pass
+
+def schedule(fn, arg):
+    fn(arg)
+    return True
+
+def mem_info(*args):
+    print("[sim] mem_info() not available on CPython")
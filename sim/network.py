@@ -0,0 +1,42 @@
+# network 模組的 CPython 替身：connect() 之後經過 simctl.wifi_delay 模擬秒才連上
+
+import simctl
+
+STA_IF = 0
+AP_IF = 1
+STAT_IDLE = 0
+STAT_CONNECTING = 1
+STAT_GOT_IP = 1010
+
+_instances = []  # 建立過的 WLAN（ntptime 用來判斷是否已連線）
+
+class WLAN:
+    def __init__(self, interface=STA_IF):
+        self.interface = interface
+        self._active = False
+        self._connect_at = None
+        _instances.append(self)
+
+    def active(self, on=None):
+        if on is None:
+            return self._active
+        self._active = bool(on)
+
+    def connect(self, ssid=None, key=None, **kwargs):
+        self._connect_at = simctl.elapsed() + simctl.wifi_delay
+
+    def disconnect(self):
+        self._connect_at = None
+
+    def isconnected(self):
+        return (self._active and simctl.wifi_ok and self._connect_at is not None
+                and simctl.elapsed() >= self._connect_at)
+
+    def status(self, *args):
+        if self.isconnected():
+            return STAT_GOT_IP
+        return STAT_CONNECTING if self._connect_at is not None else STAT_IDLE
+
+    def ifconfig(self, *args):
+        ip = simctl.ip if self.isconnected() else "0.0.0.0"
+        return (ip, "255.255.255.0", "127.0.0.1", "8.8.8.8")
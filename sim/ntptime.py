@@ -0,0 +1,20 @@
+# ntptime 模組的 CPython 替身：WiFi 已連線且 simctl.ntp_ok 時，
+# 把假時鐘校正為「模擬時鐘 + simctl.ntp_skew」
+
+import simctl
+
+host = "pool.ntp.org"
+timeout = 1
+
+def _connected():
+    import network
+    return any(w.isconnected() for w in network._instances)
+
+def time():
+    if not (simctl.ntp_ok and _connected()):
+        raise OSError(-202)  # 網路無法使用（同 ESP32 的 getaddrinfo 錯誤）
+    return int(simctl.now() + simctl.ntp_skew) - simctl.EPOCH_2000
+
+def settime():
+    t = time()
+    simctl.set_clock(t + simctl.EPOCH_2000)
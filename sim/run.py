@@ -0,0 +1,135 @@
+# 在 Linux 上無頭執行整個 alarm_clock.main()
+#
+# 用法（在專案根目錄執行）：
+#   python sim/run.py --seconds 60 --speed 10
+#   python sim/run.py --start "2025-10-18 07:29:50" --press A@3:1000 --press B@8:100 --screen
+#   python sim/run.py --seconds 30 --json > report.json
+#
+# --start 為台灣時間；--press 按鈕@模擬秒數:按住毫秒（按鈕可寫 A / B 或腳位編號）
+# 執行期間網頁伺服器在 http://127.0.0.1:<--http-port>/ 可直接用瀏覽器或 curl 連線。
+# 結束後輸出量測結果：I2C 傳輸量、各函式呼叫次數 / CPU 時間 / 記憶體配置、蜂鳴器事件數。
+
+import argparse, calendar, json, os, sys, tempfile, time, tracemalloc
+
+SIM_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(SIM_DIR)
+sys.path[:0] = [SIM_DIR, ROOT, os.path.join(ROOT, "lib")]
+
+import simctl
+
+BUTTONS = {"A": 34, "B": 21}
+TZ_OFFSET = 8 * 3600
+PROFILED = ["oled_write", "show_clock", "next_alarm", "load_alarms"]
+
+stats = {}  # 函式名稱 -> [呼叫次數, CPU 微秒總和, 最大 CPU 微秒, 最大配置 bytes]
+
+def _profile(name, fn, alloc):
+    rec = stats.setdefault(name, [0, 0, 0, 0])
+    def wrapper(*args, **kwargs):
+        if alloc:
+            base = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+        t0 = time.thread_time_ns()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            dt = (time.thread_time_ns() - t0) // 1000
+            rec[0] += 1
+            rec[1] += dt
+            rec[2] = max(rec[2], dt)
+            if alloc:
+                rec[3] = max(rec[3], tracemalloc.get_traced_memory()[1] - base)
+    return wrapper
+
+def prepare_workdir(workdir=None):
+    """建立執行目錄並切換過去：主程式以相對路徑讀取字型與網頁，鬧鐘檔也寫在目前目錄"""
+    workdir = workdir or tempfile.mkdtemp(prefix="alarm_sim_")
+    for name in ("lib", "web"):
+        link = os.path.join(workdir, name)
+        if not os.path.exists(link):
+            os.symlink(os.path.join(ROOT, name), link)
+    os.chdir(workdir)
+    return workdir
+
+def _parse_press(spec):
+    btn, rest = spec.split("@")
+    at, _, hold = rest.partition(":")
+    pin = BUTTONS.get(btn.upper()) or int(btn)
+    return pin, float(at), int(hold or 100)
+
+def main():
+    ap = argparse.ArgumentParser(description="無頭執行 alarm_clock 並量測效能")
+    ap.add_argument("--seconds", type=float, default=30, help="模擬執行秒數")
+    ap.add_argument("--speed", type=float, default=10, help="時間倍速")
+    ap.add_argument("--start", help="起始台灣時間 YYYY-MM-DD HH:MM:SS（預設為現在）")
+    ap.add_argument("--press", action="append", default=[], help="按鈕腳本，例如 A@3:1000")
+    ap.add_argument("--no-wifi", action="store_true", help="WiFi 永遠連不上")
+    ap.add_argument("--no-ntp", action="store_true", help="NTP 校時失敗")
+    ap.add_argument("--ntp-skew", type=float, default=0, help="NTP 時間比起始時間快幾秒（模擬冷開機 RTC 不正確）")
+    ap.add_argument("--wifi-delay", type=float, default=2.0, help="WiFi 連線需要幾個模擬秒")
+    ap.add_argument("--http-port", type=int, default=8080, help="網頁伺服器實際使用的 port")
+    ap.add_argument("--workdir", help="執行目錄（鬧鐘檔案存放處，預設為暫存目錄）")
+    ap.add_argument("--alloc", action="store_true", help="以 tracemalloc 量測記憶體配置（較慢）")
+    ap.add_argument("--screen", action="store_true", help="結束時印出 OLED 畫面")
+    ap.add_argument("--json", action="store_true", help="以 JSON 輸出量測結果")
+    args = ap.parse_args()
+
+    if args.start:
+        start = calendar.timegm(time.strptime(args.start, "%Y-%m-%d %H:%M:%S")) - TZ_OFFSET
+    else:
+        start = time.time()
+    simctl.set_clock(start, args.speed)
+    simctl.duration = args.seconds
+    simctl.http_port = args.http_port
+    simctl.wifi_ok = not args.no_wifi
+    simctl.ntp_ok = not args.no_ntp
+    simctl.ntp_skew = args.ntp_skew
+    simctl.wifi_delay = args.wifi_delay
+
+    workdir = prepare_workdir(args.workdir)
+
+    for spec in args.press:
+        pin, at, hold = _parse_press(spec)
+        @simctl.spawn
+        async def _script(pin=pin, at=at, hold=hold):
+            import uasyncio
+            await uasyncio.sleep(at)
+            await simctl.press(pin, hold)
+
+    import alarm_clock as app  # 匯入不會啟動，先替熱點函式加上量測再 run()
+    for name in PROFILED:
+        if hasattr(app, name):
+            setattr(app, name, _profile(name, getattr(app, name), args.alloc))
+
+    if args.alloc:
+        tracemalloc.start()
+    t0 = time.monotonic()
+    app.run()  # 到 simctl.duration 結束
+    real = time.monotonic() - t0
+
+    report = {
+        "sim_seconds": args.seconds,
+        "real_seconds": round(real, 3),
+        "i2c_bytes": simctl.i2c_bytes,
+        "i2c_writes": simctl.i2c_writes,
+        "i2c_bytes_per_sec": round(simctl.i2c_bytes / args.seconds, 1),
+        "pwm_events": len(simctl.pwm_log),
+        "functions": {name: {"calls": r[0], "cpu_us": r[1], "max_us": r[2],
+                             "avg_us": r[1] // r[0] if r[0] else 0, "max_alloc": r[3]}
+                      for name, r in stats.items()},
+        "workdir": workdir,
+    }
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print("模擬 %.1f 秒（實際 %.1f 秒），I2C %d bytes / %d 次（%.1f bytes/秒），蜂鳴器事件 %d"
+              % (args.seconds, real, simctl.i2c_bytes, simctl.i2c_writes,
+                 report["i2c_bytes_per_sec"], report["pwm_events"]))
+        for name, r in report["functions"].items():
+            print("  %-12s 呼叫 %5d 次  平均 %6d us  最大 %6d us  最大配置 %6d bytes"
+                  % (name, r["calls"], r["avg_us"], r["max_us"], r["max_alloc"]))
+    if args.screen:
+        print(simctl.i2c_devices[0x3C].render())
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+# 模擬器控制中心：假時鐘、腳位腳本、網路設定與量測紀錄
+# 所有 shim 模組（machine / network / ntptime / utime / uasyncio ...）都從這裡讀寫狀態，
+# 測試或 run.py 在執行 alarm_clock.run() 之前先修改這裡的設定。
+
+import time as _time
+
+# ---- 假時鐘 ----
+# 模擬時間 = 起始時間 + 實際經過時間 * speed；asyncio 的等待時間也同樣除以 speed，
+# 所以 speed=10 時模擬 60 秒只需真實 6 秒，程式看到的時間仍然一致。
+EPOCH_2000 = 946684800  # 1970 → 2000 的秒數（MicroPython 的 time.time() 以 2000 年為起點）
+speed = 1.0
+_base_sim = 0.0                 # 上次改變倍速時的模擬經過秒數
+_base_real = _time.monotonic()  # 上次改變倍速時的真實時間
+_offset = _time.time()          # 模擬 Unix 時間 = _offset + elapsed()
+
+def set_speed(new_speed):
+    """修改倍速（已經過的模擬時間不變）"""
+    global _base_sim, _base_real, speed
+    _base_sim = elapsed()
+    _base_real = _time.monotonic()
+    speed = new_speed
+
+def set_clock(unix_time, new_speed=None):
+    """把模擬時鐘（開發板 RTC）設定為指定的 Unix 時間（UTC），可同時修改倍速"""
+    global _offset
+    if new_speed is not None:
+        set_speed(new_speed)
+    _offset = unix_time - elapsed()
+
+def elapsed():
+    """模擬開始後經過的模擬秒數（不受 set_clock 影響，計時與逾時用）"""
+    return _base_sim + (_time.monotonic() - _base_real) * speed
+
+def now():
+    """目前的模擬 Unix 時間（UTC 秒，浮點數）"""
+    return _offset + elapsed()
+
+def real(seconds):
+    """模擬秒數換算成真實等待秒數"""
+    return seconds / speed
+
+# ---- 執行設定 ----
+duration = None   # uasyncio.run() 執行多少模擬秒後自動結束（None = 不限）
+http_port = 8080  # 程式要求 port 80 時實際使用的 port（一般使用者無法綁定 80）
+_tasks = []       # uasyncio.run() 開始時一併啟動的 async 函式（按鈕腳本等）
+
+def spawn(fn):
+    """登記在 uasyncio.run() 開始時啟動的 async 函式"""
+    _tasks.append(fn)
+    return fn
+
+_loop = None      # uasyncio.run() 執行中的事件迴圈與主任務（stop() 用）
+_main = None
+
+def stop():
+    """結束 uasyncio.run()（可由其他執行緒呼叫，例如效能測試的用戶端）"""
+    if _loop is not None:
+        _loop.call_soon_threadsafe(_main.cancel)
+
+# ---- 網路 ----
+wifi_delay = 2.0  # connect() 之後幾個模擬秒連上
+wifi_ok = True    # False = 永遠連不上
+ntp_ok = True     # False = ntptime.settime() 失敗
+ntp_skew = 0.0    # NTP 伺服器時間與模擬時鐘的差（秒），可用來模擬開機時 RTC 不準
+ip = "127.0.0.1"
+
+# ---- 腳位與量測紀錄 ----
+pins = {}          # 腳位編號 -> machine.Pin
+levels = {}        # 外部驅動的輸入電位（腳位尚未建立時先記在這裡）
+pwm_log = []       # (模擬毫秒, 頻率, duty)
+irq_time = None    # machine.Timer 回呼執行中時為該次應觸發的模擬毫秒
+i2c_bytes = 0      # I2C 總傳輸量（含位址 / 控制 byte）
+i2c_writes = 0     # I2C 交易次數
+i2c_devices = {}   # 位址 -> 模擬裝置（有 write(buf) 方法）
+
+def set_pin(pin_no, value):
+    """從外部改變輸入腳位電位（會觸發 irq）"""
+    levels[pin_no] = value
+    if pin_no in pins:
+        pins[pin_no]._drive(value)
+
+def press(pin_no, hold_ms, active=0):
+    """排程一次按壓：立即按下，hold_ms 模擬毫秒後放開（供腳本在 async 任務中使用）"""
+    import uasyncio
+    async def _press():
+        set_pin(pin_no, active)
+        await uasyncio.sleep_ms(hold_ms)
+        set_pin(pin_no, 1 - active)
+    return uasyncio.create_task(_press())
+
+def ticks_ms():
+    return int(elapsed() * 1000)
@@ -0,0 +1,126 @@
+# uasyncio 的 CPython 替身（以 asyncio 實作）
+# 等待時間依 simctl.speed 縮放；串流補上 MicroPython 的 awrite() / aclose()；
+# 程式要求 port 80 時改用 simctl.http_port；simctl.duration 設定時 run() 到時自動結束。
+
+import asyncio as _aio
+import simctl
+
+from asyncio import (CancelledError, Event, Lock, Task, TimeoutError,  # noqa: F401
+                     create_task, current_task, gather)
+
+def sleep(t):
+    return _aio.sleep(simctl.real(t))
+
+def sleep_ms(ms):
+    return _aio.sleep(simctl.real(ms / 1000))
+
+async def wait_for(aw, timeout):
+    return await _aio.wait_for(aw, None if timeout is None else simctl.real(timeout))
+
+def wait_for_ms(aw, timeout):
+    return wait_for(aw, timeout / 1000)
+
+def get_event_loop():
+    return _aio.get_event_loop()
+
+class ThreadSafeFlag:
+    """同 MicroPython：同一時間只能有一個工作在 wait()，第二個等待者引發 RuntimeError"""
+    def __init__(self):
+        self._event = _aio.Event()
+        self._waiting = False
+
+    def set(self):
+        self._event.set()
+
+    def clear(self):
+        self._event.clear()
+
+    async def wait(self):
+        if self._waiting:
+            raise RuntimeError("ThreadSafeFlag: only one waiter")
+        self._waiting = True
+        try:
+            await self._event.wait()
+        finally:
+            self._waiting = False
+        self._event.clear()
+
+
+class StreamReader:
+    def __init__(self, reader):
+        self._r = reader
+
+    async def read(self, n=-1):
+        return await self._r.read(n)
+
+    async def readline(self):
+        return await self._r.readline()
+
+    async def readexactly(self, n):
+        return await self._r.readexactly(n)
+
+    async def readinto(self, buf):
+        data = await self._r.read(len(buf))
+        buf[:len(data)] = data
+        return len(data)
+
+
+class StreamWriter:
+    def __init__(self, writer):
+        self._w = writer
+
+    def get_extra_info(self, name, default=None):
+        return self._w.get_extra_info(name, default)
+
+    def write(self, buf):
+        self._w.write(buf.encode() if isinstance(buf, str) else bytes(buf))
+
+    async def drain(self):
+        await self._w.drain()
+
+    async def awrite(self, buf, off=0, sz=-1):
+        if sz == -1:
+            sz = len(buf) - off
+        self.write(buf[off:off + sz])
+        await self.drain()
+
+    def close(self):
+        self._w.close()
+
+    async def wait_closed(self):
+        try:
+            await self._w.wait_closed()
+        except (ConnectionError, OSError):
+            pass
+
+    async def aclose(self):
+        self.close()
+        await self.wait_closed()
+
+
+async def start_server(callback, host, port, backlog=5):
+    if port == 80:
+        port = simctl.http_port
+    async def _cb(reader, writer):
+        await callback(StreamReader(reader), StreamWriter(writer))
+    return await _aio.start_server(_cb, host, port, backlog=backlog, reuse_address=True)
+
+async def open_connection(host, port):
+    reader, writer = await _aio.open_connection(host, port)
+    return StreamReader(reader), StreamWriter(writer)
+
+def run(coro):
+    async def _main():
+        simctl._loop = _aio.get_running_loop()
+        simctl._main = current_task()
+        for fn in simctl._tasks:
+            create_task(fn())
+        try:
+            if simctl.duration is None:
+                return await coro
+            return await _aio.wait_for(coro, simctl.real(simctl.duration))
+        except (_aio.TimeoutError, _aio.CancelledError):
+            pass
+        finally:
+            simctl._loop = None
+    return _aio.run(_main())
@@ -0,0 +1,2 @@
+# ujson 的 CPython 替身
+from json import *  # noqa: F401,F403
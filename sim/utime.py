@@ -0,0 +1,48 @@
+# utime（MicroPython 的 time 模組）的 CPython 替身，時間來自 simctl 的假時鐘
+# time() / localtime() / mktime() 與 ESP32 相同以 2000-01-01 為起點，localtime() 回傳 8 欄 tuple
+
+import calendar as _calendar
+import time as _time
+import simctl
+
+_PERIOD = 1 << 30  # ticks_* 的循環週期（同 MicroPython）
+
+def time():
+    return int(simctl.now()) - simctl.EPOCH_2000
+
+def time_ns():
+    return int((simctl.now() - simctl.EPOCH_2000) * 1000000000)
+
+def localtime(secs=None):
+    if secs is None:
+        secs = time()
+    return tuple(_time.gmtime(int(secs) + simctl.EPOCH_2000)[:8])
+
+gmtime = localtime
+
+def mktime(t):
+    return _calendar.timegm(tuple(t[:6])) - simctl.EPOCH_2000
+
+def sleep(seconds):
+    _time.sleep(simctl.real(seconds))
+
+def sleep_ms(ms):
+    _time.sleep(simctl.real(ms / 1000))
+
+def sleep_us(us):
+    _time.sleep(simctl.real(us / 1000000))
+
+def ticks_ms():
+    return int(simctl.elapsed() * 1000) & (_PERIOD - 1)
+
+def ticks_us():
+    return int(simctl.elapsed() * 1000000) & (_PERIOD - 1)
+
+ticks_cpu = ticks_us
+
+def ticks_add(ticks, delta):
+    return (ticks + delta) & (_PERIOD - 1)
+
+def ticks_diff(a, b):
+    d = (a - b) & (_PERIOD - 1)
+    return d - _PERIOD if d >= _PERIOD // 2 else d
@@ -93,21 +93,33 @@ class SSD1306(framebuf.FrameBuffer):
         self.write_cmd(SET_COM_OUT_DIR | ((rotate & 1) << 3))
         self.write_cmd(SET_SEG_REMAP | (rotate & 1))
 
-    def show(self):
-        x0 = 0
-        x1 = self.width - 1
+    def show(self, x0=0, x1=None, page0=0, page1=None):
+        # optional column range x0..x1 and page range page0..page1 (8 rows
+        # per page) send only that part of the framebuffer
+        if x1 is None:
+            x1 = self.width - 1
+        if page1 is None:
+            page1 = self.pages - 1
+        full = x0 == 0 and x1 == self.width - 1 and page0 == 0 and page1 == self.pages - 1
+        col_offset = 0
         if self.width != 128:
             # narrow displays use centred columns
             col_offset = (128 - self.width) // 2
-            x0 += col_offset
-            x1 += col_offset
         self.write_cmd(SET_COL_ADDR)
-        self.write_cmd(x0)
-        self.write_cmd(x1)
+        self.write_cmd(x0 + col_offset)
+        self.write_cmd(x1 + col_offset)
         self.write_cmd(SET_PAGE_ADDR)
-        self.write_cmd(0)
-        self.write_cmd(self.pages - 1)
-        self.write_data(self.buffer)
+        self.write_cmd(page0)
+        self.write_cmd(page1)
+        if full:
+            self.write_data(self.buffer)
+        else:
+            # the RAM pointer wraps inside the address window, so the
+            # pages can be sent one after another
+            mv = memoryview(self.buffer)
+            for page in range(page0, page1 + 1):
+                start = page * self.width
+                self.write_data(mv[start + x0:start + x1 + 1])
 
 
 class SSD1306_I2C(SSD1306):
@@ -0,0 +1,152 @@
+# 日誌斷電測試：把 alarm.log 截斷在每一個 byte 位置（模擬寫到一半斷電），
+# 重新載入後的鬧鐘必須等於「截斷處之前最後一筆完整紀錄」時的狀態。
+# 執行（在專案根目錄）：python -m pytest tests/
+
+import os, sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [os.path.join(ROOT, "sim"), ROOT, os.path.join(ROOT, "lib")]
+
+import pytest
+import alarm_file
+from alarm_store import AlarmStore, make_rule
+from alarm_journal import AlarmJournal
+
+def _journal(d):
+    return AlarmJournal(AlarmStore(), os.path.join(d, "alarm.bin"), os.path.join(d, "alarm.log"))
+
+def _record(tmp_path):
+    """
+    寫出一份快照 + 各種紀錄的日誌，回傳 (快照 bytes, 日誌 bytes, [(日誌長度, 此時的鬧鐘清單), ...])。
+    開關只在快照後刪除過才寫進日誌（否則直接改快照），所以先刪除再開關。
+    """
+    tmp_path.mkdir()
+    j = _journal(str(tmp_path))
+    j.load()
+    j.store.add(2025, 10, 18, 7, 30, 1)
+    j.store.add(2025, 10, 20, 6, 0, 2, rule=make_rule(0x1F, 0))
+    j.compact()
+    states = []
+    def mark():
+        states.append((os.path.getsize(j.log_path), j.store.to_list()))
+    mark()
+    j.log_add(j.store.add(2025, 11, 1, 8, 15, 3))
+    mark()
+    j.store.delete(0)
+    j.log_delete(0)
+    mark()
+    j.store.set_enabled(1, False)
+    j.log_enabled(1)
+    mark()
+    j.log_skip(0, j.store.skip(0))
+    mark()
+    j.log_add(j.store.add(2025, 12, 24, 23, 59, 0, rule=make_rule(0, 3)))
+    mark()
+    with open(j.snapshot_path, "rb") as f:
+        snap = f.read()
+    with open(j.log_path, "rb") as f:
+        log = f.read()
+    return snap, log, states
+
+def test_truncated_log_recovers_last_complete_record(tmp_path):
+    snap, log, states = _record(tmp_path / "src")
+    assert states[-1][0] == len(log)
+    for cut in range(len(log) + 1):
+        d = tmp_path / ("cut%d" % cut)
+        d.mkdir()
+        (d / "alarm.bin").write_bytes(snap)
+        (d / "alarm.log").write_bytes(log[:cut])
+        expected = [s for size, s in states if size <= cut]
+        expected = expected[-1] if expected else states[0][1]  # 標頭殘缺：只剩快照
+        j = _journal(str(d))
+        j.load()
+        assert j.store.to_list() == expected, "cut at byte %d" % cut
+        # 殘缺的尾端已被壓縮掉：再載入一次結果相同，之後的紀錄也不會接在半行後面
+        j2 = _journal(str(d))
+        j2.load()
+        assert j2.store.to_list() == expected, "reload after cut at byte %d" % cut
+
+def test_truncated_log_then_append(tmp_path):
+    snap, log, states = _record(tmp_path / "src")
+    d = tmp_path / "append"
+    d.mkdir()
+    (d / "alarm.bin").write_bytes(snap)
+    (d / "alarm.log").write_bytes(log[:-3])  # 最後一筆寫到一半
+    j = _journal(str(d))
+    j.load()
+    j.log_add(j.store.add(2026, 1, 1, 0, 0, 1))
+    j2 = _journal(str(d))
+    j2.load()
+    assert j2.store.to_list() == states[-2][1] + [j.store.to_list()[-1]]
+
+def _skipped(d, n):
+    """一筆每天重複的鬧鐘略過 n 天，壓縮後回傳日誌"""
+    j = _journal(d)
+    j.load()
+    j.log_add(j.store.add(2025, 10, 18, 7, 0, 1, rule=make_rule(0, 1)))
+    today = j.store.raw(0)[0] // 1440
+    for k in range(n):
+        j.log_skip(0, j.store.skip(0, today + 1 + k))  # 之後的 n 天
+    j.compact()
+    return j
+
+def test_many_skips_do_not_force_compaction(tmp_path):
+    # 例外日期多於 compact_every 時，之後的寫入也不能每次都再壓縮一次
+    j = _skipped(str(tmp_path), 2 * 64)
+    gen = j.gen
+    assert j.pending == 0
+    for k in range(5):
+        j.log_enabled(0)  # 快照後未刪除過：直接改快照，不寫日誌
+        j.log_add(j.store.add(2026, 1, 1 + k, 8, 0, 1))
+    assert (j.gen, j.pending) == (gen, 5)
+    j2 = _journal(str(tmp_path))
+    j2.load()
+    assert (j2.gen, j2.pending) == (gen, 5)
+    assert j2.store.to_list() == j.store.to_list()
+    assert len(j2.store.skips(0)) == 2 * 64
+
+@pytest.mark.parametrize("log", ["old", "empty", "torn"])
+def test_skips_survive_power_cut_in_compact(tmp_path, log):
+    # 壓縮時新快照已 rename、日誌還沒重寫完就斷電：日誌是舊世代（被忽略）、空的或只剩半行標頭
+    j = _skipped(str(tmp_path), 3)
+    j.log_skip(0, j.store.skip(0, j.store.skips(0)[-1] + 1))
+    with open(j.log_path) as f:
+        old = f.read()
+    expected = j.store.to_list()
+    j.compact()
+    with open(j.log_path, "w") as f:
+        f.write({"old": old, "empty": "", "torn": "G"}[log])
+    j2 = _journal(str(tmp_path))
+    j2.load()
+    assert j2.store.to_list() == expected
+    assert len(j2.store.skips(0)) == 4
+
+def test_legacy_snapshot_and_log(tmp_path):
+    # 上一版：ALM1 快照（沒有例外日期）+ "G <世代> <n>" 日誌，緊接 n 筆重新寫出的 X 紀錄
+    j = _skipped(str(tmp_path), 3)
+    n = len(j.store)
+    with open(j.snapshot_path, "rb") as f:
+        data = f.read()
+    with open(j.snapshot_path, "wb") as f:
+        f.write(b"ALM1" + data[4:8] + data[12:12 + n * 8])
+    with open(j.log_path, "w") as f:
+        f.write("G %d 3\n" % j.gen)
+        for day in j.store.skips(0):
+            f.write("X 0 %d\n" % day)
+        f.write("E 0 0\n")
+    j.store.set_enabled(0, False)
+    j2 = _journal(str(tmp_path))
+    j2.load()
+    assert j2.store.to_list() == j.store.to_list()
+    assert j2.pending == 1
+    # 舊版檔頭的快照仍可就地改寫旗標
+    j2.store.set_enabled(0, True)
+    alarm_file.patch_flags(j2.snapshot_path, 0, j2.store.raw(0)[2])
+    j3 = _journal(str(tmp_path))
+    j3.load()
+    assert j3.store[0]["enabled"] is False  # 日誌的 E 0 0 重播在後
+    with open(j2.log_path, "w") as f:
+        f.write("G %d\n" % j2.gen)
+    j4 = _journal(str(tmp_path))
+    j4.load()
+    assert j4.store[0]["enabled"] is True
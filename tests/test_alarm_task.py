@@ -0,0 +1,108 @@
+# 鬧鐘排程測試：以 sim/ 的假時鐘（加速）執行真正的 alarm_clock.alarm_task()，
+# 檢查鬧鐘變動剛好落在到期之後、排程醒來之前時，到期的鬧鐘仍會響；
+# 以及 /add 拒絕會讓排程與顯示出錯的欄位。
+# 執行（在專案根目錄）：python -m pytest tests/
+
+import os, sys, calendar, asyncio
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [os.path.join(ROOT, "sim"), ROOT, os.path.join(ROOT, "lib")]
+
+import pytest
+import simctl
+from alarm_store import AlarmStore
+from alarm_journal import AlarmJournal
+from http_server import Request, HTTPError
+
+SPEED = 20
+
+@pytest.fixture
+def app(monkeypatch, tmp_path):
+    """匯入 alarm_clock（不會啟動 main()），換上空白鬧鐘與記錄響鈴的 ring_alarm"""
+    cwd = os.getcwd()
+    os.chdir(ROOT)  # 匯入時以相對路徑載入字型
+    try:
+        import alarm_clock
+    finally:
+        os.chdir(cwd)
+    monkeypatch.chdir(tmp_path)
+    for name in ("_offset", "speed", "_base_sim", "_base_real"):
+        monkeypatch.setattr(simctl, name, getattr(simctl, name))
+    store = AlarmStore()
+    journal = AlarmJournal(store, "alarm.bin", "alarm.log")
+    journal.load()
+    monkeypatch.setattr(alarm_clock, "alarms", store)
+    monkeypatch.setattr(alarm_clock, "journal", journal)
+    monkeypatch.setattr(alarm_clock, "_snooze", None)
+    # Event 會綁定第一次使用它的事件迴圈，每個測試各用一個新的
+    monkeypatch.setattr(alarm_clock, "alarm_changed", asyncio.Event())
+    monkeypatch.setattr(alarm_clock, "_web_event", asyncio.Event())
+    fired = []
+    async def ring_alarm(music):
+        fired.append(music)
+    monkeypatch.setattr(alarm_clock, "ring_alarm", ring_alarm)
+    monkeypatch.setattr(alarm_clock, "fired", fired, raising=False)
+    return alarm_clock
+
+def start_at(hms):
+    """把模擬時鐘設為 2025-10-18 的台灣時間 hms（秒可為小數）"""
+    h, m, s = hms
+    simctl.set_clock(calendar.timegm((2025, 10, 18, h, m, 0)) - 8 * 3600 + s, SPEED)
+
+async def sleep_sim(seconds):
+    await asyncio.sleep(simctl.real(seconds))
+
+def run_task(app, script):
+    async def go():
+        task = asyncio.create_task(app.alarm_task())
+        try:
+            await script()
+        finally:
+            task.cancel()
+    asyncio.run(go())
+
+def test_change_after_deadline_still_fires(app):
+    app.add_alarm(2025, 10, 18, 7, 30, 1)
+    app.add_alarm(2025, 10, 18, 8, 0, 2)
+    start_at((7, 29, 59.5))  # 排程以整數秒計算：約 07:30:00.5 才醒來
+    async def script():
+        await sleep_sim(0.7)  # 07:30:00.2：已到期、排程還沒醒
+        app.switch_alarm(1)   # 變動另一筆鬧鐘
+        await sleep_sim(2)
+    run_task(app, script)
+    assert app.fired == [1]
+
+def test_change_before_deadline_does_not_fire_early(app):
+    app.add_alarm(2025, 10, 18, 7, 30, 1)
+    start_at((7, 29, 57))
+    async def script():
+        await sleep_sim(1)
+        app.add_alarm(2025, 10, 18, 9, 0, 2)
+        await sleep_sim(0.5)
+        assert app.fired == []
+        await sleep_sim(2.5)
+    run_task(app, script)
+    assert app.fired == [1]
+
+def test_alarm_set_in_the_past_does_not_fire(app):
+    # 剛設定成已過時間（同一分鐘內）的鬧鐘不響
+    start_at((7, 30, 10))
+    async def script():
+        await sleep_sim(0.5)
+        app.add_alarm(2025, 10, 18, 7, 30, 1)
+        await sleep_sim(2)
+    run_task(app, script)
+    assert app.fired == []
+
+@pytest.mark.parametrize("bad", [{"music": "7"}, {"music": "-1"}, {"M": "2", "d": "30"},
+                                 {"M": "13"}, {"h": "24"}, {"y": "1999"},
+                                 {"days": "3", "every": "2"}, {"every": "16384"}])
+def test_add_rejects_bad_fields(app, bad):
+    # 與 /bulk 相同的驗證：曲目超出範圍或日期不存在的鬧鐘不會存進去
+    query = {"y": "2025", "M": "10", "d": "18", "h": "7", "m": "30", "music": "1"}
+    query.update(bad)
+    req = Request("GET", "/add", query, {}, 0, None, None, True, "HTTP/1.1")
+    with pytest.raises(HTTPError) as e:
+        asyncio.run(app.api_add(req))
+    assert e.value.status == 400
+    assert len(app.alarms) == 0
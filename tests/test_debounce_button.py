@@ -0,0 +1,196 @@
+# 按鈕判斷測試：用 sim/ 的 Pin 替身照腳本改變電位，以固定的假時鐘逐毫秒 tick，
+# 檢查單擊 / 長按 / 雙擊的判斷，以及彈跳、短於去彈跳時間的雜訊與中斷環形緩衝區溢位。
+# 共通的判斷在輪詢與中斷兩種模式各跑一次；溢位與 tick 延遲只有中斷模式才有。
+# 執行（在專案根目錄）：python -m pytest tests/
+
+import os, sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [os.path.join(ROOT, "sim"), ROOT, os.path.join(ROOT, "lib")]
+
+import pytest
+import simctl
+from DebounceButton import DebouncedButton, CLICK, LONG, DOUBLE
+
+PIN = 34
+
+class Bench:
+    """一個按鈕 + 假時鐘（毫秒），依腳本驅動腳位並記錄觸發的事件"""
+    def __init__(self, monkeypatch, irq, held=False):
+        self.t = 0
+        self.irq = irq
+        monkeypatch.setattr(simctl, "elapsed", lambda: self.t / 1000)
+        monkeypatch.setattr(simctl, "pins", {})
+        monkeypatch.setattr(simctl, "levels", {PIN: 0} if held else {})  # held：開機時就按著
+        self.events = []
+        def cb(kind):
+            return lambda bid, pin: self.events.append(kind)
+        self.btn = DebouncedButton(PIN, on_click=cb(CLICK), on_long=cb(LONG), on_double=cb(DOUBLE),
+                                   irq=irq)
+
+    def set(self, level):
+        simctl.set_pin(PIN, level)
+
+    def run(self, ms):
+        """每毫秒 tick 一次，共 ms 毫秒"""
+        for _ in range(ms):
+            self.t += 1
+            self.btn.tick(self.t)
+
+    def bounce(self, level, edges=5):
+        """
+        電位來回跳 edges 次（每次間隔 1ms），最後停在 level。
+        中斷模式期間不 tick（邊緣全部進環形緩衝區）；輪詢模式每 1ms tick 一次才看得到每個邊緣。
+        """
+        for k in range(edges):
+            self.set(level if (edges - k) % 2 else 1 - level)
+            if self.irq:
+                self.t += 1
+            else:
+                self.run(1)
+
+    def press(self, hold_ms, edges=1):
+        self.bounce(0, edges)
+        self.run(hold_ms)
+        self.bounce(1, edges)
+
+    def settle(self):
+        """等到雙擊時間過了、所有事件都確認"""
+        self.run(self.btn.double_ms + 50)
+        assert self.btn.idle()
+        return self.events
+
+
+@pytest.fixture(params=[False, True], ids=["poll", "irq"])
+def bench(monkeypatch, request):
+    return Bench(monkeypatch, irq=request.param)
+
+@pytest.fixture
+def irq_bench(monkeypatch):
+    return Bench(monkeypatch, irq=True)
+
+def test_click(bench):
+    bench.press(100)
+    assert bench.settle() == [CLICK]
+
+def test_long(bench):
+    bench.press(900)
+    bench.run(DebouncedButton._STABLE_MS)
+    assert bench.events == [LONG]  # 放開穩定後立即觸發，不必等雙擊時間
+    assert bench.settle() == [LONG]
+
+def test_double(bench):
+    bench.press(80)
+    bench.run(150)
+    bench.press(80)
+    assert bench.settle() == [DOUBLE]
+
+def test_two_clicks_far_apart(bench):
+    bench.press(80)
+    bench.run(bench.btn.double_ms + 100)
+    bench.press(80)
+    assert bench.settle() == [CLICK, CLICK]
+
+def test_bounce_counts_once(bench):
+    bench.press(100, edges=7)
+    assert bench.settle() == [CLICK]
+
+def test_bounce_duration_not_counted_as_hold(bench):
+    # 按下的時間從第一個邊緣算起：彈跳 + 穩定時間不會把短按變成長按，也不會讓長按變短
+    bench.press(bench.btn._LONG_THRESHOLD - 30, edges=5)
+    assert bench.settle() == [CLICK]
+    bench.events.clear()
+    bench.press(bench.btn._LONG_THRESHOLD, edges=5)
+    assert bench.settle() == [LONG]
+
+def test_glitch_ignored(bench):
+    bench.set(0)
+    bench.run(DebouncedButton._STABLE_MS // 2)
+    bench.set(1)
+    assert bench.settle() == []
+
+def test_glitch_while_held(bench):
+    # 長按中間短暫跳高（短於去彈跳時間）不算放開
+    bench.set(0)
+    bench.run(400)
+    bench.set(1)
+    bench.run(3)
+    bench.set(0)
+    bench.run(500)
+    bench.set(1)
+    assert bench.settle() == [LONG]
+
+def test_glitch_between_clicks(bench):
+    # 雙擊等待期間的雜訊不影響判斷，也不會讓按鈕卡在非閒置狀態
+    bench.press(80)
+    bench.run(100)
+    bench.set(0)
+    bench.run(2)
+    bench.set(1)
+    assert bench.settle() == [CLICK]
+
+@pytest.mark.parametrize("edges", [DebouncedButton._RING + 1, DebouncedButton._RING + 4,
+                                   3 * DebouncedButton._RING])
+def test_ring_overflow(irq_bench, edges):
+    # 兩次 tick 之間的邊緣多於環形緩衝區：被覆蓋的邊緣丟棄，仍以實際電位判斷
+    irq_bench.press(100, edges=edges)
+    assert irq_bench.settle() == [CLICK]
+    irq_bench.events.clear()
+    irq_bench.press(900, edges=edges)
+    assert irq_bench.settle() == [LONG]
+
+def test_ring_overflow_then_double(irq_bench):
+    irq_bench.press(80, edges=DebouncedButton._RING + 3)
+    irq_bench.run(150)
+    irq_bench.press(80)
+    assert irq_bench.settle() == [DOUBLE]
+
+def test_edge_time_from_irq(irq_bench):
+    # 中斷模式以中斷當下的時間為邊緣時間：很晚才 tick 也不會把短按算成長按
+    irq_bench.set(0)
+    irq_bench.t += 100
+    irq_bench.set(1)
+    irq_bench.t += 900  # 這段期間完全沒有 tick
+    irq_bench.run(1)
+    assert irq_bench.settle() == [CLICK]
+
+def test_late_tick_keeps_every_press(irq_bench):
+    # 事件迴圈卡住期間的兩次短按仍依邊緣時間判斷為雙擊
+    for level, ms in ((0, 80), (1, 150), (0, 80), (1, 30)):
+        irq_bench.set(level)
+        irq_bench.t += ms  # 這段期間完全沒有 tick
+    irq_bench.run(1)
+    assert irq_bench.settle() == [DOUBLE]
+
+@pytest.mark.parametrize("irq", [False, True], ids=["poll", "irq"])
+def test_held_at_boot(monkeypatch, irq):
+    # 開機時就按著：放開時沒看到按下，不算任何事件；之後的按壓正常判斷
+    bench = Bench(monkeypatch, irq, held=True)
+    bench.run(900)
+    bench.bounce(1)
+    assert bench.settle() == []
+    bench.press(100)
+    assert bench.settle() == [CLICK]
+
+def test_idle_only_when_nothing_pending(bench):
+    assert bench.btn.idle()
+    bench.set(0)
+    bench.run(1)
+    assert not bench.btn.idle()       # 彈跳中
+    bench.run(100)
+    assert not bench.btn.idle()       # 按下中
+    bench.set(1)
+    bench.run(DebouncedButton._STABLE_MS)
+    assert not bench.btn.idle()       # 等待雙擊時間
+    assert bench.settle() == [CLICK]  # settle() 檢查最後回到閒置
+
+def test_events_queue(monkeypatch):
+    # 沒有回呼時事件放進 ButtonEvents 佇列（按鈕 id, 事件）
+    from DebounceButton import ButtonEvents
+    b = Bench(monkeypatch, irq=False)
+    ev = ButtonEvents(size=2)
+    b.btn = DebouncedButton(PIN, id=7, events=ev)
+    for _ in range(3):
+        b.press(900)
+        b.run(DebouncedButton._STABLE_MS)
+    assert ev._q == [(7, LONG), (7, LONG)]  # 佇列滿時丟棄最舊的
@@ -0,0 +1,74 @@
+# HTTP 請求解析測試：以假的連線串流餵入分段到達的資料，
+# 檢查 LineReader 的逐行切割、內容與下一個請求的銜接，以及超長行在讀滿緩衝區時就回覆 431。
+# 執行（在專案根目錄）：python -m pytest tests/
+
+import os, sys, asyncio
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [os.path.join(ROOT, "sim"), ROOT, os.path.join(ROOT, "lib")]
+
+import pytest
+from http_server import LineReader, HTTPError, MAX_LINE, read_request
+
+class Stream:
+    """依序交出 chunks 的假連線（之後視為對方關閉），記錄被讀走的 bytes 數"""
+    def __init__(self, *chunks):
+        self.chunks = list(chunks)
+        self.consumed = 0
+
+    async def readinto(self, buf):
+        data = await self.read(len(buf))
+        buf[:len(data)] = data
+        return len(data)
+
+    async def read(self, n):
+        if not self.chunks:
+            return b""
+        data, rest = self.chunks[0][:n], self.chunks[0][n:]
+        if rest:
+            self.chunks[0] = rest
+        else:
+            self.chunks.pop(0)
+        self.consumed += len(data)
+        return data
+
+def run(coro):
+    return asyncio.run(coro)
+
+def test_lines_split_across_reads():
+    r = LineReader(Stream(b"GET / HT", b"TP/1.1\r\nHo", b"st: x\r\n\r\n"))
+    assert run(r.readline()) == b"GET / HTTP/1.1\r\n"
+    assert run(r.readline()) == b"Host: x\r\n"
+    assert run(r.readline()) == b"\r\n"
+    assert run(r.readline()) == b""
+
+def test_body_and_pipelined_request():
+    raw = (b"POST /bulk HTTP/1.1\r\nContent-Length: 5\r\n\r\nhello"
+           b"GET /time?x=%E4%B8%AD HTTP/1.1\r\n\r\n")
+    async def go():
+        r = LineReader(Stream(raw))
+        req = await read_request(r)
+        assert (req.method, req.path, req.length) == ("POST", "/bulk", 5)
+        assert await req.read(100) == b"hello"
+        assert await req.read(100) == b""
+        req = await read_request(r)
+        assert (req.method, req.path, req.query) == ("GET", "/time", {"x": "中"})
+        assert await read_request(r) is None
+    run(go())
+
+def test_line_of_max_length_accepted():
+    line = b"X-Pad: " + b"a" * (MAX_LINE - 9) + b"\r\n"
+    assert len(line) == MAX_LINE
+    r = LineReader(Stream(b"ok\r\n" + line + b"next\r\n"))
+    assert run(r.readline()) == b"ok\r\n"
+    assert run(r.readline()) == line  # 前一行的空間會先騰出來
+    assert run(r.readline()) == b"next\r\n"
+
+@pytest.mark.parametrize("chunk", [1, 100, 4096])
+def test_long_line_rejected_once_buffer_full(chunk):
+    data = b"GET /" + b"a" * (10 * MAX_LINE)
+    s = Stream(*[data[i:i + chunk] for i in range(0, len(data), chunk)])
+    with pytest.raises(HTTPError) as e:
+        run(LineReader(s).readline())
+    assert e.value.status == 431
+    assert s.consumed == MAX_LINE  # 沒有繼續讀取這一行剩下的部分
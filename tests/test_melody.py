@@ -0,0 +1,102 @@
+# 旋律播放測試：以 sim/ 的假計時器（加速）執行 ToneSequencer，
+# 從 simctl.pwm_log 還原「何時開始發出哪個頻率」的時間軸，與曲子的音符長度 + 間隔比對；
+# 並檢查多個 play() 重疊時只有最後一個播放（ThreadSafeFlag 只允許一個等待者）。
+# 執行（在專案根目錄）：python -m pytest tests/
+
+import os, sys, asyncio
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [os.path.join(ROOT, "sim"), ROOT, os.path.join(ROOT, "lib")]
+
+import pytest
+import simctl
+from machine import Pin, PWM
+from melody import compile_melody, ToneSequencer
+
+SPEED = 10
+FREQS = {"C4": 262, "E4": 330, "G4": 392}
+SONG = compile_melody([("C4", 200), ("REST", 100), ("E4", 300), ("G4", 150)], FREQS)
+GAP = 40
+
+@pytest.fixture
+def seq(monkeypatch):
+    for name in ("_offset", "speed", "_base_sim", "_base_real"):
+        monkeypatch.setattr(simctl, name, getattr(simctl, name))
+    simctl.set_clock(simctl.now(), SPEED)
+    monkeypatch.setattr(simctl, "pwm_log", [])
+    return ToneSequencer(PWM(Pin(9)), gap_ms=GAP)
+
+def timeline():
+    """
+    把 pwm_log 化成 [(相對毫秒, 發聲頻率或 0), ...]，只留狀態改變的時間點；
+    以第一次發聲為 0（play() 開始前先 stop() 靜音的紀錄略過）
+    """
+    out = []
+    log = simctl.pwm_log
+    while not log[0][2]:
+        log = log[1:]
+    t0 = log[0][0]
+    for t, f, duty in log:
+        state = f if duty else 0
+        if not out or out[-1][1] != state:
+            out.append((t - t0, state))
+    return out
+
+def expected(song, gap):
+    out = []
+    t = 0
+    for i in range(0, len(song), 2):
+        f, ms = song[i], song[i + 1]
+        if not out or out[-1][1] != f:
+            out.append((t, f))
+        t += ms
+        if f:
+            out.append((t, 0))
+        t += gap
+    return out
+
+def assert_timeline(got, want):
+    """
+    頻率順序相同，且第一次切換之後的時間點完全吻合。
+    第一個音符在 play() 當下（計時器外）記錄，主機忙碌時會與計時器起點差幾毫秒，
+    所以從第一次由計時器切換的時間點起算。
+    """
+    assert [f for _, f in got] == [f for _, f in want]
+    assert [t - got[1][0] for t, _ in got[1:]] == [t - want[1][0] for t, _ in want[1:]], (got, want)
+
+def test_timeline_matches_song(seq):
+    asyncio.run(seq.play(SONG))
+    assert_timeline(timeline(), expected(SONG, GAP))
+    assert not seq.active()
+    assert seq.pwm.duty() == 0
+
+def test_seconds_limit(seq):
+    asyncio.run(seq.play(SONG, seconds=0.5))
+    want = [(t, f) for t, f in expected(SONG, GAP) if t < 500] + [(500, 0)]
+    assert_timeline(timeline(), want)
+
+def test_overlapping_play_only_last_plays(seq):
+    other = compile_melody([("G4", 100), ("E4", 100)], FREQS)
+    async def go():
+        first = asyncio.create_task(seq.play(SONG, loop=True))
+        while not seq.active():  # 第一首開始發聲
+            await asyncio.sleep(0)
+        second = asyncio.create_task(seq.play(SONG))
+        third = asyncio.create_task(seq.play(other))  # 排在 second 後面：second 不會開始
+        await asyncio.wait_for(asyncio.gather(first, second, third), 5)
+    asyncio.run(go())
+    got = timeline()
+    assert [f for _, f in got] == [262, 0, 392, 0, 330, 0]  # 第一首被打斷，第二首沒播，第三首完整播完
+    assert got[1][0] < 200                                 # 第一個音符一開始就被停止
+    assert [t - got[3][0] for t, _ in got[3:]] == [0, GAP, GAP + 100]
+    assert not seq.active()
+
+def test_stop_ends_play(seq):
+    async def go():
+        task = asyncio.create_task(seq.play(SONG, loop=True))
+        await asyncio.sleep(simctl.real(0.3))
+        seq.stop()
+        await asyncio.wait_for(task, 1)
+    asyncio.run(go())
+    assert seq.pwm.duty() == 0
+    assert not seq.active()